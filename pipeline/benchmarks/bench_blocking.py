@@ -0,0 +1,70 @@
+"""
+Team Blocking Benchmark
+The fuzzy step of fuzzy_match_names() with and without team blocking, on
+synthetic seasons (see synthetic.py) - FotMob rows carry the FotMob team
+spelling, Understat rows the Understat one, so canonical_team() has to
+line them up
+
+Reports the fuzzy comparisons made (names scored x candidates), the time,
+and the wrong matches against the synthetic ground truth. "league-wide" is
+the same call with the Understat teams dropped, i.e. the old behaviour.
+
+Usage:
+    python pipeline/benchmarks/bench_blocking.py [--leagues 1 5] [--threshold 85]
+"""
+import argparse
+import contextlib
+import io
+import re
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from format.name_matcher import fuzzy_match_names  # noqa: E402
+from synthetic import SyntheticSeasons  # noqa: E402
+
+
+def run(understat_df, fotmob_df, threshold):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        start = time.perf_counter()
+        result = fuzzy_match_names(understat_df, fotmob_df, threshold=threshold)
+        seconds = time.perf_counter() - start
+    found = re.search(r"Fuzzy comparisons: ([\d,]+)", out.getvalue())
+    return seconds, int(found.group(1).replace(',', '')) if found else 0, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--leagues', type=int, nargs='+', default=[1, 5])
+    parser.add_argument('--threshold', type=int, default=85)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'leagues':>7} {'mode':12} {'comparisons':>12} {'seconds':>8} {'fuzzy':>6} {'wrong':>6} {'unmatched':>9}")
+    for leagues in args.leagues:
+        data = SyntheticSeasons(leagues, 1, seed=args.seed)
+        understat_df = data.understat_season()
+        rows, truth = [], {}
+        for ls in data.league_seasons:
+            for team, squad in zip(ls['teams'], ls['squads']):
+                for player in squad:
+                    rows.append({'player_id': player['player_id'], 'name': player['name'], 'team': team['fotmob']})
+                    truth[player['name']] = player['understat_name']
+        fotmob_df = pd.DataFrame(rows)
+
+        comparisons = {}
+        for mode, understat in [('league-wide', understat_df.drop(columns='team')), ('team-blocked', understat_df)]:
+            seconds, comparisons[mode], result = run(understat, fotmob_df, args.threshold)
+            fuzzy = result[result['match_method'] == 'fuzzy']
+            wrong = int((fuzzy['matched_name'] != fuzzy['name'].map(truth)).sum())
+            print(f"{leagues:>7} {mode:12} {comparisons[mode]:>12,} {seconds:8.3f} {len(fuzzy):>6} {wrong:>6} "
+                  f"{(result['match_method'] == 'unmatched').sum():>9}")
+        print(f"{'':>7} {'reduction':12} {comparisons['league-wide'] / max(comparisons['team-blocked'], 1):>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Row Accumulator Memory Benchmark
+Memory held by a synthetic full season of per-match player rows: a list of
+row dicts (the old harvester output) against scrape/columnar.py's typed
+columns, both while accumulating and once handed to pandas
+
+Usage:
+    python pipeline/benchmarks/bench_columnar.py [--matches 380] [--seasons 1]
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scrape.columnar import KEEPER_SCHEMA, OUTFIELD_SCHEMA, ColumnarRows  # noqa: E402
+from scrape.fact_store import aggregate_defense, aggregate_keepers  # noqa: E402
+
+
+def synthetic_rows(n_matches, seed=0):
+    """
+    Outfield + keeper row dicts shaped like the harvester's: 20 teams with
+    28-man squads, 16 appearances per team per match
+    """
+    rng = random.Random(seed)
+    teams = [f"Team {t:02d}" for t in range(20)]
+    squads = {team: [(t * 1000 + i, f"Player {t:02d}-{i:02d} {'x' * rng.randint(4, 12)}")
+                     for i in range(28)] for t, team in enumerate(teams)}
+
+    for m in range(n_matches):
+        game_id = 4_500_000 + m
+        home, away = rng.sample(teams, 2)
+        for team in (home, away):
+            for i, (player_id, name) in enumerate(rng.sample(squads[team], 16)):
+                ident = {'game_id': game_id, 'player_id': player_id, 'name': name, 'team': team}
+                minutes = rng.choice([90, 90, 90, 75, 60, 20, 5])
+                rating = round(rng.uniform(5.5, 9.0), 1)
+                outfield = dict(ident, tackles_won=rng.randint(0, 5), interceptions=rng.randint(0, 4),
+                                duels_won=rng.randint(0, 9), was_fouled=rng.randint(0, 3),
+                                fouls_committed=rng.randint(0, 3), minutes=minutes, rating=rating)
+                keeper = None
+                if i == 0:
+                    conceded = rng.randint(0, 4)
+                    keeper = dict(ident, minutes=90, rating=rating, saves=rng.randint(0, 8),
+                                  goals_conceded=conceded, xgot_faced=rng.uniform(0, 3),
+                                  goals_prevented=rng.uniform(-1.5, 1.5), punches=rng.randint(0, 2),
+                                  high_claims=rng.randint(0, 3), recoveries=rng.randint(0, 9),
+                                  touches=rng.randint(20, 50), passes_accurate=rng.randint(10, 35),
+                                  long_balls_accurate=rng.randint(0, 10),
+                                  clean_sheet=1 if conceded == 0 else 0)
+                yield outfield, keeper
+
+
+def accumulate(make_table, n_matches):
+    outfield, keepers = make_table(OUTFIELD_SCHEMA), make_table(KEEPER_SCHEMA)
+    for row, keeper in synthetic_rows(n_matches):
+        outfield.append(row)
+        if keeper is not None:
+            keepers.append(keeper)
+    return outfield, keepers
+
+
+def measure(label, make_table, to_frame, n_matches):
+    tracemalloc.start()
+    start = time.perf_counter()
+    outfield, keepers = accumulate(make_table, n_matches)
+    held = tracemalloc.get_traced_memory()[0]
+    defense_df, keepers_df = to_frame(outfield), to_frame(keepers)
+    frame_peak = tracemalloc.get_traced_memory()[1]
+    season = aggregate_defense(defense_df), aggregate_keepers(keepers_df)
+    seconds = time.perf_counter() - start
+    tracemalloc.stop()
+
+    frame_bytes = (defense_df.memory_usage(deep=True).sum() + keepers_df.memory_usage(deep=True).sum())
+    return label, len(defense_df), held, frame_bytes, frame_peak, seconds, season
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--matches', type=int, default=380, help="matches per season")
+    parser.add_argument('--seasons', type=int, default=1)
+    args = parser.parse_args()
+    n_matches = args.matches * args.seasons
+
+    results = [
+        measure('list of dicts', lambda schema: [], pd.DataFrame, n_matches),
+        measure('columnar', lambda schema: ColumnarRows(schema, capacity=1024), ColumnarRows.to_frame, n_matches),
+    ]
+
+    for old, new in zip(results[0][-1], results[1][-1]):
+        # same totals - only the dtypes differ (categorical keys, int32 counts)
+        pd.testing.assert_frame_equal(old, new.astype(old.dtypes.to_dict()))
+    print(f"{n_matches} matches, {results[0][1]} outfield rows - season totals identical")
+    print(f"\n{'accumulator':14} {'rows held MB':>13} {'frame MB':>9} {'peak MB':>8} {'seconds':>8}")
+    for label, _, held, frame_bytes, peak, seconds, _ in results:
+        print(f"{label:14} {held / 1e6:13.2f} {frame_bytes / 1e6:9.2f} {peak / 1e6:8.2f} {seconds:8.2f}")
+    base, new = results[0], results[1]
+    print(f"\nrows held: {base[2] / new[2]:.1f}x smaller, peak: {base[4] / new[4]:.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Payload Decode Benchmark
+Decode time and peak memory for the matchDetails decode paths on recorded
+payloads: the old json.loads of the whole payload, the full decode through
+scrape/decode.py (orjson when installed) and the partial playerStats-only decode
+
+The partial path still runs the stdlib decoder over playerStats, so it only
+beats a full orjson decode when playerStats is a small share of the payload
+(under ~40% in local runs - live payloads carry commentary, lineups etc.)
+
+Usage (bundle recorded with `python -m scrape.replay record <bundle>`):
+    python pipeline/benchmarks/bench_decode.py --bundle /tmp/fotmob_bundle
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scrape import decode  # noqa: E402
+from scrape.replay import Bundle  # noqa: E402
+
+
+def legacy_player_stats(body):
+    # what the harvester did before scrape/decode.py
+    return json.loads(body).get('content', {}).get('playerStats')
+
+
+def load_bodies(bundle_dir):
+    bundle = Bundle(bundle_dir)
+    return [bundle.get(key)[2] for key in bundle.keys('fotmob/api/matchDetails')]
+
+
+def peak_memory(parse, bodies):
+    """
+    Highest traced allocation while decoding one payload (max over payloads)
+    """
+    peak = 0
+    for body in bodies:
+        tracemalloc.start()
+        parse(body)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bundle', type=Path, required=True, help="recorded replay bundle")
+    parser.add_argument('--repeat', type=int, default=10, help="passes over the payloads per timing")
+    args = parser.parse_args()
+
+    bodies = load_bodies(args.bundle)
+    if not bodies:
+        sys.exit(f"no matchDetails payloads in {args.bundle}")
+
+    paths = {
+        'json.loads (old)': legacy_player_stats,
+        f"full ({'orjson' if decode.orjson else 'json'})": decode.player_stats_full,
+        'partial': decode.player_stats_partial,
+    }
+
+    expected = [legacy_player_stats(b) for b in bodies]
+    for label, parse in paths.items():
+        assert [parse(b) for b in bodies] == expected, f"{label} decoded a different playerStats tree"
+
+    total_mb = sum(len(b) for b in bodies) / 1e6
+    print(f"{len(bodies)} payloads, {total_mb:.1f} MB - all paths return the same playerStats")
+
+    results = {}
+    for label, parse in paths.items():
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for body in bodies:
+                parse(body)
+        seconds = (time.perf_counter() - start) / args.repeat
+        # tracemalloc only sees Python allocations, orjson's are included
+        # (it allocates the result objects through the Python allocator)
+        results[label] = (seconds, peak_memory(parse, bodies))
+
+    baseline = results['json.loads (old)'][0]
+    print(f"\n{'decoder':18} {'ms/pass':>9} {'ms/match':>9} {'speedup':>8} {'peak MB':>8}")
+    for label, (seconds, peak) in results.items():
+        print(f"{label:18} {seconds * 1000:9.1f} {seconds / len(bodies) * 1000:9.2f} "
+              f"{baseline / seconds:7.2f}x {peak / 1e6:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Stat Extraction Micro-Benchmark
+Times the indexed one-pass extraction (scrape/stats.py, one index per player
+shared by both tables) against the old nested get_val() lookups on recorded
+matchDetails payloads, and checks both produce the same rows
+
+Usage (bundle recorded with `python -m scrape.replay record <bundle>`):
+    python pipeline/benchmarks/bench_extract.py --bundle /tmp/fotmob_bundle
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scrape.harvester import extract_match_rows, flatten_players  # noqa: E402
+from scrape.replay import Bundle  # noqa: E402
+
+
+# ========================================
+# LEGACY EXTRACTORS (pre-index, kept here as the baseline)
+# ========================================
+def legacy_outfield_rows(game_id, player_stats_root, out):
+    for p in flatten_players(player_stats_root, require_stats=True):
+        stats_list = p.get('stats', [])
+        row = {
+            'game_id': game_id, 'player_id': p.get('id'), 'name': p.get('name'),
+            'team': p.get('teamName'), 'tackles_won': 0, 'interceptions': 0,
+            'duels_won': 0, 'was_fouled': 0, 'fouls_committed': 0, 'minutes': 0, 'rating': 0.0
+        }
+        for category in stats_list:
+            metrics = category.get('stats', {})
+
+            def get_val(key):
+                if key in metrics:
+                    return metrics[key].get('stat', {}).get('value', 0)
+                return 0
+
+            row['tackles_won'] += int(get_val('Tackles'))
+            row['interceptions'] += int(get_val('Interceptions'))
+            row['duels_won'] += int(get_val('Duels won'))
+            row['was_fouled'] += int(get_val('Was fouled'))
+            row['fouls_committed'] += int(get_val('Fouls committed'))
+            mins = get_val('Minutes played')
+            if mins: row['minutes'] = int(mins)
+            rating = get_val('FotMob rating')
+            if rating: row['rating'] = float(rating)
+        out.append(row)
+
+
+def legacy_keeper_rows(game_id, player_stats_root, out):
+    for p in flatten_players(player_stats_root):
+        if not p.get('isGoalkeeper', False):
+            continue
+        stats_list = p.get('stats', [])
+        row = {
+            'game_id': game_id, 'player_id': p.get('id'), 'name': p.get('name'),
+            'team': p.get('teamName'), 'minutes': 0, 'rating': 0.0, 'saves': 0,
+            'goals_conceded': 0, 'xgot_faced': 0.0, 'goals_prevented': 0.0, 'punches': 0,
+            'high_claims': 0, 'recoveries': 0, 'touches': 0, 'passes_accurate': 0,
+            'long_balls_accurate': 0, 'clean_sheet': 0
+        }
+
+        def get_val(key_title):
+            for category in stats_list:
+                metrics = category.get('stats', {})
+                if key_title in metrics:
+                    return metrics[key_title].get('stat', {}).get('value', 0)
+            return 0
+
+        row['saves'] = int(get_val('Saves'))
+        row['goals_conceded'] = int(get_val('Goals conceded'))
+        row['punches'] = int(get_val('Punches'))
+        row['high_claims'] = int(get_val('High claims'))
+        row['recoveries'] = int(get_val('Recoveries'))
+        row['touches'] = int(get_val('Touches'))
+        row['goals_prevented'] = float(get_val('Goals prevented') or 0.0)
+        row['xgot_faced'] = float(get_val('Expected goals on target (xGOT)') or 0.0)
+        row['passes_accurate'] = int(get_val('Accurate passes'))
+        row['long_balls_accurate'] = int(get_val('Accurate long balls'))
+        row['minutes'] = int(get_val('Minutes played'))
+        row['rating'] = float(get_val('FotMob rating') or 0.0)
+        if row['goals_conceded'] == 0 and row['minutes'] > 80:
+            row['clean_sheet'] = 1
+        out.append(row)
+
+
+def load_roots(bundle_dir):
+    bundle = Bundle(bundle_dir)
+    roots = []
+    for key in bundle.keys('fotmob/api/matchDetails'):
+        _, _, body = bundle.get(key)
+        root = json.loads(body).get('content', {}).get('playerStats')
+        if root:
+            roots.append((int(key.rsplit('=', 1)[1]), root))
+    return roots
+
+
+def run_legacy(roots):
+    outfield, keepers = [], []
+    for game_id, root in roots:
+        legacy_outfield_rows(game_id, root, outfield)
+        legacy_keeper_rows(game_id, root, keepers)
+    return outfield, keepers
+
+
+def run_indexed(roots):
+    outfield, keepers = [], []
+    for game_id, root in roots:
+        extract_match_rows(game_id, root, outfield, keepers)
+    return outfield, keepers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bundle', type=Path, required=True, help="recorded replay bundle")
+    parser.add_argument('--repeat', type=int, default=10, help="passes over the payloads per timing")
+    args = parser.parse_args()
+
+    roots = load_roots(args.bundle)
+    if not roots:
+        sys.exit(f"no matchDetails payloads with playerStats in {args.bundle}")
+
+    legacy = run_legacy(roots)
+    indexed = run_indexed(roots)
+    assert legacy == indexed, "indexed extractors produced different rows"
+    n_players = len(legacy[0])
+    print(f"{len(roots)} matches, {n_players} player rows, {len(legacy[1])} keeper rows - outputs identical")
+
+    results = {}
+    for label, run in (('nested get_val', run_legacy), ('indexed', run_indexed)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            run(roots)
+        results[label] = (time.perf_counter() - start) / args.repeat
+
+    baseline = results['nested get_val']
+    print(f"\n{'extractor':16} {'ms/pass':>9} {'us/player':>10} {'speedup':>8}")
+    for label, seconds in results.items():
+        print(f"{label:16} {seconds * 1000:9.1f} {seconds / n_players * 1e6:10.2f} {baseline / seconds:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Fetch Throughput Benchmark
+Compares the old one-match-at-a-time requests loop with the concurrent
+fetcher, against the local replay server serving recorded matchDetails payloads
+
+Usage (bundle recorded with `python -m scrape.replay record <bundle>`):
+    python pipeline/benchmarks/bench_fetch.py --bundle /tmp/fotmob_bundle --latency 0.15
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scrape.fetcher import fetch_ordered  # noqa: E402
+from scrape.http_client import HttpClient  # noqa: E402
+from scrape.replay import Bundle, ReplayServer  # noqa: E402
+
+
+def sequential_loop(urls, timeout):
+    # the pre-async harvester loop: one blocking request + decode per match
+    for url in urls:
+        r = requests.get(url, timeout=timeout)
+        r.json()
+
+
+def concurrent_fetch(urls, timeout, concurrency):
+    # pooled client without the per-host rate limit - we're measuring the engine
+    client = HttpClient(pool_size=max(concurrency, 16), rate_limit=0)
+
+    def fetch(url, timeout):
+        return client.get(url, timeout=timeout).content
+
+    def handle(i, body, error):
+        if error is not None:
+            raise error
+        json.loads(body)
+    fetch_ordered(urls, handle, concurrency=concurrency, timeout=timeout, fetch=fetch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bundle', type=Path, required=True, help="recorded replay bundle")
+    parser.add_argument('--latency', type=float, default=0.1, help="simulated server latency per request (s)")
+    parser.add_argument('--repeat', type=int, default=5, help="request each payload this many times")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    bundle = Bundle(args.bundle)
+    keys = bundle.keys('fotmob/api/matchDetails')
+    if not keys:
+        sys.exit(f"no matchDetails payloads found in {args.bundle}")
+
+    with ReplayServer(bundle, latency=args.latency) as server:
+        urls = [f"{server.base_url}/{key}" for key in keys] * args.repeat
+        print(f"{len(keys)} payloads x {args.repeat} = {len(urls)} requests, {args.latency * 1000:.0f} ms latency")
+
+        results = {}
+        start = time.perf_counter()
+        sequential_loop(urls, timeout=5)
+        results['sequential'] = time.perf_counter() - start
+
+        for concurrency in args.concurrency:
+            start = time.perf_counter()
+            concurrent_fetch(urls, timeout=5, concurrency=concurrency)
+            results[f'async x{concurrency}'] = time.perf_counter() - start
+
+    baseline = results['sequential']
+    print(f"\n{'mode':15} {'seconds':>8} {'matches/s':>10} {'speedup':>8}")
+    for mode, seconds in results.items():
+        print(f"{mode:15} {seconds:8.2f} {len(urls) / seconds:10.1f} {baseline / seconds:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
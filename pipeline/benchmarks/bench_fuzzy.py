@@ -0,0 +1,70 @@
+"""
+Fuzzy Scoring Benchmark
+The fuzzy step of fuzzy_match_names(): one process.extractOne() per
+unmatched FotMob name against best_matches(), which scores them in batched
+cdist calls on every core
+
+Queries are the roster names the exact step wouldn't catch. Both sides are
+timed on the same (up to --queries) names and must return identical
+matches and scores; the full-roster time is extrapolated from that.
+
+Usage:
+    python pipeline/benchmarks/bench_fuzzy.py [--sizes 500 5000 50000] [--queries 2000]
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+from rapidfuzz import fuzz, process
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from format.name_matcher import best_matches, build_name_index, normalize_name  # noqa: E402
+from synthetic import roster  # noqa: E402
+
+
+def run_extract_one(queries, choices, threshold):
+    results = []
+    for query in queries:
+        best = process.extractOne(query, choices, scorer=fuzz.token_sort_ratio)
+        results.append((best[0], best[1]) if best and best[1] >= threshold else (None, 0))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 5000, 50000])
+    parser.add_argument('--queries', type=int, default=2000, help="unmatched names timed per size")
+    parser.add_argument('--threshold', type=int, default=85)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs")
+    print(f"{'names':>7} {'queries':>8} {'extractOne (s)':>15} {'cdist (s)':>10} {'speedup':>8} {'matched':>8}")
+    for size in args.sizes:
+        players = roster(size, seed=size)
+        fotmob_names = list(dict.fromkeys(p['name'] for p in players))
+        understat_names = list(dict.fromkeys(p['understat_name'] for p in players))
+
+        by_lower, by_normalized = build_name_index(understat_names)
+        unmatched = [n for n in fotmob_names
+                     if n.lower() not in by_lower and normalize_name(n) not in by_normalized]
+        queries = unmatched[:args.queries]
+        scale = len(unmatched) / len(queries)
+
+        start = time.perf_counter()
+        expected = run_extract_one(queries, understat_names, args.threshold)
+        loop_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batched = best_matches(queries, understat_names, score_cutoff=args.threshold)
+        batch_seconds = time.perf_counter() - start
+
+        assert batched == expected, "best_matches disagrees with extractOne"
+        estimated = '~' if scale > 1 else ' '
+        print(f"{size:>7} {len(unmatched):>8} {estimated}{loop_seconds * scale:14.3f} {estimated}{batch_seconds * scale:9.3f} "
+              f"{loop_seconds / batch_seconds:7.1f}x {sum(1 for m, _ in batched if m):>8}")
+
+
+if __name__ == "__main__":
+    main()
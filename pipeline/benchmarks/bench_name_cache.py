@@ -0,0 +1,88 @@
+"""
+Name Cache Benchmark
+A week-on-week match_names run: cold (every player through
+fuzzy_match_names(), what the pipeline did before the cache) against warm
+(a NameCache left by last week's run, which had --new-share fewer players)
+
+The warm time includes loading and saving the cache file. Both runs have
+to produce the same DataFrame. Past CACHE_MAX_STALE_SHARE new players the
+warm run re-matches everyone, and pays for the cache file on top.
+
+Usage:
+    python pipeline/benchmarks/bench_name_cache.py [--leagues 1 5] [--new-share 0.05]
+"""
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from format.name_cache import NameCache  # noqa: E402
+from format.name_matcher import cached_match_names, fuzzy_match_names  # noqa: E402
+from synthetic import SyntheticSeasons  # noqa: E402
+
+
+def fotmob_frame(data):
+    rows = []
+    for ls in data.league_seasons:
+        for team, squad in zip(ls['teams'], ls['squads']):
+            for player in squad:
+                rows.append({'player_id': player['player_id'], 'name': player['name'], 'team': team['fotmob']})
+    return pd.DataFrame(rows)
+
+
+def warm_run(path, understat_df, fotmob_df, threshold):
+    cache = NameCache(path, threshold)
+    result = cached_match_names(understat_df, fotmob_df, threshold, cache=cache)
+    cache.save()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--leagues', type=int, nargs='+', default=[1, 5])
+    parser.add_argument('--new-share', type=float, default=0.05, help="players that are new this week")
+    parser.add_argument('--threshold', type=int, default=85)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'leagues':>7} {'players':>8} {'cold (s)':>9} {'warm (s)':>9} {'speedup':>8} {'re-matched':>11}")
+    for leagues in args.leagues:
+        data = SyntheticSeasons(leagues, 1, seed=args.seed)
+        understat_df = data.understat_season()
+        fotmob_df = fotmob_frame(data)
+        last_week = fotmob_df.iloc[:int(len(fotmob_df) * (1 - args.new_share))]
+
+        cold_runs, warm_runs = [], []
+        with tempfile.TemporaryDirectory(prefix='premier-names-') as tmp:
+            for i in range(args.repeat):
+                path = Path(tmp) / f"names-{i}.json"
+                out = io.StringIO()
+                with contextlib.redirect_stdout(out):
+                    start = time.perf_counter()
+                    cold = fuzzy_match_names(understat_df, fotmob_df, args.threshold)
+                    cold_runs.append(time.perf_counter() - start)
+
+                    warm_run(path, understat_df, last_week, args.threshold)
+                    out.seek(0)
+                    out.truncate()
+                    start = time.perf_counter()
+                    warm = warm_run(path, understat_df, fotmob_df, args.threshold)
+                    warm_runs.append(time.perf_counter() - start)
+                assert warm.equals(cold), "cached run disagrees with the cold run"
+        rematched = next(line for line in out.getvalue().splitlines() if line.startswith('Name cache:'))
+        rematched = rematched.split(', ')[-1].split()[0]
+
+        cold_seconds, warm_seconds = min(cold_runs), min(warm_runs)
+        print(f"{leagues:>7} {fotmob_df['player_id'].nunique():>8} {cold_seconds:9.3f} {warm_seconds:9.3f} "
+              f"{cold_seconds / warm_seconds:7.1f}x {rematched:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Exact Name Match Benchmark
+The exact-match step of fuzzy_match_names(): the old scan (every FotMob name
+against every Understat name, .lower() on both sides) against the hash
+index from build_name_index(), at several roster sizes
+
+The scan is O(N x M), so above --scan-limit FotMob names it's timed on a
+sample and extrapolated (marked with ~) - it's linear in the FotMob side.
+
+Usage:
+    python pipeline/benchmarks/bench_name_index.py [--sizes 500 5000 50000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from format.name_matcher import build_name_index, normalize_name  # noqa: E402
+from synthetic import roster  # noqa: E402
+
+
+def run_scan(fotmob_names, understat_names):
+    # the loop fuzzy_match_names used to run
+    found = {}
+    for fotmob_name in fotmob_names:
+        for understat_name in understat_names:
+            if fotmob_name.lower() == understat_name.lower():
+                found[fotmob_name] = understat_name
+                break
+    return found
+
+
+def run_index(fotmob_names, understat_names, accents=True):
+    by_lower, by_normalized = build_name_index(understat_names)
+    found = {}
+    for fotmob_name in fotmob_names:
+        understat_name = by_lower.get(fotmob_name.lower())
+        if understat_name is None and accents:
+            understat_name = by_normalized.get(normalize_name(fotmob_name))
+        if understat_name is not None:
+            found[fotmob_name] = understat_name
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 5000, 50000])
+    parser.add_argument('--scan-limit', type=int, default=2000,
+                        help="FotMob names the scan is timed on before extrapolating")
+    args = parser.parse_args()
+
+    print(f"{'names':>7} {'scan (s)':>11} {'index (s)':>10} {'speedup':>9} {'exact':>7} {'+accents':>9}")
+    for size in args.sizes:
+        players = roster(size, seed=size)
+        fotmob_names = list(dict.fromkeys(p['name'] for p in players))
+        understat_names = list(dict.fromkeys(p['understat_name'] for p in players))
+
+        sample = fotmob_names[:args.scan_limit]
+        start = time.perf_counter()
+        scanned = run_scan(sample, understat_names)
+        scan_seconds = (time.perf_counter() - start) * len(fotmob_names) / len(sample)
+        estimated = '~' if len(sample) < len(fotmob_names) else ' '
+
+        start = time.perf_counter()
+        indexed = run_index(fotmob_names, understat_names)
+        index_seconds = time.perf_counter() - start
+
+        # the case-insensitive part has to agree with the scan exactly
+        case_only = run_index(sample, understat_names, accents=False)
+        assert case_only == scanned, "hash index disagrees with the scan"
+
+        print(f"{size:>7} {estimated}{scan_seconds:10.3f} {index_seconds:10.4f} {scan_seconds / index_seconds:8.0f}x "
+              f"{len(run_index(fotmob_names, understat_names, accents=False)):>7} {len(indexed):>9}")
+
+
+if __name__ == "__main__":
+    main()
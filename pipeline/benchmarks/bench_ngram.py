@@ -0,0 +1,68 @@
+"""
+N-gram Index Benchmark
+Recall and latency of NgramIndex (trigram candidates + rapidfuzz re-rank)
+against best_matches() scoring every candidate
+
+Queries are normalized FotMob roster names the exact step wouldn't catch;
+choices are the normalized Understat names. Recall is the share of queries
+where the index returns the same match and score as brute force, plus
+recall@K: how often the brute-force best is among the K retrieved candidates
+at all. Brute force is timed on a sample of the queries and extrapolated.
+
+Usage:
+    python pipeline/benchmarks/bench_ngram.py [--sizes 10000 100000] [--queries 2000] [--top-k 20 50 100]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from format.name_matcher import best_matches, normalize_names  # noqa: E402
+from format.ngram_index import NgramIndex  # noqa: E402
+from synthetic import roster  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--queries', type=int, default=2000, help="unmatched names matched per size")
+    parser.add_argument('--brute-queries', type=int, default=500, help="of those, how many brute force is timed on")
+    parser.add_argument('--top-k', type=int, nargs='+', default=[20, 50, 100])
+    parser.add_argument('--threshold', type=int, default=85)
+    args = parser.parse_args()
+
+    print(f"{'names':>7} {'choices':>8} {'queries':>8} {'build (s)':>10} {'brute/q (ms)':>13} "
+          f"{'K':>4} {'index/q (ms)':>13} {'speedup':>8} {'agree':>7} {'recall@K':>9}")
+    for size in args.sizes:
+        players = roster(size, seed=size)
+        choices = list(dict.fromkeys(normalize_names([p['understat_name'] for p in players]).tolist()))
+        known = set(choices)
+        fotmob_keys = list(dict.fromkeys(normalize_names([p['name'] for p in players]).tolist()))
+        queries = [key for key in fotmob_keys if key not in known][:args.queries]
+        sample = queries[:args.brute_queries]
+
+        start = time.perf_counter()
+        index = NgramIndex(choices)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = best_matches(sample, choices, score_cutoff=args.threshold)
+        brute_ms = (time.perf_counter() - start) / len(sample) * 1000
+        position = {choice: i for i, choice in enumerate(choices)}
+
+        for k in args.top_k:
+            start = time.perf_counter()
+            found = index.best_matches(queries, score_cutoff=args.threshold, k=k)
+            index_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+            agree = sum(1 for got, want in zip(found, expected) if got == want)
+            wanted = [(query, position[match]) for query, (match, _) in zip(sample, expected) if match is not None]
+            retrieved = sum(1 for query, i in wanted if i in set(index.candidates(query, k).tolist()))
+            print(f"{size:>7} {len(choices):>8} {len(queries):>8} {build_seconds:10.2f} {brute_ms:13.3f} "
+                  f"{k:>4} {index_ms:13.3f} {brute_ms / index_ms:7.1f}x {agree / len(sample):7.1%} "
+                  f"{retrieved / max(1, len(wanted)):9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Name Normalization Benchmark
+Per-name cost of the old normalize_name() (18 chained str.replace calls over
+a fixed accent list) against the NFKD + translate-table normalize_name(),
+one name at a time and over a whole column with normalize_names()
+
+Columns are FotMob + Understat spellings of a synthetic roster, so names
+repeat the way they do in the season tables. "non-ascii" counts the keys
+that still aren't plain ASCII after normalizing (letters the old list
+didn't know about: š, ć, ę, ğ, ...).
+
+Usage:
+    python pipeline/benchmarks/bench_normalize.py [--sizes 1000 10000 100000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from format.name_matcher import normalize_name, normalize_names  # noqa: E402
+from synthetic import roster  # noqa: E402
+
+
+REPLACEMENTS = {
+    'ø': 'o', 'ö': 'o', 'ü': 'u', 'ä': 'a', 'é': 'e', 'è': 'e', 'ê': 'e', 'á': 'a', 'à': 'a',
+    'â': 'a', 'í': 'i', 'ì': 'i', 'ó': 'o', 'ò': 'o', 'ú': 'u', 'ù': 'u', 'ñ': 'n', 'ç': 'c',
+}
+
+
+def old_normalize_name(name):
+    # the function normalize_name replaced
+    if pd.isna(name):
+        return ""
+    name = str(name).strip().lower()
+    for old, new in REPLACEMENTS.items():
+        name = name.replace(old, new)
+    return name
+
+
+def best_of(func, repeat):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        runs.append(time.perf_counter() - start)
+    return min(runs), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'names':>7} {'unique':>7} {'old (us)':>9} {'new (us)':>9} {'column (us)':>12} {'speedup':>8} "
+          f"{'non-ascii old':>14} {'new':>5}")
+    for size in args.sizes:
+        players = roster(size // 2, seed=size)
+        column = pd.Series([p['name'] for p in players] + [p['understat_name'] for p in players])
+        names = column.tolist()
+
+        old_seconds, old_keys = best_of(lambda: [old_normalize_name(name) for name in names], args.repeat)
+        new_seconds, new_keys = best_of(lambda: [normalize_name(name) for name in names], args.repeat)
+        column_seconds, column_keys = best_of(lambda: normalize_names(column), args.repeat)
+        assert column_keys.tolist() == new_keys, "normalize_names disagrees with normalize_name"
+
+        per_name = 1e6 / len(names)
+        print(f"{len(names):>7} {column.nunique():>7} {old_seconds * per_name:9.2f} {new_seconds * per_name:9.2f} "
+              f"{column_seconds * per_name:12.2f} {old_seconds / column_seconds:7.1f}x "
+              f"{sum(not key.isascii() for key in old_keys):>14} {sum(not key.isascii() for key in new_keys):>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Parse Stage Scaling Benchmark
+Throughput of the harvester's parse stage (decode + row extraction) across
+worker counts, on a multi-season corpus built from a recorded replay bundle
+(every recorded payload is reused once per season under a new match id)
+
+Usage (bundle recorded with `python -m scrape.replay record <bundle>`):
+    python pipeline/benchmarks/bench_parse.py --bundle /tmp/fotmob_bundle --seasons 5
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scrape.harvester import ParseStage  # noqa: E402
+from scrape.replay import Bundle  # noqa: E402
+
+
+def load_corpus(bundle_dir, seasons):
+    bundle = Bundle(bundle_dir)
+    bodies = [bundle.get(key)[2] for key in bundle.keys('fotmob/api/matchDetails')]
+    corpus = []
+    for season in range(seasons):
+        for i, body in enumerate(bodies):
+            corpus.append((season * 1_000_000 + i, body))
+    return corpus
+
+
+def run(corpus, workers, batch_size, decode_mode):
+    stage = ParseStage(workers=workers, decode_mode=decode_mode, batch_size=batch_size, capacity=len(corpus))
+    start = time.perf_counter()
+    try:
+        for game_id, body in corpus:
+            stage.submit(game_id, body)
+        outfield, keepers = stage.finish()
+    finally:
+        stage.close()
+    # pool start-up is included - it's paid once per run in the pipeline too
+    return time.perf_counter() - start, outfield.to_frame(), keepers.to_frame()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bundle', type=Path, required=True, help="recorded replay bundle")
+    parser.add_argument('--seasons', type=int, default=5, help="copies of the recorded season in the corpus")
+    parser.add_argument('--workers', type=int, nargs='+', default=None,
+                        help="worker counts to try (default: 0, 1, 2, 4 ... up to the CPU count)")
+    parser.add_argument('--batch', type=int, default=16, help="matches per worker handoff")
+    parser.add_argument('--decode', choices=['partial', 'full'], default='partial')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.bundle, args.seasons)
+    if not corpus:
+        sys.exit(f"no matchDetails payloads in {args.bundle}")
+
+    worker_counts = args.workers
+    if worker_counts is None:
+        cpus = os.cpu_count() or 1
+        worker_counts = [0] + [w for w in (1, 2, 4, 8, 16, 32) if w <= cpus]
+        if cpus not in worker_counts:
+            worker_counts.append(cpus)
+
+    print(f"{len(corpus)} matches ({args.seasons} seasons), {os.cpu_count()} CPUs, batch {args.batch}")
+    print(f"\n{'workers':>8} {'seconds':>8} {'matches/s':>10} {'speedup':>8}")
+
+    baseline = reference = None
+    for workers in worker_counts:
+        seconds, defense_df, keepers_df = run(corpus, workers, args.batch, args.decode)
+        if reference is None:
+            reference = (defense_df, keepers_df)
+        else:
+            # rows come back in submission order whatever the worker count
+            assert defense_df.equals(reference[0]) and keepers_df.equals(reference[1]), \
+                f"{workers} workers produced different rows"
+        baseline = baseline or seconds
+        label = 'inline' if workers == 0 else str(workers)
+        print(f"{label:>8} {seconds:8.2f} {len(corpus) / seconds:10.0f} {baseline / seconds:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Pipeline Benchmark Suite
+Times the pipeline's heavy steps on synthetic seasons (see synthetic.py) at
+several scales, so scaling curves can be tracked before more leagues go in:
+    parse      harvest parse stage (decode + row extraction), per playerStats format
+    aggregate  per-match rows -> season tables
+    match      resolve_identities() over the defensive and keeper tables
+    format     format_all()
+    push       push_table() for every table, against a local Postgres (optional)
+
+Scales are LEAGUESxSEASONS (1x1 = one Premier League season, 380 matches).
+Every number comes from the same seed, so two runs of the same commit see
+the same bytes. Results go to a JSON file (data/reports/bench-<time>.json
+by default) - diff two of them to compare commits.
+
+The push benchmark needs sqlalchemy + psycopg2 and a THROWAWAY database
+(its tables are dropped and recreated from schema.sql, constraints and all):
+    python pipeline/benchmarks/bench_suite.py --database-url postgresql://localhost/premier_bench
+
+Usage:
+    python pipeline/benchmarks/bench_suite.py [--scales 1x1 5x1 5x4] [--benches parse match format]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from importlib import metadata
+from pathlib import Path
+
+import pandas as pd
+
+PIPELINE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PIPELINE_DIR))
+from format import format_functions  # noqa: E402
+from format.name_matcher import attach_identities, resolve_identities  # noqa: E402
+from scrape.fact_store import aggregate_defense, aggregate_keepers  # noqa: E402
+from scrape.harvester import ParseStage  # noqa: E402
+from synthetic import SyntheticSeasons  # noqa: E402
+from telemetry import git_commit, rss_bytes  # noqa: E402
+
+
+BENCHES = ['parse', 'aggregate', 'match', 'format', 'push']
+PACKAGES = ['pandas', 'numpy', 'pyarrow', 'rapidfuzz', 'orjson', 'sqlalchemy']
+TABLES = ['players', 'defensive', 'offensive', 'keepers', 'league_table']
+
+# the production schema push_to_db upserts into (players.full_name is what the other tables point at)
+SCHEMA_PATH = PIPELINE_DIR.parent / 'schema.sql'
+
+
+@contextlib.contextmanager
+def quiet():
+    # the pipeline functions print a lot - keep it out of the timings' way
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def timed(func, repeat):
+    """
+    Best of `repeat` runs: (seconds, every run's seconds, last result)
+    """
+    runs, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        runs.append(time.perf_counter() - start)
+    return min(runs), [round(r, 4) for r in runs], result
+
+
+# ========================================
+# BENCHES
+# ========================================
+def bench_parse(data, fmt, batch_size):
+    """
+    Parse every match of every league-season. Payloads are generated one
+    league-season at a time, outside the timed part.
+    """
+    stage = ParseStage(workers=0, batch_size=batch_size, capacity=len(data) * 32)
+    seconds, size = 0.0, 0
+    chunk_size = data.n_teams * (data.n_teams - 1)
+    chunk = []
+    try:
+        for game_id, body in data.matches(fmt):
+            chunk.append((game_id, body))
+            if len(chunk) < chunk_size:
+                continue
+            size += sum(len(body) for _, body in chunk)
+            start = time.perf_counter()
+            for game_id, body in chunk:
+                stage.submit(game_id, body)
+            seconds += time.perf_counter() - start
+            chunk = []
+        start = time.perf_counter()
+        outfield, keepers = stage.finish()
+        seconds += time.perf_counter() - start
+    finally:
+        stage.close()
+    return seconds, size, outfield, keepers
+
+
+def bench_match(understat_df, defense_df, keepers_df, repeat):
+    def run():
+        with quiet():
+            return resolve_identities(understat_df, [defense_df, keepers_df])
+    return timed(run, repeat)
+
+
+def bench_format(raw_dir, formatted_dir, repeat):
+    # format_functions reads/writes its module-level dirs
+    saved = format_functions.RAW_DIR, format_functions.FORMATTED_DIR
+    format_functions.RAW_DIR, format_functions.FORMATTED_DIR = raw_dir, formatted_dir
+    try:
+        with quiet():
+            return timed(format_functions.format_all, repeat)
+    finally:
+        format_functions.RAW_DIR, format_functions.FORMATTED_DIR = saved
+
+
+def schema_statements():
+    """
+    (table names, CREATE statements) from schema.sql
+    """
+    statements = [s.strip() for s in SCHEMA_PATH.read_text().split(';') if s.strip()]
+    tables = [re.search(r'create table (?:public\.)?(\w+)', s, re.IGNORECASE).group(1) for s in statements]
+    return tables, statements
+
+
+def bench_push(formatted_dir, database_url):
+    os.environ['DATABASE_URL'] = database_url
+    import push_to_db
+    from sqlalchemy import text
+
+    engine = push_to_db.get_engine()
+    schema_tables, statements = schema_statements()
+    with engine.connect() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {', '.join(schema_tables)} CASCADE"))
+        for statement in statements:
+            conn.execute(text(statement))
+        conn.commit()
+
+    # players.full_name is UNIQUE - synthetic rosters repeat names across teams (and
+    # leagues/seasons), so keep one row per full name like the production table can
+    players_path = formatted_dir / 'players.csv'
+    players = pd.read_csv(players_path)
+    full_name = players['first_name'] + ' ' + players['last_name']
+    players[full_name.isna() | ~full_name.duplicated()].to_csv(players_path, index=False)
+
+    # push_to_db logs every batch - only its own logger is muted
+    push_to_db.logger.disabled = True
+    try:
+        start = time.perf_counter()
+        for table in TABLES:
+            push_to_db.push_table(engine, table, formatted_dir / f"{table}.csv")
+        seconds = time.perf_counter() - start
+    finally:
+        push_to_db.logger.disabled = False
+
+    with engine.connect() as conn:
+        rows = {table: conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar() for table in TABLES}
+    engine.dispose()
+    return seconds, rows
+
+
+# ========================================
+# SUITE
+# ========================================
+def run_scale(scale, args, workdir):
+    leagues, seasons = (int(x) for x in scale.lower().split('x'))
+    data = SyntheticSeasons(leagues, seasons, seed=args.seed)
+    base = {'scale': scale, 'leagues': leagues, 'seasons': seasons, 'matches': len(data)}
+    results = []
+
+    def record(bench, seconds, **extra):
+        entry = dict(base, bench=bench, seconds=round(seconds, 4), rss_mb=round(rss_bytes() / 1e6, 1), **extra)
+        results.append(entry)
+        print(f"  {scale:>6} {bench:10} {extra.get('format', ''):3} {seconds:9.3f}s")
+        return entry
+
+    # parse (per format) - the Format A rows feed everything after it
+    outfield = keepers = None
+    for fmt in args.formats if 'parse' in args.benches else args.formats[:1]:
+        seconds, size, out, kept = bench_parse(data, fmt, args.parse_batch)
+        if 'parse' in args.benches:
+            record('parse', seconds, format=fmt, payload_mb=round(size / 1e6, 1), rows=len(out),
+                   ms_per_match=round(seconds * 1000 / len(data), 3))
+        if outfield is None:
+            outfield, keepers = out, kept
+        del out, kept
+
+    if outfield is None or not set(args.benches) - {'parse'}:
+        return results
+
+    defense_rows, keeper_rows = outfield.to_frame(), keepers.to_frame()
+    del outfield, keepers
+    seconds, runs, (defense_df, keepers_df) = timed(
+        lambda: (aggregate_defense(defense_rows), aggregate_keepers(keeper_rows)), args.repeat)
+    if 'aggregate' in args.benches:
+        record('aggregate', seconds, runs=runs, rows_in=len(defense_rows) + len(keeper_rows),
+               rows_out=len(defense_df) + len(keepers_df))
+    del defense_rows, keeper_rows
+
+    raw_dir, formatted_dir = workdir / scale / 'raw', workdir / scale / 'formatted'
+    formatted_dir.mkdir(parents=True, exist_ok=True)
+    understat_df = data.write_understat(raw_dir)
+
+    seconds, runs, identities = bench_match(understat_df, defense_df, keepers_df, args.repeat)
+    if 'match' in args.benches:
+        record('match', seconds, runs=runs,
+               fotmob_players=len(identities),
+               understat_names=int(understat_df['player'].nunique()),
+               unmatched=int((attach_identities(defense_df, identities)['match_method'] == 'unmatched').sum()))
+    defense_df.to_csv(raw_dir / 'fotmob_defense_season_final.csv', index=False)
+    keepers_df.to_csv(raw_dir / 'fotmob_keepers_season.csv', index=False)
+    identities.to_csv(raw_dir / 'player_identities.csv', index=False)
+
+    if 'format' in args.benches or 'push' in args.benches:
+        seconds, runs, _ = bench_format(raw_dir, formatted_dir, args.repeat)
+        if 'format' in args.benches:
+            record('format', seconds, runs=runs,
+                   rows_out=sum(len(pd.read_csv(formatted_dir / f"{t}.csv")) for t in TABLES[:4]))
+
+    if 'push' in args.benches:
+        if not args.database_url:
+            print(f"  {scale:>6} push       skipped (no --database-url / BENCH_DATABASE_URL)")
+        else:
+            data.league_table().to_csv(formatted_dir / 'league_table.csv', index=False)
+            seconds, rows = bench_push(formatted_dir, args.database_url)
+            record('push', seconds, rows=rows, rows_per_s=round(sum(rows.values()) / seconds, 1))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', nargs='+', default=['1x1', '5x1', '5x4'],
+                        help="LEAGUESxSEASONS to run (default: 1x1 5x1 5x4, i.e. 1, 5 and 20 league-seasons)")
+    parser.add_argument('--benches', nargs='+', choices=BENCHES, default=BENCHES)
+    parser.add_argument('--formats', nargs='+', choices=['A', 'B', 'mixed'], default=['A', 'B'],
+                        help="playerStats shapes to parse")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per timing (best is reported) - not for parse")
+    parser.add_argument('--parse-batch', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--database-url', default=os.getenv('BENCH_DATABASE_URL'),
+                        help="throwaway Postgres for the push benchmark")
+    parser.add_argument('--output', type=Path, default=None,
+                        help="results JSON (default: pipeline/data/reports/bench-<time>.json)")
+    args = parser.parse_args()
+
+    started = datetime.now(timezone.utc)
+    packages = {}
+    for name in PACKAGES:
+        try:
+            packages[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            packages[name] = None
+
+    report = {
+        'started_at': started.isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'packages': packages,
+        'seed': args.seed,
+        'results': [],
+    }
+
+    print(f"{'scale':>8} {'bench':10} fmt {'seconds':>10}")
+    with tempfile.TemporaryDirectory(prefix='premier-bench-') as tmp:
+        for scale in args.scales:
+            report['results'].extend(run_scale(scale, args, Path(tmp)))
+
+    output = args.output or PIPELINE_DIR / 'data' / 'reports' / f"bench-{started.strftime('%Y%m%dT%H%M%SZ')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,539 @@
+"""
+Synthetic Season Generator
+Deterministic, realistic-looking FotMob + Understat data for any number of
+leagues x seasons, so the benchmarks can measure scaling without hitting the
+live sites
+
+Per league-season: 20 teams with 28-man squads (some churn and transfers
+between seasons), a double round robin (380 matches), 16 appearances per
+team per match. It produces:
+- matchDetails payloads shaped like FotMob's (playerStats in Format A or
+  Format B, plus the matchFacts/lineup/shotmap/stats/h2h bulk around it)
+- the Understat tables the pipeline writes (players / offensive / passing),
+  built from the same appearances, with Understat's name spellings
+
+Understat names differ from the FotMob ones the way the real sites do:
+stripped accents, nicknames, dropped or added middle names, hyphens, and a
+few that don't resemble each other at all (what MANUAL_MAPPINGS is for).
+Some team names differ too ("Utd" / "United").
+
+Usage (also importable - see bench_suite.py):
+    python pipeline/benchmarks/synthetic.py --leagues 1 --seasons 1 --out /tmp/synthetic
+"""
+import argparse
+import json
+import random
+import unicodedata
+from pathlib import Path
+
+import pandas as pd
+
+
+FIRST_NAMES = [
+    'James', 'Matthew', 'Daniel', 'Edward', 'Alexander', 'Joshua', 'Thomas', 'Benjamin', 'Nicholas',
+    'Samuel', 'William', 'Michael', 'Oliver', 'Harry', 'Jack', 'Lewis', 'Ryan', 'Callum', 'Declan',
+    'Bukayo', 'Kai', 'Reece', 'Marcus', 'Jarrod', 'Conor', 'Ezri', 'Tyrick', 'Morgan', 'Cole',
+    'José', 'João', 'André', 'Rúben', 'Bruno', 'Gonçalo', 'Vitória', 'Diogo', 'Nélson', 'Pedro',
+    'Martín', 'Julián', 'Alexis', 'Enzo', 'Emiliano', 'Nicolás', 'Ángel', 'Sergio', 'Iñaki', 'Álvaro',
+    'Jérémy', 'Théo', 'Benoît', 'Aurélien', 'Ibrahima', 'Moussa', 'Amadou', 'Sékou', 'Yves', 'Rayan',
+    'Łukasz', 'Jakub', 'Tomáš', 'Matěj', 'Dominik', 'Luka', 'Mateo', 'Joško', 'Dejan', 'Nikola',
+    'Søren', 'Martin', 'Kristoffer', 'Jørgen', 'Emil', 'Viktor', 'Erling', 'Ødin', 'Jonas', 'Mikkel',
+    'Hakan', 'Çağlar', 'Ferdi', 'Kenan', 'Mohammed', 'Youssef', 'Achraf', 'Hamza', 'Idrissa', 'Cheikh',
+    'Hwang', 'Son', 'Takehiro', 'Kaoru', 'Wataru', 'Destiny', 'Chimuanya', 'Victor', 'Florentino', 'Lesley',
+]
+
+SURNAMES = [
+    'Smith', 'Jones', 'Taylor', 'Brown', 'Williams', 'Wilson', 'Johnson', 'Davies', 'Robinson', 'Wright',
+    'Walker', 'Hughes', 'Edwards', 'Green', 'Hall', 'Wood', 'Harris', 'Clarke', 'Jackson', 'Turner',
+    'Rice', 'Saka', 'Havertz', 'James', 'Rashford', 'Bowen', 'Gallagher', 'Konsa', 'Mings', 'Palmer',
+    'Fernandes', 'Gonçalves', 'Guimarães', 'Patrício', 'Sá', 'Semedo', 'Conceição', 'Gomes', 'Araújo',
+    'Martínez', 'González', 'Fernández', 'Álvarez', 'Sánchez', 'Muñoz', 'Jiménez', 'Núñez', 'Pérez',
+    'Mbappé', 'Koundé', 'Tchouaméni', 'Camavinga', 'Saliba', 'Guéhi', 'Lacazette', 'Kanté', 'Diaby',
+    'Lewandowski', 'Szczęsny', 'Bednarek', 'Souček', 'Coufal', 'Modrić', 'Kovačić', 'Gvardiol', 'Šeško',
+    'Ødegaard', 'Højbjerg', 'Eriksen', 'Nørgaard', 'Sørloth', 'Lindelöf', 'Isak', 'Kulusevski', 'Haaland',
+    'Çalhanoğlu', 'Yıldız', 'Kökçü', 'Akgün', 'Hakimi', 'Ziyech', 'Amrabat', 'En-Nesyri', 'Gueye', 'Diouf',
+    'Mitoma', 'Tomiyasu', 'Endō', 'Kamada', 'Udogie', 'Ugochukwu', 'Iwobi', 'Chukwueze', 'Onana', 'Mbeumo',
+    'Van Dijk', 'De Bruyne', 'Van de Ven', 'De Ligt', 'Van Hecke', 'Dos Santos', 'Da Silva', 'Di María',
+    'Smith Rowe', 'Alexander-Arnold', 'Ward-Prowse', 'Calvert-Lewin', 'Aït-Nouri', 'Hudson-Odoi',
+]
+
+MONONYMS = ['Alisson', 'Ederson', 'Casemiro', 'Fabinho', 'Savinho', 'Richarlison', 'Rodri', 'Toti',
+            'Pedro', 'Joelinton', 'Murillo', 'Estêvão', 'Gabriel', 'Danilo', 'Neto', 'Andrey']
+
+NICKNAMES = {
+    'Matthew': 'Matty', 'Daniel': 'Dan', 'Edward': 'Eddie', 'Alexander': 'Alex', 'Joshua': 'Josh',
+    'Thomas': 'Tom', 'Benjamin': 'Ben', 'Nicholas': 'Nick', 'Samuel': 'Sam', 'William': 'Will',
+    'Michael': 'Mike', 'Jakub': 'Kuba', 'Nikola': 'Niko', 'Mohammed': 'Mo',
+}
+
+CITIES = [
+    'Northbury', 'Ashford', 'Kingsbridge', 'Redhaven', 'Eastmoor', 'Westfield', 'Brookvale', 'Castleton',
+    'Millbrook', 'Stonegate', 'Riverside', 'Oakham', 'Thornbury', 'Highcliffe', 'Lowestoft', 'Marbury',
+    'Fairport', 'Greywater', 'Blackrock', 'Silverton', 'Elmstead', 'Hollowell', 'Ravensworth', 'Wexcombe',
+    'Dunmore', 'Harrowgate', 'Penbury', 'Calder', 'Southwold', 'Whitby', 'Coldwater', 'Amberley',
+]
+# FotMob suffix -> how Understat spells it (None = same)
+TEAM_SUFFIXES = {'United': 'Utd', 'City': None, 'Athletic': None, 'Rovers': None, 'Albion': None,
+                 'Town': None, 'Wanderers': 'Wanderers FC', 'Hotspur': None, 'Forest': None}
+
+POSITIONS = ['D', 'D', 'D S', 'M', 'M', 'D M', 'M S', 'F M S', 'F S', 'F']
+
+TEAMS_PER_LEAGUE = 20
+SQUAD_SIZE = 28
+APPEARANCES = 16  # per team per match
+SQUAD_CHURN = 0.15  # share of a squad replaced between seasons
+
+
+def strip_accents(text):
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c)).replace('ø', 'o')
+
+
+def understat_variant(name, rng):
+    """
+    How Understat might spell a FotMob name
+    """
+    roll = rng.random()
+    parts = name.split()
+    if roll < 0.60:
+        return name
+    if roll < 0.75:
+        return strip_accents(name)
+    if roll < 0.83 and parts[0] in NICKNAMES:
+        return ' '.join([NICKNAMES[parts[0]]] + parts[1:])
+    if roll < 0.90:
+        if len(parts) > 2:
+            return f"{parts[0]} {parts[-1]}"  # middle name dropped
+        if len(parts) == 2:
+            return f"{parts[0]} {rng.choice(FIRST_NAMES)} {parts[1]}"  # middle name added
+        return name
+    if roll < 0.95:
+        if '-' in name:
+            return name.replace('-', ' ')
+        if len(parts) > 2:
+            return f"{parts[0]} {'-'.join(parts[1:])}"
+        return name
+    # nothing alike - only a manual mapping would catch these
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}"
+
+
+def player_name(rng):
+    roll = rng.random()
+    if roll < 0.05:
+        return rng.choice(MONONYMS)
+    if roll < 0.15:
+        return f"{rng.choice(FIRST_NAMES)} {rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}"
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}"
+
+
+def roster(n, seed=0):
+    """
+    n synthetic players: list of dicts with player_id, name (FotMob spelling),
+    understat_name and position - handy for benchmarking name matching alone
+    """
+    rng = random.Random(seed)
+    players = []
+    for i in range(n):
+        name = player_name(rng)
+        players.append({
+            'player_id': 100_000 + i,
+            'name': name,
+            'understat_name': understat_variant(name, rng),
+            'position': rng.choice(POSITIONS),
+        })
+    return players
+
+
+class SyntheticSeasons:
+    """
+    Parameters:
+    -----------
+    leagues : int
+        Independent leagues (own teams, own players)
+    seasons : int
+        Consecutive seasons per league (squads carry over, with churn)
+    seed : int
+        Everything is derived from it - same seed, same bytes
+    teams : int
+        Teams per league
+    """
+    def __init__(self, leagues=1, seasons=1, seed=0, teams=TEAMS_PER_LEAGUE):
+        self.leagues = leagues
+        self.seasons = seasons
+        self.seed = seed
+        self.n_teams = teams
+        self._next_player = 1_000_000
+        self._build()
+
+    # --- rosters ---
+    def _new_player(self, rng, keeper=False):
+        self._next_player += 1
+        name = rng.choice(MONONYMS) if keeper and rng.random() < 0.3 else player_name(rng)
+        return {
+            'player_id': self._next_player,
+            'name': name,
+            'understat_name': understat_variant(name, rng),
+            'position': 'GK' if keeper else rng.choice(POSITIONS),
+            'keeper': keeper,
+        }
+
+    def _build(self):
+        rng = random.Random(self.seed)
+        self.league_seasons = []
+        cities = list(CITIES)
+        for league in range(self.leagues):
+            rng.shuffle(cities)
+            teams = []
+            for t in range(self.n_teams):
+                suffix = rng.choice(list(TEAM_SUFFIXES))
+                city = cities[t % len(cities)] + ('' if t < len(cities) else f" {league + 1}")
+                fotmob = f"{city} {suffix}"
+                alt = TEAM_SUFFIXES[suffix]
+                understat = fotmob if alt is None else f"{city} {alt}"
+                teams.append({'team_id': (league + 1) * 10_000 + t, 'fotmob': fotmob, 'understat': understat})
+
+            squads = [[self._new_player(rng, keeper=(i < 2)) for i in range(SQUAD_SIZE)] for _ in teams]
+            for season in range(self.seasons):
+                if season:
+                    squads = self._churn(squads, rng)
+                self.league_seasons.append({
+                    'league': league,
+                    'season': 2025 - self.seasons + 1 + season,
+                    'teams': teams,
+                    'squads': [list(squad) for squad in squads],
+                    'first_game_id': 4_000_000 + (league * self.seasons + season) * 10_000,
+                })
+
+    def _churn(self, squads, rng):
+        squads = [list(squad) for squad in squads]
+        leaving = []
+        for squad in squads:
+            for i in range(2, len(squad)):  # keepers stay put
+                if rng.random() < SQUAD_CHURN:
+                    leaving.append(squad[i])
+                    squad[i] = None
+        rng.shuffle(leaving)
+        for squad in squads:
+            for i, player in enumerate(squad):
+                if player is None:
+                    # half the slots go to players moving within the league
+                    squad[i] = leaving.pop() if leaving and rng.random() < 0.5 else self._new_player(rng)
+        return squads
+
+    # --- schedule ---
+    def fixtures(self, ls):
+        """
+        Double round robin: [(game_id, home index, away index)]
+        """
+        n = self.n_teams
+        order = list(range(n))
+        rounds = []
+        for _ in range(n - 1):
+            rounds.append([(order[i], order[n - 1 - i]) for i in range(n // 2)])
+            order = [order[0]] + [order[-1]] + order[1:-1]
+        pairs = [p for r in rounds for p in r] + [(a, h) for r in rounds for h, a in r]
+        return [(ls['first_game_id'] + i, home, away) for i, (home, away) in enumerate(pairs)]
+
+    def __len__(self):
+        return len(self.league_seasons) * self.n_teams * (self.n_teams - 1)
+
+    def _appearances(self, ls, game_id, team):
+        """
+        [(player, minutes, rating)] for one team in one match - deterministic per game_id
+        """
+        rng = random.Random(self.seed * 1_000_003 + game_id * 31 + team)
+        squad = ls['squads'][team]
+        keeper = squad[0] if rng.random() < 0.9 else squad[1]
+        outfield = rng.sample(squad[2:], APPEARANCES - 1)
+        apps = [(keeper, 90, round(rng.uniform(5.8, 8.5), 1))]
+        for i, player in enumerate(outfield):
+            if i < 10:
+                minutes = rng.choice([90, 90, 90, 88, 75, 67, 60])
+            else:
+                minutes = rng.choice([30, 23, 15, 8, 4, 1])
+            # short cameos often get no rating
+            rating = round(rng.uniform(5.5, 9.2), 1) if minutes >= 10 else None
+            apps.append((player, minutes, rating))
+        return apps
+
+    # --- FotMob payloads ---
+    def _player_stats(self, player, minutes, rating, rng):
+        def stat(value, kind='integer', total=None):
+            s = {'value': value, 'type': kind}
+            if total is not None:
+                s['total'] = total
+            return s
+
+        def section(title, key, stats):
+            return {'title': title, 'key': key,
+                    'stats': {name: {'key': name.lower().replace(' ', '_'), 'stat': s} for name, s in stats.items()}}
+
+        top = {'FotMob rating': stat(rating or 0, 'double'), 'Minutes played': stat(minutes)}
+        passes = rng.randint(5, 70)
+        if player['keeper']:
+            conceded = rng.choice([0, 0, 1, 1, 1, 2, 2, 3, 4])
+            xgot = round(rng.uniform(0.2, 3.0), 2)
+            top.update({
+                'Saves': stat(rng.randint(0, 7)),
+                'Goals conceded': stat(conceded),
+                'Expected goals on target (xGOT)': stat(xgot, 'double'),
+                'Goals prevented': stat(round(xgot - conceded, 2), 'double'),
+                'Accurate passes': stat(passes, 'fractionWithPercentage', passes + rng.randint(0, 12)),
+                'Accurate long balls': stat(rng.randint(0, 12), 'fractionWithPercentage', 14),
+            })
+            sections = [
+                section('Top stats', 'top_stats', top),
+                section('Goalkeeping', 'goalkeeping', {
+                    'Punches': stat(rng.randint(0, 2)), 'Throws': stat(rng.randint(0, 8)),
+                    'High claims': stat(rng.randint(0, 3)), 'Sweeper actions': stat(rng.randint(0, 3)),
+                    'Recoveries': stat(rng.randint(0, 9)), 'Diving save': stat(rng.randint(0, 3)),
+                }),
+                section('Attack', 'attack', {'Touches': stat(rng.randint(20, 55))}),
+            ]
+        else:
+            xg = round(rng.uniform(0, 0.9), 2)
+            top.update({
+                'Goals': stat(rng.choice([0] * 9 + [1])), 'Assists': stat(rng.choice([0] * 12 + [1])),
+                'Total shots': stat(rng.randint(0, 5)),
+                'Accurate passes': stat(passes, 'fractionWithPercentage', passes + rng.randint(0, 15)),
+                'Chances created': stat(rng.randint(0, 3)),
+                'Expected goals (xG)': stat(xg, 'double'),
+                'Expected assists (xA)': stat(round(rng.uniform(0, 0.5), 2), 'double'),
+            })
+            sections = [
+                section('Top stats', 'top_stats', top),
+                section('Attack', 'attack', {
+                    'Touches': stat(rng.randint(10, 110)), 'Touches in opposition box': stat(rng.randint(0, 9)),
+                    'Successful dribbles': stat(rng.randint(0, 4), 'fractionWithPercentage', 5),
+                    'Passes into final third': stat(rng.randint(0, 12)),
+                    'Accurate crosses': stat(rng.randint(0, 3), 'fractionWithPercentage', 6),
+                    'Dispossessed': stat(rng.randint(0, 3)),
+                }),
+                section('Defense', 'defense', {
+                    'Tackles': stat(rng.randint(0, 5)), 'Blocks': stat(rng.randint(0, 2)),
+                    'Clearances': stat(rng.randint(0, 8)), 'Headed clearance': stat(rng.randint(0, 4)),
+                    'Interceptions': stat(rng.randint(0, 4)), 'Recoveries': stat(rng.randint(0, 10)),
+                    'Dribbled past': stat(rng.randint(0, 3)),
+                }),
+                section('Duels', 'duels', {
+                    'Duels won': stat(rng.randint(0, 10)), 'Duels lost': stat(rng.randint(0, 8)),
+                    'Ground duels won': stat(rng.randint(0, 6), 'fractionWithPercentage', 9),
+                    'Aerial duels won': stat(rng.randint(0, 5), 'fractionWithPercentage', 7),
+                    'Was fouled': stat(rng.randint(0, 3)), 'Fouls committed': stat(rng.randint(0, 3)),
+                }),
+            ]
+        return sections
+
+    def payload(self, ls, game_id, home, away, fmt='A'):
+        """
+        One matchDetails payload (a dict) with playerStats in Format 'A' (keyed
+        by player id) or 'B' (keyed by team id, lists of players)
+        """
+        rng = random.Random(self.seed * 7_919 + game_id)
+        teams = ls['teams']
+        sides = []
+        for side in (home, away):
+            apps = self._appearances(ls, game_id, side)
+            players = []
+            for player, minutes, rating in apps:
+                players.append({
+                    'name': player['name'],
+                    'id': player['player_id'],
+                    'optaId': f"p{player['player_id']}",
+                    'teamId': teams[side]['team_id'],
+                    'teamName': teams[side]['fotmob'],
+                    'isGoalkeeper': player['keeper'],
+                    'shirtNumber': player['player_id'] % 99 + 1,
+                    'isPotm': False,
+                    'stats': self._player_stats(player, minutes, rating, rng),
+                    'shotmap': [],
+                    'funFacts': [],
+                })
+            sides.append(players)
+
+        if fmt == 'A':
+            player_stats = {str(p['id']): p for players in sides for p in players}
+        else:
+            player_stats = {str(teams[side]['team_id']): players for side, players in zip((home, away), sides)}
+
+        score = self.score(game_id)
+        team_header = [{'name': teams[s]['fotmob'], 'id': teams[s]['team_id'], 'score': score[i],
+                        'imageUrl': f"https://images.fotmob.com/image_resources/logo/teamlogo/{teams[s]['team_id']}.png"}
+                       for i, s in enumerate((home, away))]
+        events = [{'time': rng.randint(1, 95), 'type': rng.choice(['Goal', 'Card', 'Substitution', 'AddedTime']),
+                   'player': {'id': rng.choice(sides[i % 2])['id'], 'name': rng.choice(sides[i % 2])['name']},
+                   'isHome': i % 2 == 0, 'eventId': game_id * 100 + i,
+                   'nameStr': rng.choice(sides[i % 2])['name'], 'overloadTime': None}
+                  for i in range(rng.randint(25, 45))]
+        shots = [{'id': game_id * 1000 + i, 'eventType': rng.choice(['Miss', 'AttemptSaved', 'Goal']),
+                  'teamId': team_header[i % 2]['id'], 'playerId': rng.choice(sides[i % 2])['id'],
+                  'x': round(rng.uniform(70, 105), 2), 'y': round(rng.uniform(10, 58), 2),
+                  'min': rng.randint(1, 95), 'expectedGoals': round(rng.uniform(0.01, 0.8), 4),
+                  'shotType': rng.choice(['RightFoot', 'LeftFoot', 'Header']),
+                  'situation': rng.choice(['RegularPlay', 'FromCorner', 'SetPiece', 'FastBreak'])}
+                 for i in range(rng.randint(15, 35))]
+        lineup = [{'id': team_header[i]['id'], 'name': team_header[i]['name'], 'formation': '4-3-3',
+                   'starters': [{'id': p['id'], 'name': p['name'], 'shirtNumber': p['shirtNumber'],
+                                 'positionId': rng.randint(1, 115), 'horizontalLayout': {'x': rng.random(), 'y': rng.random()},
+                                 'performance': {'rating': p['stats'][0]['stats']['FotMob rating']['stat']['value']}}
+                                for p in players[:11]],
+                   'subs': [{'id': p['id'], 'name': p['name'], 'shirtNumber': p['shirtNumber']} for p in players[11:]]}
+                  for i, players in enumerate(sides)]
+        stat_groups = [{'title': group, 'key': group.lower(),
+                        'stats': [{'title': f"{group} {k}", 'key': f"{group}_{k}".lower(),
+                                   'stats': [rng.randint(0, 600), rng.randint(0, 600)], 'format': 'integer'}
+                                  for k in range(8)]}
+                       for group in ('Top', 'Shots', 'Expected goals', 'Passes', 'Defence', 'Duels', 'Discipline',
+                                     'Goalkeeping', 'Set pieces', 'Possession', 'Attack', 'Crosses')]
+        table = [{'name': t['fotmob'], 'id': t['team_id'], 'played': 10, 'wins': rng.randint(0, 10),
+                  'draws': rng.randint(0, 5), 'losses': rng.randint(0, 5), 'scoresStr': f"{rng.randint(5, 30)}-{rng.randint(5, 30)}",
+                  'goalConDiff': rng.randint(-15, 15), 'pts': rng.randint(0, 30), 'qualColor': None}
+                 for t in teams]
+
+        return {
+            'general': {'matchId': str(game_id), 'matchRound': str(1 + (game_id % 38)),
+                        'leagueId': 47 + ls['league'], 'leagueName': f"League {ls['league'] + 1}",
+                        'parentLeagueSeason': f"{ls['season']}/{ls['season'] + 1}", 'started': True, 'finished': True,
+                        'homeTeam': team_header[0], 'awayTeam': team_header[1]},
+            'header': {'teams': team_header, 'status': {'finished': True, 'started': True, 'scoreStr': f"{score[0]} - {score[1]}",
+                                                         'reason': {'short': 'FT', 'long': 'Full-Time'}}},
+            'content': {
+                'matchFacts': {'matchId': game_id, 'events': {'events': events},
+                               'infoBox': {'Stadium': {'name': f"{teams[home]['fotmob']} Stadium", 'capacity': rng.randint(15000, 75000)},
+                                           'Referee': {'text': player_name(rng)}, 'Attendance': rng.randint(10000, 75000)},
+                               'insights': [{'text': f"Insight {i} " + 'x' * rng.randint(40, 160), 'priority': i,
+                                             'playerId': rng.choice(sides[i % 2])['id'], 'statValues': [rng.random()] * 4}
+                                            for i in range(12)],
+                               'teamForm': [[{'result': rng.choice('WDL'), 'score': f"{rng.randint(0, 4)}-{rng.randint(0, 4)}",
+                                              'home': team_header[0], 'away': team_header[1],
+                                              'date': {'utcTime': '2025-01-01T15:00:00Z'}} for _ in range(5)]
+                                            for _ in range(2)]},
+                'momentum': {'main': {'data': [{'minute': m, 'value': rng.randint(-100, 100)} for m in range(96)],
+                                      'debugTitle': 'momentum'}},
+                'liveticker': {'langs': 'en', 'teams': [team_header[0]['name'], team_header[1]['name']]},
+                'stats': {'Periods': {'All': {'stats': stat_groups}}},
+                'shotmap': {'shots': shots},
+                'lineup': {'lineupType': 'lineup', 'homeTeam': lineup[0], 'awayTeam': lineup[1]},
+                'playerStats': player_stats,
+                'table': {'tables': [{'table': {'all': table}}]},
+                'h2h': {'summary': [rng.randint(0, 10) for _ in range(3)],
+                        'matches': [{'matchId': game_id - 1000 * (i + 1), 'home': team_header[0], 'away': team_header[1],
+                                     'league': {'name': f"League {ls['league'] + 1}", 'id': 47 + ls['league']},
+                                     'time': {'utcTime': '2024-01-01T15:00:00Z'},
+                                     'status': {'scoreStr': f"{rng.randint(0, 4)} - {rng.randint(0, 4)}"}} for i in range(20)]},
+            },
+        }
+
+    def score(self, game_id):
+        rng = random.Random(self.seed * 13 + game_id)
+        return [rng.choice([0, 0, 1, 1, 1, 2, 2, 3, 4]), rng.choice([0, 0, 1, 1, 1, 2, 2, 3])]
+
+    def league_table(self):
+        """
+        Standings of each league's last season, same columns as LeagueSnapshot.table_rows()
+        """
+        latest = {ls['league']: ls for ls in self.league_seasons}
+        rows = []
+        for ls in latest.values():
+            table = {t: dict(team=team['fotmob'], MP=0, W=0, D=0, L=0, GF=0, GA=0) for t, team in enumerate(ls['teams'])}
+            for game_id, home, away in self.fixtures(ls):
+                goals = self.score(game_id)
+                for side, scored, conceded in ((home, goals[0], goals[1]), (away, goals[1], goals[0])):
+                    row = table[side]
+                    row['MP'] += 1
+                    row['GF'] += scored
+                    row['GA'] += conceded
+                    row['W' if scored > conceded else 'D' if scored == conceded else 'L'] += 1
+            for row in table.values():
+                row['GD'] = row['GF'] - row['GA']
+                row['Pts'] = 3 * row['W'] + row['D']
+            rows.extend(sorted(table.values(), key=lambda r: (-r['Pts'], -r['GD'], -r['GF'])))
+        return pd.DataFrame(rows)
+
+    def matches(self, fmt='A'):
+        """
+        Yields (game_id, payload bytes) for every match, every league-season, in
+        schedule order. fmt is 'A', 'B' or 'mixed' (alternating, like the live feed)
+        """
+        for ls in self.league_seasons:
+            for i, (game_id, home, away) in enumerate(self.fixtures(ls)):
+                shape = fmt if fmt != 'mixed' else 'AB'[i % 2]
+                body = json.dumps(self.payload(ls, game_id, home, away, shape), separators=(',', ':'))
+                yield game_id, body.encode()
+
+    # --- Understat tables ---
+    def understat_season(self):
+        """
+        The season table Understat returns (one row per player and team), built
+        from the same appearances as the payloads
+        """
+        rows = {}
+        for ls in self.league_seasons:
+            for game_id, home, away in self.fixtures(ls):
+                for side in (home, away):
+                    team = ls['teams'][side]['understat']
+                    for player, minutes, _ in self._appearances(ls, game_id, side):
+                        key = (ls['league'], ls['season'], player['player_id'], team)
+                        acc = rows.get(key)
+                        if acc is None:
+                            acc = rows[key] = {'player': player['understat_name'], 'team': team,
+                                               'position': player['position'], 'matches': 0, 'minutes': 0,
+                                               'seed': player['player_id'] * 7 + ls['season']}
+                        acc['matches'] += 1
+                        acc['minutes'] += minutes
+
+        out = []
+        for acc in rows.values():
+            rng = random.Random(acc.pop('seed'))
+            share = acc['minutes'] / 3420
+            shots = int(rng.uniform(0, 80) * share)
+            goals = int(shots * rng.uniform(0, 0.2))
+            xg = round(shots * rng.uniform(0.05, 0.15), 6)
+            penalties = min(goals, rng.choice([0, 0, 0, 1, 2]))
+            assists = int(rng.uniform(0, 10) * share)
+            xa = round(assists * rng.uniform(0.6, 1.4) + rng.uniform(0, 1), 6)
+            out.append(dict(acc, yellow_cards=int(rng.uniform(0, 9) * share), red_cards=rng.choice([0] * 20 + [1]),
+                            goals=goals, shots=shots, xg=xg, np_goals=goals - penalties,
+                            np_xg=round(max(xg - 0.76 * penalties, 0), 6), assists=assists, xa=xa,
+                            key_passes=int(rng.uniform(0, 60) * share), xg_chain=round(rng.uniform(0, 12) * share, 6),
+                            xg_buildup=round(rng.uniform(0, 8) * share, 6)))
+        return pd.DataFrame(out)
+
+    def write_understat(self, raw_dir):
+        """
+        understat_players / _offensive / _passing.csv, same columns as get_understat_metrics()
+        """
+        raw_dir = Path(raw_dir)
+        raw_dir.mkdir(parents=True, exist_ok=True)
+        df = self.understat_season()
+        df[['player', 'team', 'position', 'matches', 'minutes', 'yellow_cards', 'red_cards']] \
+            .to_csv(raw_dir / 'understat_players.csv', index=False)
+        df[['player', 'team', 'position', 'goals', 'shots', 'xg', 'np_goals', 'np_xg', 'assists', 'xa']] \
+            .to_csv(raw_dir / 'understat_offensive.csv', index=False)
+        df[['player', 'team', 'position', 'assists', 'xa', 'key_passes', 'xg_chain', 'xg_buildup']] \
+            .to_csv(raw_dir / 'understat_passing.csv', index=False)
+        return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--leagues', type=int, default=1)
+    parser.add_argument('--seasons', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--format', choices=['A', 'B', 'mixed'], default='mixed', help="playerStats shape")
+    parser.add_argument('--out', type=Path, required=True,
+                        help="writes payloads/<game_id>.json and raw/understat_*.csv here")
+    args = parser.parse_args()
+
+    data = SyntheticSeasons(args.leagues, args.seasons, seed=args.seed)
+    payload_dir = args.out / 'payloads'
+    payload_dir.mkdir(parents=True, exist_ok=True)
+    size = 0
+    for game_id, body in data.matches(args.format):
+        (payload_dir / f"{game_id}.json").write_bytes(body)
+        size += len(body)
+    understat = data.write_understat(args.out / 'raw')
+    print(f"{len(data)} matches ({size / 1e6:.1f} MB) and {len(understat)} Understat rows written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Pipeline Stage Runner
+Runs the pipeline as a small DAG: every stage declares the files it reads and
+writes, a stage depends on whichever stages write its inputs, and independent
+branches run at the same time
+
+A stage is skipped when the content hash of its inputs (plus its params)
+matches the last successful run - its outputs are restored from the stage
+store instead, since push_to_db wipes data/raw and data/formatted after every
+run. Stages without inputs (the scrapers) always run.
+
+State lives in <root>/state.json, stage outputs in <root>/objects/<sha256>.
+"""
+import hashlib
+import json
+import shutil
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import ExitStack
+from pathlib import Path
+
+from io_utils import atomic_path, atomic_write
+
+
+class Stage:
+    """
+    Parameters:
+    -----------
+    name : str
+    func : callable
+        Runs the stage. Returning False marks the run as incomplete (it
+        isn't cached, so the stage runs again next time)
+    inputs, outputs : list of Path
+        Files the stage reads / writes
+    params : dict (optional)
+        Settings that change the outputs - hashed along with the inputs
+    after : list of str (optional)
+        Extra dependencies that don't go through a file
+    """
+    def __init__(self, name, func, inputs=(), outputs=(), params=None, after=()):
+        self.name = name
+        self.func = func
+        self.inputs = [Path(p) for p in inputs]
+        self.outputs = [Path(p) for p in outputs]
+        self.params = params or {}
+        self.after = list(after)
+
+    @property
+    def always(self):
+        # nothing to hash - a scraper, its inputs are the live sites
+        return not self.inputs
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class StageRunner:
+    """
+    Parameters:
+    -----------
+    stages : list of Stage
+    root : Path
+        Where the run state and the stored stage outputs live
+    base_dir : Path
+        Paths are recorded relative to this directory
+    max_workers : int
+        Stages that may run at the same time
+    telemetry : RunTelemetry (optional)
+        Gets a measurement of every stage that runs and each stage's final status
+    profiler : StageProfiler (optional)
+        Wraps every stage that runs (see profiling.py)
+    """
+    def __init__(self, stages, root, base_dir, max_workers=4, telemetry=None, profiler=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.order = [stage.name for stage in stages]
+        self.root = Path(root)
+        self.objects_dir = self.root / 'objects'
+        self.state_path = self.root / 'state.json'
+        self.base_dir = Path(base_dir)
+        self.max_workers = max_workers
+        self.telemetry = telemetry
+        self.profiler = profiler
+        self._lock = threading.Lock()
+
+        self.state = {}
+        if self.state_path.exists():
+            self.state = json.loads(self.state_path.read_text())
+
+        # a stage depends on every stage that writes one of its inputs
+        writers = {}
+        for stage in stages:
+            for path in stage.outputs:
+                writers[path] = stage.name
+        self.deps = {}
+        for stage in stages:
+            deps = {writers[p] for p in stage.inputs if p in writers and writers[p] != stage.name}
+            deps.update(stage.after)
+            unknown = deps - set(self.stages)
+            if unknown:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage(s): {sorted(unknown)}")
+            self.deps[stage.name] = deps
+
+    # --- graph ---
+    def descendants(self, name):
+        found = {name}
+        changed = True
+        while changed:
+            changed = False
+            for stage, deps in self.deps.items():
+                if stage not in found and deps & found:
+                    found.add(stage)
+                    changed = True
+        return found
+
+    def select(self, only=None, start=None):
+        """
+        Stage names to consider: `only` those, everything from `start` on, or all of them
+        """
+        for name in (only or []) + ([start] if start else []):
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage '{name}' (stages: {', '.join(self.order)})")
+        if only:
+            return set(only)
+        if start:
+            return self.descendants(start)
+        return set(self.order)
+
+    # --- hashing / cache ---
+    def _rel(self, path):
+        try:
+            return str(path.relative_to(self.base_dir))
+        except ValueError:
+            return str(path)
+
+    def input_hash(self, stage):
+        h = hashlib.sha256()
+        h.update(json.dumps(stage.params, sort_keys=True, default=str).encode())
+        for path in stage.inputs:
+            h.update(self._rel(path).encode())
+            h.update(file_hash(path).encode() if path.exists() else b'missing')
+        return h.hexdigest()
+
+    def _cached(self, stage):
+        """
+        True if the stage's last successful run had the same input hash and
+        every output can be put back from the stage store
+        """
+        entry = self.state.get(stage.name)
+        if stage.always or entry is None or entry.get('input_hash') != self.input_hash(stage):
+            return False
+        for path in stage.outputs:
+            digest = entry['outputs'].get(self._rel(path))
+            if digest is None:
+                return False
+            if not (path.exists() and file_hash(path) == digest) and not (self.objects_dir / digest).exists():
+                return False
+        return True
+
+    def _restore(self, stage):
+        entry = self.state[stage.name]
+        for path in stage.outputs:
+            digest = entry['outputs'][self._rel(path)]
+            if path.exists() and file_hash(path) == digest:
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(self.objects_dir / digest, path)
+
+    def _record(self, stage, input_hash):
+        outputs = {}
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        for path in stage.outputs:
+            digest = file_hash(path)
+            obj = self.objects_dir / digest
+            if not obj.exists():
+                with atomic_path(obj) as tmp:
+                    shutil.copyfile(path, tmp)
+            outputs[self._rel(path)] = digest
+
+        with self._lock:
+            self.state[stage.name] = {'input_hash': input_hash, 'outputs': outputs, 'finished_at': time.time()}
+            self.root.mkdir(parents=True, exist_ok=True)
+            atomic_write(self.state_path, json.dumps(self.state, indent=1, sort_keys=True).encode())
+
+    def _prune(self):
+        """
+        Drop stored outputs no stage refers to anymore
+        """
+        if not self.objects_dir.exists():
+            return
+        live = {digest for entry in self.state.values() for digest in entry['outputs'].values()}
+        for obj in self.objects_dir.iterdir():
+            if obj.name not in live:
+                obj.unlink(missing_ok=True)
+
+    # --- running ---
+    def plan(self, only=None, start=None, force=False):
+        """
+        What a run would do, without running anything: [(stage, action, reason)]
+
+        A stage downstream of one that will run can only be decided once its
+        inputs are rebuilt, so it's reported as 'run?'.
+        """
+        selected = self.select(only, start)
+        forced = force or bool(only) or bool(start)
+        will_run = set()
+        plan = []
+        for name in self.order:
+            stage = self.stages[name]
+            if name not in selected:
+                plan.append((name, 'skip', 'not selected'))
+            elif forced:
+                will_run.add(name)
+                plan.append((name, 'run', 'forced'))
+            elif stage.always:
+                will_run.add(name)
+                plan.append((name, 'run', 'no inputs to hash (always runs)'))
+            elif self.deps[name] & will_run:
+                will_run.add(name)
+                plan.append((name, 'run?', 'depends on ' + ', '.join(sorted(self.deps[name] & will_run))))
+            elif self._cached(stage):
+                plan.append((name, 'skip', 'inputs unchanged'))
+            else:
+                will_run.add(name)
+                plan.append((name, 'run', 'inputs changed'))
+        return plan
+
+    def run(self, only=None, start=None, force=False):
+        """
+        Run the selected stages, independent ones concurrently
+
+        Returns:
+        --------
+        dict : stage name -> 'ran', 'cached', 'incomplete', 'failed', 'blocked' or 'not selected'
+        """
+        selected = self.select(only, start)
+        forced = force or bool(only) or bool(start)
+        results = {}
+        pending = set(self.order)
+        running = {}
+
+        def execute(stage):
+            input_hash = None if stage.always else self.input_hash(stage)
+            print("\n" + "=" * 80)
+            print(f"STAGE: {stage.name}")
+            print("=" * 80)
+            with ExitStack() as wrappers:
+                if self.telemetry is not None:
+                    wrappers.enter_context(self.telemetry.measure(stage.name, stage.inputs, stage.outputs))
+                if self.profiler is not None:
+                    wrappers.enter_context(self.profiler.profile(stage.name))
+                ok = stage.func()
+            if ok is False or not all(p.exists() for p in stage.outputs):
+                return 'incomplete'
+            if input_hash is not None:
+                self._record(stage, input_hash)
+            return 'ran'
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                # start everything whose dependencies are settled
+                ready = [n for n in self.order if n in pending and self.deps[n] <= set(results)]
+                if not ready and not running:
+                    raise ValueError(f"Dependency cycle between stages: {sorted(pending)}")
+                for name in ready:
+                    pending.discard(name)
+                    stage = self.stages[name]
+                    if name not in selected:
+                        results[name] = 'not selected'
+                    elif any(results[d] in ('failed', 'blocked') for d in self.deps[name]):
+                        results[name] = 'blocked'
+                        print(f"!!!! Skipping stage '{name}': an upstream stage failed")
+                    elif not forced and self._cached(stage):
+                        self._restore(stage)
+                        results[name] = 'cached'
+                        print(f"> Stage '{name}' inputs unchanged since the last run - skipped")
+                    else:
+                        running[pool.submit(execute, stage)] = name
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        results[name] = 'failed'
+                        print(f"!!!! Stage '{name}' failed: {e}")
+
+        self._prune()
+        if self.telemetry is not None:
+            for name in self.order:
+                self.telemetry.record(name, results[name])
+        return {name: results[name] for name in self.order}
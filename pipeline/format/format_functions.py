@@ -2,55 +2,101 @@
 Final Formatting Functions
 Transform raw data into production-ready formatted tables
 """
+import sys
 import pandas as pd
 from pathlib import Path
 
+if __name__ == "__main__":
+    # run as a script - make pipeline/ importable, the way main.py has it
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from format.name_matcher import attach_identities  # noqa: E402
+
 
 RAW_DIR = Path(__file__).resolve().parent.parent / 'data' / 'raw'
 FORMATTED_DIR = Path(__file__).resolve().parent.parent / 'data' / 'formatted'
 FORMATTED_DIR.mkdir(parents=True, exist_ok=True)
 
+# values shared by the format_* functions for one format_all() run
+# (None outside of one, so a standalone call always reads fresh files)
+_run_cache = None
+
+
+def _cached(key, build):
+    """
+    build(), computed once per format_all() run
+    """
+    if _run_cache is None:
+        return build()
+    if key not in _run_cache:
+        _run_cache[key] = build()
+    return _run_cache[key]
+
+
+def load_identities():
+    """
+    Load the player identity table written by name_matcher.match_and_save()
+    Returns None if the file doesn't exist
+    """
+    def read():
+        identities_path = RAW_DIR / 'player_identities.csv'
+        
+        if not identities_path.exists():
+            return None
+        
+        return pd.read_csv(identities_path)
+    
+    return _cached('identities', read)
+
 
 def get_matched_names_map():
     """
-    Load the name mappings from the matched defense file
+    Load the name mappings from the player identity table
     Returns dict: {understat_name: fotmob_name}
     Returns empty dict if file doesn't exist
     """
-    matched_defense_path = RAW_DIR / 'fotmob_defense_season_matched.csv'
-    
-    if not matched_defense_path.exists():
-        print("  WARNING: No matched defense file found. Using empty name mappings.")
-        return {}
+    def build():
+        identities = load_identities()
+        
+        if identities is None:
+            print("  WARNING: No player identities file found. Using empty name mappings.")
+            return {}
+        
+        # Create mapping: understat_name -> fotmob_name (for matched players)
+        matched = identities[identities['matched_name'].notna() & (identities['match_method'] != 'unmatched')]
+        return dict(zip(matched['matched_name'], matched['name']))
     
-    matched_defense = pd.read_csv(matched_defense_path)
+    return _cached('names_map', build)
+
+
+def load_matched_fotmob(filename):
+    """
+    Load a raw FotMob season table joined with the player identity table
+    Returns None if either file doesn't exist
+    """
+    fotmob_path = RAW_DIR / filename
+    identities = load_identities()
     
-    # Create mapping: understat_name -> fotmob_name (for matched players)
-    mappings = {}
-    for _, row in matched_defense.iterrows():
-        if pd.notna(row['matched_name']) and row['match_method'] != 'unmatched':
-            mappings[row['matched_name']] = row['name']
+    if not fotmob_path.exists() or identities is None:
+        return None
     
-    return mappings
+    return attach_identities(pd.read_csv(fotmob_path), identities)
 
 
-def split_name(full_name):
+def split_names(full_names):
     """
-    Split a name into first and last name
+    Split a column of names into first and last names
     Handles multi-part names by taking last word as last name
-    """
-    if pd.isna(full_name) or not full_name:
-        return '', ''
-    
-    parts = full_name.strip().split()
+    Single-word names get an empty last name; missing/blank names get '' for both
     
-    if len(parts) == 1:
-        return parts[0], ''
-    elif len(parts) == 2:
-        return parts[0], parts[1]
-    else:
-        # First name is first part, last name is last part
-        return parts[0], parts[-1]
+    Returns:
+    --------
+    (first_names, last_names) : tuple of pd.Series
+    """
+    parts = full_names.fillna('').astype(str).str.split()
+    first_names = parts.str[0].fillna('')
+    last_names = parts.str[-1].where(parts.str.len() > 1, '').fillna('')
+    return first_names, last_names
 
 
 def format_players():
@@ -94,8 +140,7 @@ def format_players():
         print(f"Using all {len(matched_players)} Understat players")
     
     # Split name into first and last
-    matched_players['first_name'] = matched_players['fotmob_name'].apply(lambda x: split_name(x)[0])
-    matched_players['last_name'] = matched_players['fotmob_name'].apply(lambda x: split_name(x)[1])
+    matched_players['first_name'], matched_players['last_name'] = split_names(matched_players['fotmob_name'])
     
     # Split position into list
     matched_players['positions'] = matched_players['position'].apply(
@@ -133,15 +178,13 @@ def format_defensive():
     print("FORMAT_DEFENSIVE()")
     print("="*60)
     
-    matched_defense_path = RAW_DIR / 'fotmob_defense_season_matched.csv'
+    # Load defensive data, joined with the matched identities
+    defense_df = load_matched_fotmob('fotmob_defense_season_final.csv')
     
-    if not matched_defense_path.exists():
+    if defense_df is None:
         print("  WARNING: No FotMob defense data available. Skipping defensive formatting.")
         return None
     
-    # Load matched defensive data
-    defense_df = pd.read_csv(matched_defense_path)
-    
     # Filter to only matched players
     matched_defense = defense_df[defense_df['match_method'] != 'unmatched'].copy()
     
@@ -241,15 +284,13 @@ def format_keepers():
     print("FORMAT_KEEPERS()")
     print("="*60)
     
-    matched_keepers_path = RAW_DIR / 'fotmob_keepers_season_matched.csv'
+    # Load keepers data, joined with the matched identities
+    keepers_df = load_matched_fotmob('fotmob_keepers_season.csv')
     
-    if not matched_keepers_path.exists():
+    if keepers_df is None:
         print("  WARNING: No FotMob keeper data available. Skipping keeper formatting.")
         return None
     
-    # Load matched keepers data
-    keepers_df = pd.read_csv(matched_keepers_path)
-    
     # Filter to only matched players
     matched_keepers = keepers_df[keepers_df['match_method'] != 'unmatched'].copy()
     
@@ -276,15 +317,22 @@ def format_keepers():
 def format_all():
     """
     Run all formatting functions and create all output files
+    The identity table and name mappings are loaded once and shared between them
     """
+    global _run_cache
+    
     print("\n" + "="*80)
     print("FORMATTING ALL DATA FOR PRODUCTION")
     print("="*80 + "\n")
     
-    format_players()
-    format_defensive()
-    format_offensive()
-    format_keepers()
+    _run_cache = {}
+    try:
+        format_players()
+        format_defensive()
+        format_offensive()
+        format_keepers()
+    finally:
+        _run_cache = None
     
     print("\n" + "="*80)
     print("FORMATTING COMPLETE!")
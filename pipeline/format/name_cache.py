@@ -0,0 +1,167 @@
+"""
+Name Resolution Cache
+On-disk store of resolved FotMob -> Understat names, keyed by FotMob player_id
+
+Most of a season's players were already matched the week before, so only
+new or changed players need the matcher again (which entries are still good
+is decided by name_matcher.cached_match_names()). Lives under data/cache, so
+push_to_db's cleanup (which wipes name_mappings.csv with the rest of
+data/raw) doesn't touch it. A different threshold drops the whole cache.
+
+The manual mappings are versioned by a hash of their contents; the cache
+records which version it last saw and lists what changed between versions.
+
+Rows are kept column-wise (one list per column, one entry per distinct
+(player, name, team)), which loads and saves a lot faster than an object per
+player. The Understat names of the last run are kept with their normalized
+keys, so the next run only normalizes the names that are new.
+
+Layout:
+    <path>   {"threshold": 85, "manual_version": "<sha>", "manual_mappings": {...},
+              "understat_keys": {"<understat name>": "<normalized>", ...},
+              "rows": {"player": [...], "name": [...], "team": [...], "matched_name": [...],
+                       "match_score": [...], "match_method": [...], "understat": [...]}}
+    (understat: the version of the Understat candidates the player was matched against)
+"""
+import hashlib
+import json
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # optional - the stdlib json module does the same job, slower
+    orjson = None
+
+from io_utils import atomic_write
+
+
+def manual_version(manual_mappings):
+    """
+    Short content hash of the manual mappings (order doesn't matter)
+    """
+    body = json.dumps(sorted((manual_mappings or {}).items()), ensure_ascii=False)
+    return hashlib.sha256(body.encode()).hexdigest()[:12]
+
+
+def player_key(value):
+    """
+    Cache key for a FotMob player_id (CSVs hand it back as int or float
+    depending on NaNs in the column)
+    """
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def candidates_version(names):
+    """
+    Short content hash of a set of Understat names (order doesn't matter)
+    """
+    return hashlib.sha256('\n'.join(sorted(names)).encode()).hexdigest()[:12]
+
+
+# stored per (player, name, team)
+CACHE_COLUMNS = ['player', 'name', 'team', 'matched_name', 'match_score', 'match_method', 'understat']
+
+
+def _text(value):
+    # NaN doesn't survive a JSON round trip as anything comparable
+    return value if isinstance(value, str) else None
+
+
+class NameCache:
+    def __init__(self, path, threshold, manual_mappings=None, refresh=False):
+        self.path = Path(path)
+        self.threshold = threshold
+        self.manual_mappings = dict(manual_mappings or {})
+        self.manual_version = manual_version(self.manual_mappings)
+        self.columns = {column: [] for column in CACHE_COLUMNS}
+        self.understat_keys = None  # Understat name -> normalized key, as of the last run
+        self.manual_changes = []  # FotMob names whose manual mapping changed since the last run
+        self._dirty = False
+
+        if self.path.exists():
+            try:
+                body = self.path.read_bytes()
+                stored = orjson.loads(body) if orjson is not None else json.loads(body)
+            except (OSError, ValueError):
+                stored = None
+                print(f"  WARNING: unreadable name cache at {self.path}, starting over")
+            if refresh:
+                self._dirty = True  # every player gets re-matched and stored again
+            elif stored is not None and 'rows' not in stored:
+                print(f"  Name cache at {self.path} has an old layout, starting over")
+            elif stored is not None and stored.get('threshold') == threshold:
+                self.columns = {column: stored['rows'][column] for column in CACHE_COLUMNS}
+                self.understat_keys = stored.get('understat_keys')
+            elif stored is not None:
+                print(f"  Name cache was built with threshold {stored.get('threshold')}, starting over")
+            if stored is not None and stored.get('manual_version') != self.manual_version:
+                old = stored.get('manual_mappings', {})
+                self.manual_changes = sorted(name for name in set(old) | set(self.manual_mappings)
+                                             if old.get(name) != self.manual_mappings.get(name))
+                self._dirty = True
+
+    def __len__(self):
+        return len(set(self.columns['player']))
+
+    def rows(self):
+        """
+        Stored rows as tuples in CACHE_COLUMNS order
+        """
+        return zip(*(self.columns[column] for column in CACHE_COLUMNS))
+
+    def update(self, rows):
+        """
+        Replace what's stored for the players in `rows`
+
+        Parameters:
+        -----------
+        rows : list of tuple
+            In CACHE_COLUMNS order - player as player_key(), understat the
+            version of the Understat candidates the player was matched against
+        """
+        if not rows:
+            return
+        players = {row[0] for row in rows}
+        kept = [row for row in self.rows() if row[0] not in players]
+        new, seen = [], set()
+        for player, name, team, matched_name, score, method, version in rows:
+            name, team = _text(name), _text(team)
+            if (player, name, team) not in seen:
+                seen.add((player, name, team))
+                new.append((player, name, team, _text(matched_name),
+                            score.item() if hasattr(score, 'item') else score, method, version))
+        self.columns = {column: list(values) for column, values in zip(CACHE_COLUMNS, zip(*(kept + new)))}
+        self._dirty = True
+
+    def seen(self, understat_keys):
+        """
+        Remember the Understat names (and their normalized keys) this run matched against
+        """
+        if understat_keys != self.understat_keys:
+            self.understat_keys = dict(understat_keys)
+            self._dirty = True
+
+    def save(self):
+        """
+        Persist the cache (no-op if nothing changed)
+        """
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        body = {
+            'threshold': self.threshold,
+            'manual_version': self.manual_version,
+            'manual_mappings': self.manual_mappings,
+            'rows': self.columns,
+            'understat_keys': self.understat_keys,
+        }
+        if orjson is not None:
+            data = orjson.dumps(body, option=orjson.OPT_SORT_KEYS)
+        else:
+            data = json.dumps(body, ensure_ascii=False, sort_keys=True).encode()
+        atomic_write(self.path, data)
+        self._dirty = False
@@ -2,65 +2,308 @@
 Name Matcher Module
 Fuzzy matches player names between Understat and FotMob datasets
 """
+import sys
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
 from rapidfuzz import fuzz, process
 from pathlib import Path
 
+if __name__ == "__main__":
+    # run as a script - make pipeline/ importable, the way main.py has it
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from format.name_cache import NameCache, candidates_version, player_key  # noqa: E402
+from format.ngram_index import NgramIndex  # noqa: E402
+
+
+# cap on the score matrix held at once (unmatched names x Understat names, float64)
+SCORE_MATRIX_BYTES = 64 * 1024 * 1024
+# from this many candidates on, fuzzy matching only scores the top candidates
+# from a trigram index (see ngram_index.py) instead of every one of them
+NGRAM_MIN_CHOICES = 5000
+# ...and this many names to match - building the index costs about as much as
+# brute-forcing a few hundred of them
+NGRAM_MIN_QUERIES = 500
+# a cached run where more than this share of the players is stale matches all of them in
+# one pass (stitching the few cached rows back in costs about what it saves by then)
+CACHE_MAX_STALE_SHARE = 0.5
+
+# columns of the player identity table: what a FotMob player is keyed by, and what they resolved to
+IDENTITY_KEYS = ['player_id', 'name', 'team']
+MATCH_COLUMNS = ['matched_name', 'match_score', 'match_method']
+
+# letters NFKD doesn't decompose, and the combining marks it leaves behind
+# (accents etc.) - everything normalize_name() needs to get names down to ASCII
+_FOLD_LETTERS = {
+    'ø': 'o', 'ł': 'l', 'đ': 'd', 'ð': 'd', 'ħ': 'h', 'ı': 'i', 'ŧ': 't',
+    'ß': 'ss', 'æ': 'ae', 'œ': 'oe', 'þ': 'th',
+    '\u2018': "'", '\u2019': "'", '\u2010': '-', '\u2011': '-',
+}
+_COMBINING_BLOCKS = [(0x0300, 0x0370), (0x1AB0, 0x1B00), (0x1DC0, 0x1E00), (0x20D0, 0x2100), (0xFE20, 0xFE30)]
+_FOLD_TABLE = str.maketrans({
+    **{code: None for start, end in _COMBINING_BLOCKS for code in range(start, end)
+       if unicodedata.combining(chr(code))},
+    **_FOLD_LETTERS,
+})
+
+# Canonical team name -> other spellings used by FotMob / Understat
+# (names that only differ by "FC"/"AFC", "&"/"and" or "Utd"/"United" don't need an entry)
+TEAM_ALIASES = {
+    'Manchester United': ['Man Utd', 'Man United'],
+    'Manchester City': ['Man City'],
+    'Tottenham Hotspur': ['Tottenham', 'Spurs'],
+    'Newcastle United': ['Newcastle'],
+    'West Ham United': ['West Ham'],
+    'Wolverhampton Wanderers': ['Wolves', 'Wolverhampton'],
+    'Brighton & Hove Albion': ['Brighton'],
+    'Nottingham Forest': ["Nott'm Forest", 'Nottm Forest'],
+    'Bournemouth': [],
+    'Leeds United': ['Leeds'],
+    'Leicester City': ['Leicester'],
+    'Sheffield United': ['Sheff Utd'],
+    'Sheffield Wednesday': ['Sheff Wed'],
+    'West Bromwich Albion': ['West Brom'],
+    'Luton Town': ['Luton'],
+    'Ipswich Town': ['Ipswich'],
+    'Norwich City': ['Norwich'],
+    'Cardiff City': ['Cardiff'],
+    'Huddersfield Town': ['Huddersfield'],
+    'Queens Park Rangers': ['QPR'],
+}
+
 
 def normalize_name(name):
     """
-    Normalize a name for better fuzzy matching:
+    Normalize a name for matching (the key the exact, fuzzy and manual steps compare):
     - Convert to lowercase
-    - Remove extra whitespace
-    - Handle common accents/special characters
+    - Fold accents to ASCII - NFKD decomposition with the combining marks
+      dropped, plus the letters that don't decompose (ø, ł, ß, æ, ...)
+    - Collapse whitespace
     """
-    if pd.isna(name):
-        return ""
-    
-    name = str(name).strip().lower()
-    
-    # Common replacements for better matching
-    replacements = {
-        'ø': 'o',
-        'ö': 'o',
-        'ü': 'u',
-        'ä': 'a',
-        'é': 'e',
-        'è': 'e',
-        'ê': 'e',
-        'á': 'a',
-        'à': 'a',
-        'â': 'a',
-        'í': 'i',
-        'ì': 'i',
-        'ó': 'o',
-        'ò': 'o',
-        'ú': 'u',
-        'ù': 'u',
-        'ñ': 'n',
-        'ç': 'c',
-    }
+    if not isinstance(name, str):
+        if pd.isna(name):
+            return ""
+        name = str(name)
+    
+    name = name.lower()
     
-    for old, new in replacements.items():
-        name = name.replace(old, new)
+    # plain ASCII names (most of them) have nothing to fold
+    if not name.isascii():
+        name = unicodedata.normalize('NFKD', name).translate(_FOLD_TABLE)
     
-    return name
+    return ' '.join(name.split())
+
+
+def normalize_names(names):
+    """
+    normalize_name() over a whole column at once - every distinct name is
+    normalized once and the keys are broadcast back
+    
+    Returns:
+    --------
+    pd.Series of keys, same index as `names` (if it's a Series)
+    """
+    names = pd.Series(names, dtype=object) if not isinstance(names, pd.Series) else names
+    codes, uniques = pd.factorize(names)
+    # missing names get code -1, i.e. the trailing ""
+    keys = np.array([normalize_name(name) for name in uniques.tolist()] + [""], dtype=object)
+    return pd.Series(keys[codes], index=names.index)
+
+
+def manual_index(manual_mappings):
+    """
+    Manual mappings keyed by normalize_name(fotmob_name), so an entry also
+    covers the accent/case variants of its name (the first entry wins a tie)
+    """
+    index = {}
+    for fotmob_name, understat_name in (manual_mappings or {}).items():
+        index.setdefault(normalize_name(fotmob_name), understat_name)
+    return index
+
+
+def team_key(team):
+    """
+    Spelling-insensitive key for a team name: normalized, "&" -> "and",
+    "Utd" -> "United", "FC"/"AFC" dropped
+    """
+    words = normalize_name(team).replace('&', ' and ').replace('.', '').split()
+    words = ['united' if w == 'utd' else w for w in words if w not in ('fc', 'afc')]
+    return ' '.join(words)
+
+
+_TEAM_LOOKUP = {team_key(alias): canonical
+                for canonical, aliases in TEAM_ALIASES.items()
+                for alias in [canonical] + aliases}
+
+
+@lru_cache(maxsize=None)
+def canonical_team(team):
+    """
+    The canonical name for a FotMob or Understat team spelling ('' if missing).
+    Teams not in TEAM_ALIASES are their own canonical name (by team_key).
+    """
+    if not isinstance(team, str):
+        return ''
+    key = team_key(team)
+    return _TEAM_LOOKUP.get(key, key)
+
+
+def understat_blocks(understat_df):
+    """
+    Understat players per canonical team - a player listed under several
+    teams ("Team A,Team B") is in each block. Empty without a 'team' column.
+    """
+    blocks = {}
+    if 'team' not in understat_df.columns:
+        return blocks
+    canonical = {}  # a league has a few dozen team strings - split and canonicalize each once
+    for player, teams in zip(understat_df['player'].tolist(), understat_df['team'].tolist()):
+        if not isinstance(teams, str):
+            continue
+        if teams not in canonical:
+            canonical[teams] = [canonical_team(team) for team in teams.split(',')]
+        for team in canonical[teams]:
+            blocks.setdefault(team, {})[player] = None
+    return {team: list(names) for team, names in blocks.items() if team}
+
+
+def build_name_index(names, keys=None):
+    """
+    Hash index over the Understat names for the exact-match step
+
+    Parameters:
+    -----------
+    keys : list (optional)
+        normalize_name() of every name, if already computed
+
+    Returns:
+    --------
+    (by_lower, by_normalized) : dicts of key -> first name in `names` with that key
+        by_lower is keyed by name.lower(), by_normalized by normalize_name(name)
+    """
+    if keys is None:
+        keys = normalize_names(names).tolist()
+    by_lower = {}
+    by_normalized = {}
+    for name, key in zip(names, keys):
+        by_lower.setdefault(name.lower(), name)
+        by_normalized.setdefault(key, name)
+    return by_lower, by_normalized
+
+
+class UnderstatCandidates:
+    """
+    The Understat side of the matcher - names, normalized keys, exact-match
+    indexes and team blocks - prepared once so several fuzzy_match_names()
+    calls in a run (or a cached run's handful of stale players) don't redo it
+    
+    Parameters:
+    -----------
+    understat_df : pd.DataFrame
+        Same as fuzzy_match_names()
+    known_keys : dict (optional)
+        normalize_name() of names seen before (the NameCache keeps last run's) -
+        only the names missing from it get normalized
+    """
+    def __init__(self, understat_df, known_keys=None):
+        # Without Understat teams everything is one block
+        self.blocked = 'team' in understat_df.columns
+        self.names = understat_df['player'].unique().tolist()
+        known_keys = known_keys or {}
+        missing = [name for name in self.names if name not in known_keys]
+        self.key = {name: known_keys[name] for name in self.names if name in known_keys}
+        if missing:
+            self.key.update(zip(missing, normalize_names(missing).tolist()))
+        self.keys = [self.key[name] for name in self.names]
+        self.by_lower, self.by_normalized = build_name_index(self.names, self.keys)
+        self.team_names = understat_blocks(understat_df)  # canonical team -> understat names
+        self._team_index = {}
+    
+    def team_index(self, team):
+        """
+        (by_lower, by_normalized) over one team block (built on first use - a
+        cached run only asks for a few teams)
+        """
+        if team not in self._team_index:
+            names = self.team_names[team]
+            self._team_index[team] = build_name_index(names, [self.key[name] for name in names])
+        return self._team_index[team]
+    
+    def exact_match(self, name, key, team):
+        """
+        The matcher's exact step for one FotMob name: case-insensitive, then by
+        normalized key (`key`), within the (canonical) team block first - an
+        identical name is trusted league-wide. None if there's no exact match.
+        """
+        indexes = [self.team_index(team)] if team in self.team_names else []
+        for lower, normalized in indexes + [(self.by_lower, self.by_normalized)]:
+            understat_name = lower.get(name.lower())
+            if understat_name is None:
+                understat_name = normalized.get(key)
+            if understat_name is not None:
+                return understat_name
+        return None
+
+
+def best_matches(queries, choices, scorer=fuzz.token_sort_ratio, score_cutoff=0, workers=-1):
+    """
+    Best choice for every query, scored in one batched call per chunk of queries
+    (rapidfuzz cdist: each string is prepared once and the scoring runs on
+    every core) instead of one extractOne per query
+
+    Picks what extractOne would: the highest score, the first choice on ties.
+    Scores are float64, same as extractOne's.
+
+    Returns:
+    --------
+    list of (choice, score) per query - (None, 0) when nothing reaches score_cutoff
+    """
+    if not queries or not choices:
+        return [(None, 0)] * len(queries)
+
+    results = []
+    chunk = max(1, SCORE_MATRIX_BYTES // (8 * len(choices)))
+    for start in range(0, len(queries), chunk):
+        scores = process.cdist(queries[start:start + chunk], choices, scorer=scorer,
+                               score_cutoff=score_cutoff, dtype=np.float64, workers=workers)
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(best)), best]
+        for i, score in zip(best.tolist(), best_scores.tolist()):
+            # below the cutoff cdist reports 0
+            results.append((choices[i], score) if score >= score_cutoff else (None, 0))
+    return results
 
 
-def fuzzy_match_names(understat_df, fotmob_df, threshold=85, manual_mappings=None):
+def fuzzy_match_names(understat_df, fotmob_df, threshold=85, manual_mappings=None, understat=None):
     """
     Fuzzy match FotMob player names to Understat player names
     
+    Candidates are blocked by team: a FotMob player is compared with the
+    Understat players of the same team (team spellings go through
+    canonical_team; Understat's "Team A,Team B" puts a player in both).
+    Only a player FotMob lists under several teams (moved mid-season) with
+    nothing in one of them, or whose team Understat doesn't have, falls
+    back to the whole league.
+    
     Parameters:
     -----------
     understat_df : pd.DataFrame
-        DataFrame with 'player' column from Understat
+        DataFrame with 'player' column from Understat ('team' optional -
+        "Team A,Team B" for players who moved)
     fotmob_df : pd.DataFrame
-        DataFrame with 'name' column from FotMob
+        DataFrame with 'name' and 'team' columns from FotMob ('player_id'
+        optional - tells a player who moved from two players sharing a name)
     threshold : int (default=85)
         Minimum similarity score (0-100) to consider a match
     manual_mappings : dict (optional)
         Dictionary of manual name mappings {fotmob_name: understat_name}
+        (looked up by normalize_name, so accent/case variants are covered too)
+    understat : UnderstatCandidates (optional)
+        understat_df already prepared (built here if not given)
     
     Returns:
     --------
@@ -68,6 +311,7 @@ def fuzzy_match_names(understat_df, fotmob_df, threshold=85, manual_mappings=Non
         - 'matched_name': The matched Understat name
         - 'match_score': Similarity score (0-100)
         - 'match_method': 'exact', 'fuzzy', 'manual', or 'unmatched'
+          ('exact' ignores case, accents and extra whitespace - see normalize_name)
     """
     
     # Initialize manual mappings if not provided
@@ -77,16 +321,56 @@ def fuzzy_match_names(understat_df, fotmob_df, threshold=85, manual_mappings=Non
     # Create a copy to avoid modifying original
     result_df = fotmob_df.copy()
     
-    # Get unique names from both datasets
-    understat_names = understat_df['player'].unique().tolist()
-    fotmob_names = result_df['name'].unique().tolist()
+    if understat is None:
+        understat = UnderstatCandidates(understat_df)
+    blocked = understat.blocked
+    understat_names = understat.names
+    team_names = understat.team_names
+    understat_key = understat.key
+    
+    fotmob_names = result_df['name'].tolist()
+    if blocked:
+        row_keys = list(zip(fotmob_names, [canonical_team(t) for t in result_df['team'].tolist()]))
+    else:
+        row_keys = [(name, None) for name in fotmob_names]
+    fotmob_keys = list(dict.fromkeys(row_keys))
+    
+    # FotMob players showing up for several teams moved mid-season (by player_id
+    # when there is one - two different players can share a name)
+    moved = set()
+    if blocked:
+        player_teams = {}
+        ids = result_df['player_id'].tolist() if 'player_id' in result_df.columns else fotmob_names
+        for player, (name, team) in zip(ids, row_keys):
+            player_teams.setdefault(player, ({}, set()))
+            player_teams[player][0][name] = None
+            player_teams[player][1].add(team)
+        moved = {name for names, teams in player_teams.values() if len(teams) > 1 for name in names}
+    
+    # Normalized keys (see normalize_name) - computed once per column, every step compares these
+    # (exact lookups go through the hash indexes in `understat` instead of a scan per FotMob name)
+    fotmob_key = dict(zip(fotmob_names, normalize_names(fotmob_names).tolist()))
+    manual_by_key = manual_index(manual_mappings)
+    
+    def score(keys, candidates):
+        # best candidate per FotMob name, scored on the normalized keys
+        # (names sharing a key score the same - the first one stands for all of them)
+        by_key = {}
+        for candidate in candidates:
+            by_key.setdefault(understat_key[candidate], candidate)
+        queries = [fotmob_key[name] for name, _ in keys]
+        if len(by_key) >= NGRAM_MIN_CHOICES and len(queries) >= NGRAM_MIN_QUERIES:
+            best = NgramIndex(list(by_key)).best_matches(queries, scorer=fuzz.token_sort_ratio, score_cutoff=threshold)
+        else:
+            best = best_matches(queries, list(by_key), scorer=fuzz.token_sort_ratio, score_cutoff=threshold)
+        return [(by_key[match], match_score) if match is not None else (None, 0) for match, match_score in best]
     
     # Create mapping dictionaries
-    name_map = {}  # fotmob_name -> understat_name
-    score_map = {}  # fotmob_name -> match_score
-    method_map = {}  # fotmob_name -> match_method
+    name_map = {}  # (fotmob_name, team) -> understat_name
+    score_map = {}  # (fotmob_name, team) -> match_score
+    method_map = {}  # (fotmob_name, team) -> match_method
     
-    print(f"Matching {len(fotmob_names)} FotMob names to {len(understat_names)} Understat names...")
+    print(f"Matching {len(fotmob_keys)} FotMob names to {len(understat_names)} Understat names...")
     print(f"Using threshold: {threshold}")
     
     # Track stats
@@ -95,55 +379,73 @@ def fuzzy_match_names(understat_df, fotmob_df, threshold=85, manual_mappings=Non
     manual_matches = 0
     unmatched = 0
     
-    for fotmob_name in fotmob_names:
-        matched = False
+    to_score = {}  # team block (None = whole league) -> names left for fuzzy matching
+    
+    for key in fotmob_keys:
+        fotmob_name, team = key
         
         # 1. Check manual mappings first
-        if fotmob_name in manual_mappings:
-            name_map[fotmob_name] = manual_mappings[fotmob_name]
-            score_map[fotmob_name] = 100
-            method_map[fotmob_name] = 'manual'
+        if fotmob_key[fotmob_name] in manual_by_key:
+            name_map[key] = manual_by_key[fotmob_key[fotmob_name]]
+            score_map[key] = 100
+            method_map[key] = 'manual'
             manual_matches += 1
-            matched = True
             continue
         
-        # 2. Try exact match (case-insensitive)
-        for understat_name in understat_names:
-            if fotmob_name.lower() == understat_name.lower():
-                name_map[fotmob_name] = understat_name
-                score_map[fotmob_name] = 100
-                method_map[fotmob_name] = 'exact'
-                exact_matches += 1
-                matched = True
-                break
-        
-        if matched:
+        # 2. Try exact match (case-insensitive, then ignoring accents/extra whitespace),
+        # within the team first - an identical name is trusted league-wide
+        understat_name = understat.exact_match(fotmob_name, fotmob_key[fotmob_name], team)
+        if understat_name is not None:
+            name_map[key] = understat_name
+            score_map[key] = 100
+            method_map[key] = 'exact'
+            exact_matches += 1
             continue
         
-        # 3. Try fuzzy matching
-        # Use token_sort_ratio which handles word order differences
-        best_match = process.extractOne(
-            fotmob_name,
-            understat_names,
-            scorer=fuzz.token_sort_ratio
-        )
-        
-        if best_match and best_match[1] >= threshold:
-            name_map[fotmob_name] = best_match[0]
-            score_map[fotmob_name] = best_match[1]
-            method_map[fotmob_name] = 'fuzzy'
+        to_score.setdefault(team if team in team_names else None, []).append(key)
+    
+    # 3. Try fuzzy matching, one batch per team block
+    # Use token_sort_ratio which handles word order differences
+    comparisons = 0
+    fallback = []
+    for team, keys in to_score.items():
+        if team is None:
+            # team unknown to Understat (or no teams at all) - only the whole league is left
+            fallback.extend(keys)
+            continue
+        candidates = team_names[team]
+        comparisons += len(keys) * len(candidates)
+        for key, match in zip(keys, score(keys, candidates)):
+            if match[0] is None and key[0] in moved:
+                # nothing in this team, but the player moved mid-season - try the whole league
+                fallback.append(key)
+            else:
+                name_map[key], score_map[key] = match
+    
+    if fallback:
+        comparisons += len(fallback) * len(understat_names)
+        for key, match in zip(fallback, score(fallback, understat_names)):
+            name_map[key], score_map[key] = match
+    
+    for key in (key for keys in to_score.values() for key in keys):
+        if name_map[key] is not None:
+            method_map[key] = 'fuzzy'
             fuzzy_matches += 1
         else:
             # No match found
-            name_map[fotmob_name] = None
-            score_map[fotmob_name] = 0
-            method_map[fotmob_name] = 'unmatched'
+            score_map[key] = 0
+            method_map[key] = 'unmatched'
             unmatched += 1
     
     # Apply mappings to the dataframe
-    result_df['matched_name'] = result_df['name'].map(name_map)
-    result_df['match_score'] = result_df['name'].map(score_map)
-    result_df['match_method'] = result_df['name'].map(method_map)
+    result_df['matched_name'] = [name_map[key] for key in row_keys]
+    result_df['match_score'] = [score_map[key] for key in row_keys]
+    result_df['match_method'] = [method_map[key] for key in row_keys]
+    
+    scored = sum(len(keys) for keys in to_score.values())
+    if scored:
+        print(f"Fuzzy comparisons: {comparisons:,} for {scored} names "
+              f"({scored * len(understat_names):,} without team blocking)")
     
     # Print summary
     print("\n" + "="*60)
@@ -153,36 +455,221 @@ def fuzzy_match_names(understat_df, fotmob_df, threshold=85, manual_mappings=Non
     print(f"Fuzzy matches:  {fuzzy_matches:>4}")
     print(f"Manual matches: {manual_matches:>4}")
     print(f"Unmatched:      {unmatched:>4}")
-    print(f"Total:          {len(fotmob_names):>4}")
+    print(f"Total:          {len(fotmob_keys):>4}")
     print("="*60)
     
+    # (the review lists walk the row lists - filtering result_df costs more than
+    # the matching itself on a cached run's few players)
+    raw_teams = result_df['team'].tolist()
+    
     # Show unmatched names
     if unmatched > 0:
         print("\nUNMATCHED NAMES (consider adding to manual_mappings):")
         print("-"*60)
-        unmatched_names = result_df[result_df['match_method'] == 'unmatched'][['name', 'team']].drop_duplicates()
-        for _, row in unmatched_names.iterrows():
-            print(f"  '{row['name']}' ({row['team']})")
+        unmatched_names = dict.fromkeys((name, team) for key, (name, team) in zip(row_keys, zip(fotmob_names, raw_teams))
+                                        if method_map[key] == 'unmatched')
+        for name, team in unmatched_names:
+            print(f"  '{name}' ({team})")
     
     # Show fuzzy matches for review (score < 95)
-    uncertain_matches = result_df[
-        (result_df['match_method'] == 'fuzzy') & 
-        (result_df['match_score'] < 95)
-    ][['name', 'matched_name', 'match_score', 'team']].drop_duplicates()
+    uncertain_matches = dict.fromkeys((name, name_map[key], score_map[key], team)
+                                      for key, (name, team) in zip(row_keys, zip(fotmob_names, raw_teams))
+                                      if method_map[key] == 'fuzzy' and score_map[key] < 95)
     
     if len(uncertain_matches) > 0:
         print("\nFUZZY MATCHES (score < 95) - Please review:")
         print("-"*60)
-        for _, row in uncertain_matches.iterrows():
-            print(f"  {row['name']:30} -> {row['matched_name']:30} (score: {row['match_score']:.1f}, team: {row['team']})")
+        for name, matched_name, score, team in uncertain_matches:
+            print(f"  {name:30} -> {matched_name:30} (score: {score:.1f}, team: {team})")
     
     return result_df
 
 
-def match_and_save(raw_dir, threshold=85, manual_mappings=None, dry_run=False):
+def cached_match_names(understat_df, fotmob_df, threshold=85, manual_mappings=None, cache=None):
+    """
+    fuzzy_match_names(), but players the NameCache already resolved are
+    answered from it and only the rest go through the matcher
+    
+    A stored player is reused only if the matcher would still say the same:
+        - same (name, team) rows for the player_id
+        - manual matches still in the manual mappings, and no manual mapping
+          added for a name that was matched some other way
+        - exact matches still pointing at a current Understat name, and - when
+          the player's candidates changed - still what the exact step finds
+        - fuzzy/unmatched: the player's Understat candidates (their team's
+          block, or the whole league for a player who moved or whose team
+          Understat doesn't have) unchanged, and no exact match for the name now
+    When more than CACHE_MAX_STALE_SHARE of the players are stale, everyone is re-matched.
+    
+    Parameters:
+    -----------
+    cache : NameCache (optional)
+        Without one (or without a 'player_id' column) this is just fuzzy_match_names()
+    
+    Returns:
+    --------
+    pd.DataFrame : same as fuzzy_match_names()
+    """
+    if cache is None or 'player_id' not in fotmob_df.columns:
+        return fuzzy_match_names(understat_df, fotmob_df, threshold, manual_mappings)
+    
+    if cache.manual_changes:
+        print(f"Manual mappings changed (version {cache.manual_version}): {', '.join(cache.manual_changes)}")
+    
+    # the cache was checked against these mappings last run - only entries that changed since
+    # can turn a stored match into a different one
+    manual_by_key = manual_index(manual_mappings)
+    changed_keys = {normalize_name(name) for name in cache.manual_changes}
+    # shared with the matcher for the stale players; last run's keys spare normalizing every name again
+    understat = UnderstatCandidates(understat_df, cache.understat_keys)
+    understat_names = understat.names
+    known = set(understat_names)
+    # a cached fuzzy/unmatched name only turns exact through an Understat name that's new since then
+    new_names = known - set(cache.understat_keys) if cache.understat_keys is not None else known
+    by_lower, by_normalized = build_name_index(sorted(new_names)) if new_names else ({}, {})
+    versions = {team: candidates_version(names) for team, names in understat.team_names.items()}
+    league_version = candidates_version(understat_names)
+    
+    # columns as lists (iterating pandas string arrays element by element is slow),
+    # NaN as None - the way the cache stores them
+    player_keys = [player_key(player_id) for player_id in fotmob_df['player_id'].tolist()]
+    names = [name if isinstance(name, str) else None for name in fotmob_df['name'].tolist()]
+    teams = [team if isinstance(team, str) else None for team in fotmob_df['team'].tolist()]
+    
+    # stored rows by (player, name, team) -> position in the cache's columns
+    columns = cache.columns
+    stored = dict(zip(zip(columns['player'], columns['name'], columns['team']), range(len(columns['player']))))
+    stored_matched, stored_methods, stored_versions = columns['matched_name'], columns['match_method'], columns['understat']
+    
+    # the candidates each player is matched against: their team's block, or the whole league
+    # for a player listed under several teams or a team Understat doesn't have
+    canonical = {team: canonical_team(team) for team in set(teams)}
+    player_team = {}
+    moved = set()
+    for player, team in zip(player_keys, teams):
+        if player_team.setdefault(player, canonical[team]) != canonical[team]:
+            moved.add(player)
+    
+    def version_of(player):
+        return league_version if player in moved else versions.get(player_team[player], league_version)
+    
+    def new_exact_hit(name):
+        # an Understat name new since last run that the exact step would find
+        return name is not None and bool(new_names) and (name.lower() in by_lower
+                                                         or normalize_name(name) in by_normalized)
+    
+    def exact_still_holds(name, team, i, player):
+        if stored_matched[i] not in known:
+            return False
+        if stored_versions[i] == version_of(player) and not new_exact_hit(name):
+            return True
+        # the candidates changed - a spelling new to the player's own team block (or earlier in
+        # the league) can take over from the stored match, so redo the exact step
+        return name is not None and understat.exact_match(name, normalize_name(name), canonical[team]) == stored_matched[i]
+    
+    def still_valid(name, team, i, player):
+        # normalize_name only runs for the few rows a changed mapping or a new Understat name could affect
+        matched_name, method = stored_matched[i], stored_methods[i]
+        if changed_keys and name is not None and normalize_name(name) in changed_keys:
+            return manual_by_key.get(normalize_name(name)) == matched_name and method == 'manual'
+        if method == 'exact':
+            return exact_still_holds(name, team, i, player)
+        if method == 'manual':
+            return True
+        return stored_versions[i] == version_of(player) and not new_exact_hit(name)
+    
+    # one pass over the rows - a player is stale if any of their rows is new or no longer holds
+    # (exact matches, most rows, are checked inline)
+    hits = [stored.get(key) for key in zip(player_keys, names, teams)]
+    stale = set()
+    check_all = bool(changed_keys)
+    for player, name, team, i in zip(player_keys, names, teams, hits):
+        if i is None:
+            stale.add(player)
+        elif check_all or stored_methods[i] != 'exact':
+            if not still_valid(name, team, i, player):
+                stale.add(player)
+        elif not exact_still_holds(name, team, i, player):
+            stale.add(player)
+    # ... or a stored row of theirs isn't in this run
+    hit_counts = Counter(columns['player'][i] for i in set(hits) if i is not None)
+    stored_counts = Counter(columns['player'])
+    stale.update(player for player, count in hit_counts.items() if stored_counts[player] != count)
+    rematch_all = len(stale) > CACHE_MAX_STALE_SHARE * len(player_team)
+    if rematch_all:
+        stale = set(player_team)
+    stale = {player: version_of(player) for player in stale}
+    
+    print(f"Name cache: {len(player_team) - len(stale)} players resolved from cache, {len(stale)} to match")
+    
+    resolved = [(stored_matched[i], columns['match_score'][i], stored_methods[i]) if player not in stale else None
+                for player, i in zip(player_keys, hits)] if not rematch_all else None
+    if stale:
+        positions = [position for position, player in enumerate(player_keys) if player in stale]
+        matched_df = fuzzy_match_names(understat_df, fotmob_df if rematch_all else fotmob_df.iloc[positions],
+                                       threshold, manual_mappings, understat=understat)
+        matched = zip(matched_df['matched_name'].tolist(), matched_df['match_score'].tolist(),
+                      matched_df['match_method'].tolist())
+        updated = []
+        for position, match in zip(positions, matched):
+            if resolved is not None:
+                resolved[position] = match
+            player = player_keys[position]
+            updated.append((player, names[position], teams[position], *match, stale[player]))
+        cache.update(updated)
+    
+    cache.seen(understat.key)
+    if rematch_all:
+        return matched_df
+    
+    # same row order as fuzzy_match_names() - cached rows and freshly matched ones interleaved
+    result_df = fotmob_df.copy()
+    result_df['matched_name'] = [match[0] for match in resolved]
+    result_df['match_score'] = [match[1] for match in resolved]
+    result_df['match_method'] = [match[2] for match in resolved]
+    return result_df
+
+
+def resolve_identities(understat_df, fotmob_frames, threshold=85, manual_mappings=None, cache=None):
+    """
+    One matching pass over every FotMob player in fotmob_frames (defense and
+    keepers list the same goalkeepers - they're matched once)
+    
+    Parameters:
+    -----------
+    fotmob_frames : list of pd.DataFrame
+        FotMob tables with 'name' and 'team' (and 'player_id') columns - None entries are skipped
+    
+    Returns:
+    --------
+    pd.DataFrame : the player identity table - one row per IDENTITY_KEYS combination
+        (the ones every frame has), plus 'matched_name', 'match_score' and 'match_method'
+    """
+    frames = [df for df in fotmob_frames if df is not None]
+    keys = [key for key in IDENTITY_KEYS if all(key in df.columns for df in frames)]
+    players = pd.concat([df[keys] for df in frames], ignore_index=True).drop_duplicates(ignore_index=True)
+    return cached_match_names(understat_df, players, threshold, manual_mappings, cache)
+
+
+def attach_identities(fotmob_df, identities):
+    """
+    fotmob_df with its players' 'matched_name', 'match_score' and 'match_method'
+    from the identity table (rows and their order unchanged)
+    """
+    keys = [key for key in IDENTITY_KEYS if key in fotmob_df.columns and key in identities.columns]
+    matched = fotmob_df.merge(identities[keys + MATCH_COLUMNS], on=keys, how='left')
+    matched.index = fotmob_df.index
+    return matched
+
+
+def match_and_save(raw_dir, threshold=85, manual_mappings=None, dry_run=False, cache_dir=None, refresh_cache=False):
     """
     Load data, perform matching, and save results
     
+    Every FotMob player (defense and keepers) is resolved once, into the
+    player identity table (player_identities.csv) the formatters join
+    against. The per-table matched files are still written for reference.
+    
     Parameters:
     -----------
     raw_dir : Path
@@ -193,6 +680,11 @@ def match_and_save(raw_dir, threshold=85, manual_mappings=None, dry_run=False):
         Manual name mappings
     dry_run : bool
         If True, don't save files, just show results
+    cache_dir : Path (optional)
+        Where the name-resolution cache lives - without it every player is
+        matched from scratch
+    refresh_cache : bool
+        Re-match every player and overwrite what the cache had
     """
     
     print("Loading data...")
@@ -217,41 +709,45 @@ def match_and_save(raw_dir, threshold=85, manual_mappings=None, dry_run=False):
     print(f"  FotMob defense: {len(fotmob_defense) if has_defense else 'NOT AVAILABLE'}")
     print(f"  FotMob keepers: {len(fotmob_keepers) if has_keepers else 'NOT AVAILABLE'}")
     
-    # Match FotMob datasets if available
-    matched_defense = None
-    matched_keepers = None
+    cache = None
+    if cache_dir is not None:
+        cache = NameCache(Path(cache_dir) / 'players.json', threshold, manual_mappings, refresh=refresh_cache)
+    
+    print("\n" + "="*60)
+    print("MATCHING PLAYERS (DEFENSE + KEEPERS)")
+    print("="*60)
+    identities = resolve_identities(understat_df, [fotmob_defense, fotmob_keepers], threshold, manual_mappings,
+                                    cache)
     
-    if has_defense:
-        print("\n" + "="*60)
-        print("MATCHING DEFENSIVE PLAYERS")
-        print("="*60)
-        matched_defense = fuzzy_match_names(understat_df, fotmob_defense, threshold, manual_mappings)
+    # a dry run still keeps what it resolved - it's the same answer a real run would get
+    if cache is not None:
+        cache.save()
     
-    if has_keepers:
-        print("\n" + "="*60)
-        print("MATCHING GOALKEEPERS")
-        print("="*60)
-        matched_keepers = fuzzy_match_names(understat_df, fotmob_keepers, threshold, manual_mappings)
+    matched_defense = attach_identities(fotmob_defense, identities) if has_defense else None
+    matched_keepers = attach_identities(fotmob_keepers, identities) if has_keepers else None
     
     if not dry_run:
+        identities_file = raw_dir / 'player_identities.csv'
+        identities.to_csv(identities_file, index=False)
+        print(f"\n✓ Saved player identities to: {identities_file}")
+        
         # Save matched datasets
         output_defense = raw_dir / 'fotmob_defense_season_matched.csv'
         output_keepers = raw_dir / 'fotmob_keepers_season_matched.csv'
         
         if matched_defense is not None:
             matched_defense.to_csv(output_defense, index=False)
-            print(f"\n✓ Saved matched defense data to: {output_defense}")
+            print(f"✓ Saved matched defense data to: {output_defense}")
         
         if matched_keepers is not None:
             matched_keepers.to_csv(output_keepers, index=False)
             print(f"✓ Saved matched keepers data to: {output_keepers}")
         
-        # Also create a mapping file for reference (only if we have defense data)
-        if matched_defense is not None:
-            mapping_df = matched_defense[['name', 'matched_name', 'match_score', 'match_method']].drop_duplicates()
-            mapping_file = raw_dir / 'name_mappings.csv'
-            mapping_df.to_csv(mapping_file, index=False)
-            print(f"✓ Saved name mappings reference to: {mapping_file}")
+        # Also create a mapping file for reference
+        mapping_df = identities[['name', 'matched_name', 'match_score', 'match_method']].drop_duplicates()
+        mapping_file = raw_dir / 'name_mappings.csv'
+        mapping_df.to_csv(mapping_file, index=False)
+        print(f"✓ Saved name mappings reference to: {mapping_file}")
     else:
         print("\n[DRY RUN] No files saved.")
     
@@ -0,0 +1,103 @@
+"""
+N-gram Candidate Index
+Character-trigram inverted index over (normalized) names, for fuzzy matching
+against more names than brute force can score
+
+Scoring every query against every candidate is fine for a league (a few
+hundred names per team block) but not for tens of thousands of names across
+leagues and seasons. The index returns the top-K candidates by number of
+shared trigrams (ties go to the candidate with fewer grams, so "pedro"
+beats "pedro x" for the query "pedro"); only those get scored with rapidfuzz.
+
+Grams are taken per word (with word boundaries), so word order doesn't
+matter - same as token_sort_ratio. Each name counts a gram once.
+
+Retrieval can miss: the brute-force best is only found if it's among the
+top-K by shared grams. benchmarks/bench_ngram.py measures how often that
+happens against best_matches().
+"""
+import numpy as np
+from rapidfuzz import fuzz, process
+
+
+# candidates re-ranked per query
+TOP_K = 50
+
+
+def word_grams(name, n=3):
+    """
+    Distinct character n-grams of every word in `name`, padded with a space
+    on both sides (so "li" in "Ali" and "Lisandro" don't look alike)
+    """
+    grams = set()
+    for word in name.split():
+        word = f" {word} "
+        grams.update(word[i:i + n] for i in range(max(1, len(word) - n + 1)))
+    return grams
+
+
+class NgramIndex:
+    def __init__(self, choices, n=3):
+        """
+        Parameters:
+        -----------
+        choices : list of str
+            Candidate names (already normalized - see name_matcher.normalize_names)
+        n : int
+            Gram length
+        """
+        self.choices = list(choices)
+        self.n = n
+
+        # postings: gram id -> sorted choice indices, stored CSR-style
+        # (one flat array + offsets) so a query is a few slices and a bincount
+        gram_ids = {}
+        pairs_gram, pairs_choice = [], []
+        for i, choice in enumerate(self.choices):
+            for gram in word_grams(choice, n):
+                pairs_gram.append(gram_ids.setdefault(gram, len(gram_ids)))
+                pairs_choice.append(i)
+        pairs_gram = np.asarray(pairs_gram, dtype=np.int64)
+        pairs_choice = np.asarray(pairs_choice, dtype=np.int64)
+        order = np.argsort(pairs_gram, kind='stable')
+        self.gram_ids = gram_ids
+        self.postings = pairs_choice[order]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(pairs_gram, minlength=len(gram_ids)))])
+        self.sizes = np.bincount(pairs_choice, minlength=len(self.choices))  # grams per choice
+
+    def __len__(self):
+        return len(self.choices)
+
+    def candidates(self, query, k=TOP_K):
+        """
+        Indices of the (up to) k choices sharing the most grams with query,
+        ascending - empty if it shares none
+        """
+        ids = [self.gram_ids[gram] for gram in word_grams(query, self.n) if gram in self.gram_ids]
+        if not ids:
+            return np.empty(0, dtype=np.int64)
+        hits = np.concatenate([self.postings[self.offsets[g]:self.offsets[g + 1]] for g in ids])
+        found, shared = np.unique(hits, return_counts=True)
+        if len(found) > k:
+            # most shared grams first, then fewest grams
+            rank = shared * (len(self.gram_ids) + 1) - self.sizes[found]
+            found = found[np.argpartition(-rank, k - 1)[:k]]
+            found.sort()
+        return found
+
+    def best_matches(self, queries, scorer=fuzz.token_sort_ratio, score_cutoff=0, k=TOP_K):
+        """
+        Best choice per query among its top-k candidates - same contract as
+        name_matcher.best_matches() (highest score, first choice on ties)
+
+        Returns:
+        --------
+        list of (choice, score) per query - (None, 0) when no candidate reaches score_cutoff
+        """
+        results = []
+        for query in queries:
+            found = self.candidates(query, k)
+            best = process.extractOne(query, [self.choices[i] for i in found.tolist()], scorer=scorer,
+                                      score_cutoff=score_cutoff) if len(found) else None
+            results.append((best[0], best[1]) if best is not None else (None, 0))
+        return results
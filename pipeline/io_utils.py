@@ -0,0 +1,26 @@
+"""
+File Helpers
+Atomic file writes shared by the caches and stores under data/ - a killed run
+leaves either the old file or the new one, never half of one
+"""
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_path(path):
+    """
+    Yields a temporary path next to `path` to write to; it replaces `path`
+    once the block finishes (and is left behind, never renamed, if it raises)
+    """
+    tmp = path.with_name(path.name + '.tmp')
+    yield tmp
+    os.replace(tmp, path)
+
+
+def atomic_write(path, data):
+    """
+    Write bytes to `path` atomically
+    """
+    with atomic_path(path) as tmp:
+        tmp.write_bytes(data)
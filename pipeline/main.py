@@ -1,10 +1,8 @@
-import requests
 import soccerdata as sd
 from pathlib import Path  
 import pandas as pd
 import os
-import time
-import json
+from scrape.http_client import UNDERSTAT_BASE_URL, get_client
 
 # ========================================
 # CONFIG
@@ -15,6 +13,10 @@ RAW_DIR = SCRIPT_DIR / 'data' / 'raw'
 RAW_DIR.mkdir(parents=True, exist_ok=True)
 FORMATTED_DIR = SCRIPT_DIR / 'data' / 'formatted'
 FORMATTED_DIR.mkdir(parents=True, exist_ok=True)
+# long-lived caches - kept outside raw/formatted so push_to_db's cleanup doesn't wipe them
+CACHE_DIR = SCRIPT_DIR / 'data' / 'cache'
+# per-run telemetry reports (see telemetry.py)
+REPORT_DIR = SCRIPT_DIR / 'data' / 'reports'
 DATA_DIR = Path('app/pipeline/data')
 path_to_chrome = os.getenv("CHROME_PBT_PATH")
 
@@ -23,6 +25,28 @@ path_to_chrome = os.getenv("CHROME_PBT_PATH")
 LEAGUE = "ENG-Premier League"
 SEASON = "2025"
 
+# fotmob harvester config - how many matchDetails requests can be in flight at once
+FOTMOB_CONCURRENCY = int(os.getenv("FOTMOB_CONCURRENCY", "8"))
+FOTMOB_TIMEOUT = float(os.getenv("FOTMOB_TIMEOUT", "5"))
+# finished-match cache: "incremental" only downloads matches we haven't cached yet,
+# "refresh" re-downloads (and re-caches) everything, "off" skips the cache entirely
+FOTMOB_CACHE_MODE = os.getenv("FOTMOB_CACHE_MODE", "incremental")
+# season totals: "incremental" folds only newly ingested matches into the stored totals,
+# "rebuild" recomputes them from the per-match fact store, "reingest" re-extracts every
+# match (from the payload cache where possible) and then rebuilds
+FOTMOB_AGGREGATION = os.getenv("FOTMOB_AGGREGATION", "incremental")
+# matchDetails decoding: "partial" only decodes the playerStats subtree (skips commentary,
+# shotmap, lineups...), "full" decodes the whole payload (orjson if installed)
+FOTMOB_DECODE = os.getenv("FOTMOB_DECODE", "partial")
+# parse stage: processes that decode + extract payloads (0 = in the main process, which is
+# plenty for a weekly run - worth raising for a full reingest), and matches per handoff
+FOTMOB_PARSE_WORKERS = int(os.getenv("FOTMOB_PARSE_WORKERS", "0"))
+FOTMOB_PARSE_BATCH = int(os.getenv("FOTMOB_PARSE_BATCH", "16"))
+# progress is checkpointed every N matches so a killed run can pick up where it stopped
+FOTMOB_CHECKPOINT_EVERY = int(os.getenv("FOTMOB_CHECKPOINT_EVERY", "50"))
+# cProfile + tracemalloc every stage (or pass --profile) - see profiling.py
+PIPELINE_PROFILE = os.getenv("PIPELINE_PROFILE", "0") not in ("", "0", "false", "no")
+
 # ========================================
 # GET UNDERSTAT METRICS (player (for card) + offensive + passing)
 # ========================================
@@ -33,6 +57,9 @@ def get_understat_metrics():
     """
     print(f"[{LEAGUE}] fetching understat data...")
     try:
+       if UNDERSTAT_BASE_URL != "https://understat.com":
+           # soccerdata builds every Understat URL from this module constant
+           sd.understat.UNDERSTAT_URL = UNDERSTAT_BASE_URL
         
        ud = sd.Understat(leagues="ENG-Premier League", seasons="2025",data_dir=RAW_DIR)
        df = ud.read_player_season_stats()
@@ -68,294 +95,194 @@ def get_understat_metrics():
         print(f"!!!! understat failed: {e}")
 
 # ========================================
-# GET DEFENSIVE METRICS 
+# GET DEFENSIVE + KEEPER METRICS 
 # ========================================
 # There is no reliable source for good defensive data other than FBref (who has me banned atp)
 # So we use fotmob to collect individual player match stats then we aggregate it
-def get_defensive_stats():
-    print("--- STARTING FOTMOB HARVESTER (FINAL) ---")
-    
-    # FIND MATCHES - Direct API call (soccerdata's cookie server is unreliable)
-    print("1. Fetching schedule from FotMob API...")
-    
-    # Premier League ID on FotMob is 47
-    league_url = "https://www.fotmob.com/api/leagues?id=47"
-    r = requests.get(league_url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
-    league_data = r.json()
-    
-    # Extract finished match IDs from the league data
-    game_ids = []
-    matches = league_data.get('fixtures', {}).get('allMatches', [])
-    for match in matches:
-        status = match.get('status', {})
-        # Check if match is finished
-        if status.get('finished', False):
-            if match.get('id'):
-                game_ids.append(match.get('id'))
-    
+_league_snapshot = None
+
+def get_league_snapshot():
+    """
+    The FotMob league payload for this run - fixtures and standings are both
+    read from it, so it's only requested once (and conditionally, see LeagueSnapshot)
+    """
+    from scrape.league import LeagueSnapshot
+
+    global _league_snapshot
+    if _league_snapshot is None:
+        # Direct API call (soccerdata's cookie server is unreliable)
+        print("Fetching league snapshot from FotMob API...")
+        _league_snapshot = LeagueSnapshot.fetch(CACHE_DIR / 'league')
+    return _league_snapshot
+
+
+def get_league():
+    """
+    Fetch (or revalidate) the league snapshot so the FotMob stages share it
+    """
+    get_league_snapshot()
+
+
+def get_finished_match_ids():
+    """
+    Returns the FotMob ids of every finished league match
+    """
+    print("1. Reading schedule from the league snapshot...")
+    game_ids = get_league_snapshot().finished_match_ids()
     print(f" > Found {len(game_ids)} matches to process.")
-    
-    all_player_stats = []
-
-    # GO THROUGH EVERY MATCH TO COLLECT THE PLAYER STATS
-    for i, game_id in enumerate(game_ids):
-        try:
-            # send request for match stats using fotmob api
-            url = f"https://www.fotmob.com/api/matchDetails?matchId={game_id}"
-            r = requests.get(url, timeout=5)
-            data = r.json()
-            
-            # Safe navigation to the playerStats dictionary
-            content = data.get('content', {})
-            player_stats_root = content.get('playerStats')
-            
-            if not player_stats_root:
-                continue
-
-            # now we iterate over each player in the match
-            # note: sometimes root keys are team IDs, sometimes mixed. 
-            # We iterate values() to be safe if it's a dict of players.
-            
-            # FLATTEN THE PLAYERS LIST
-            players_to_process = []
-            
-            if isinstance(player_stats_root, dict):
-                first_key = next(iter(player_stats_root))
-                first_val = player_stats_root[first_key]
-                
-                # Format A: Keys are Player IDs (Direct list)
-                if 'name' in first_val and 'stats' in first_val:
-                    players_to_process = player_stats_root.values()
-                    
-                # Format B: Keys are Team IDs (Grouped)
-                elif isinstance(first_val, list): # Team -> List of players
-                    for team_id, p_list in player_stats_root.items():
-                        players_to_process.extend(p_list)
-            
-            # 3. PARSE EACH PLAYER
-            for p in players_to_process:
-                p_name = p.get('name')
-                p_id = p.get('id')
-                p_team = p.get('teamName') 
-                
-                stats_list = p.get('stats', [])
-                
-                # Init each player's stats row
-                row = {
-                    'game_id': game_id,
-                    'player_id': p_id,
-                    'name': p_name,
-                    'team': p_team,
-                    'tackles_won': 0,
-                    'interceptions': 0,
-                    'duels_won': 0,
-                    'was_fouled': 0,
-                    'fouls_committed': 0,
-                    'minutes': 0,
-                    'rating': 0.0 # TODO: get rid of this or move to a different
-                }
-
-                # iterate through the categories ("Top stats", "Defense", "Duels")
-                for category in stats_list:
-                    # Inside a category, 'stats' is a DICT of metrics
-                    metrics = category.get('stats', {})
-                    
-                    # Helper to safely extract value
-                    def get_val(key):
-                        if key in metrics:
-                            # Structure: "Tackles": { "stat": { "value": 1 } }
-                            return metrics[key].get('stat', {}).get('value', 0)
-                        return 0
-
-                    # Extract what we find in this category
-                    # We use += because metrics might be split (rare but possible)
-                    row['tackles_won'] += int(get_val('Tackles'))
-                    row['interceptions'] += int(get_val('Interceptions'))
-                    row['duels_won'] += int(get_val('Duels won'))
-                    row['was_fouled'] += int(get_val('Was fouled'))
-                    row['fouls_committed'] += int(get_val('Fouls committed'))
-                    
-                    # Minutes usually in "Top stats"
-                    mins = get_val('Minutes played')
-                    if mins: row['minutes'] = int(mins)
-                    
-                    # Rating usually in "Top stats"
-                    rating = get_val('FotMob rating')
-                    if rating: row['rating'] = float(rating)
-
-                all_player_stats.append(row)
-                
-        except Exception as e:
-            # print(f"x Match {game_id} error: {e}")
-            pass
-
-        if i % 20 == 0:
-            print(f" > Processed {i}/{len(game_ids)} matches...")
-            time.sleep(0.1)
-
-    # 4. SAVE
+    return game_ids
+
+
+def get_fotmob_stats(resume=False):
+    """
+    Harvests every finished match once and writes both the defensive
+    and the keeper season tables from that single pass.
+
+    Per-match rows are kept in the fact store, so only matches that haven't
+    been ingested yet are harvested and folded into the season totals.
+
+    Progress is checkpointed every FOTMOB_CHECKPOINT_EVERY matches. Matches
+    committed by a killed run are never harvested again; with resume=True a
+    killed rebuild/reingest run also skips the matches it had already redone.
+
+    Returns False if some finished match is still missing from the season totals.
+    """
+    from scrape.harvester import harvest_matches
+    from scrape.match_cache import MatchCache
+    from scrape.fact_store import FactStore
+
+    print("--- STARTING FOTMOB HARVESTER (DEFENSE + KEEPERS) ---")
+    game_ids = get_finished_match_ids()
+
+    cache = None
+    if FOTMOB_CACHE_MODE != "off":
+        cache = MatchCache(CACHE_DIR / 'matches')
+
+    store = FactStore(CACHE_DIR / 'facts' / f"fotmob_47_{SEASON}")
+    if FOTMOB_AGGREGATION == "reingest" or FOTMOB_CACHE_MODE == "refresh":
+        new_ids = game_ids
+    else:
+        new_ids = store.missing(game_ids)
+    print(f" > {len(game_ids) - len(new_ids)} matches already in the fact store, {len(new_ids)} to harvest")
+
+    resumed = store.checkpoint_ids() if resume else []
+    if resumed:
+        done = set(resumed)
+        new_ids = [game_id for game_id in new_ids if game_id not in done]
+        print(f" > Resuming: {len(resumed)} matches done before the last checkpoint, {len(new_ids)} left")
+
+    # GO THROUGH EVERY NEW MATCH ONCE, feeding both extractors - each parsed batch
+    # goes straight into the fact store and the running season totals
+    writer = store.writer(
+        rebuild=(FOTMOB_AGGREGATION != "incremental"),
+        checkpoint_every=FOTMOB_CHECKPOINT_EVERY,
+        resume=resumed,
+        order=game_ids,
+    )
+    harvest_matches(
+        new_ids,
+        concurrency=FOTMOB_CONCURRENCY,
+        timeout=FOTMOB_TIMEOUT,
+        cache=cache,
+        refresh=(FOTMOB_CACHE_MODE == "refresh"),
+        decode_mode=FOTMOB_DECODE,
+        parse_workers=FOTMOB_PARSE_WORKERS,
+        parse_batch_size=FOTMOB_PARSE_BATCH,
+        sink=writer.add,
+        save_every=FOTMOB_CHECKPOINT_EVERY,
+    )
+
     print("Aggregating season data...")
-    df = pd.DataFrame(all_player_stats)
-    
-    if df.empty:
+    defense_season, keeper_season = writer.commit()
+
+    save_defensive_stats(defense_season)
+    save_keeper_stats(keeper_season)
+
+    http = get_client().stats()
+    print(f"HTTP: {http['requests']} requests, {http['retries']} retries, "
+          f"{http['failures']} permanent failures, {http['bytes_received'] / 1e6:.1f} MB")
+
+    # matches that didn't make it in (failed downloads) are retried next run
+    return not store.missing(game_ids)
+
+
+def save_defensive_stats(season_df):
+    if season_df is None or season_df.empty:
         print("!!!! STILL NO DATA. The format might vary per match.")
         return
 
-    # Sum up the season totals
-    season_df = df.groupby(['player_id', 'name', 'team']).sum(numeric_only=True).reset_index()
-    
     # Save
     out_path = RAW_DIR / 'fotmob_defense_season_final.csv'
     season_df.to_csv(out_path, index=False)
     print(f"SUCCESS. Saved defensive stats to: {out_path}")
     print(season_df.head())
 
-def get_keeper_stats():
-    print("--- STARTING FOTMOB KEEPER HARVESTER ---")
-    
-    # 1. GET SCHEDULE - Direct API call (soccerdata's cookie server is unreliable)
-    print("1. Fetching schedule from FotMob API...")
-    
-    # Premier League ID on FotMob is 47
-    league_url = "https://www.fotmob.com/api/leagues?id=47"
-    r = requests.get(league_url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
-    league_data = r.json()
-    
-    # Extract finished match IDs from the league data
-    game_ids = []
-    matches = league_data.get('fixtures', {}).get('allMatches', [])
-    for match in matches:
-        status = match.get('status', {})
-        if status.get('finished', False):
-            if match.get('id'):
-                game_ids.append(match.get('id'))
-    
-    print(f" > Found {len(game_ids)} matches to process.")
-    
-    all_keepers = []
-
-    # 2. LOOP MATCHES
-    for i, game_id in enumerate(game_ids):
-        try:
-            url = f"https://www.fotmob.com/api/matchDetails?matchId={game_id}"
-            r = requests.get(url, timeout=5)
-            data = r.json()
-            
-            content = data.get('content', {})
-            player_stats_root = content.get('playerStats')
-            
-            if not player_stats_root:
-                continue
-
-            # Flatten the players list (handling the structure quirks we found earlier)
-            players_to_process = []
-            if isinstance(player_stats_root, dict):
-                first_val = player_stats_root[next(iter(player_stats_root))]
-                if 'name' in first_val: # Dict of players
-                    players_to_process = player_stats_root.values()
-                elif isinstance(first_val, list): # Dict of Teams -> List of Players
-                    for team_id, p_list in player_stats_root.items():
-                        players_to_process.extend(p_list)
-
-            # 3. PARSE KEEPERS ONLY
-            for p in players_to_process:
-                # FotMob usually flags GKs, or we check if they have specific stats
-                # Note: 'isGoalkeeper' might be a boolean key in 'p'
-                if not p.get('isGoalkeeper', False):
-                    continue
-                    
-                stats_list = p.get('stats', [])
-                
-                row = {
-                    'game_id': game_id,
-                    'player_id': p.get('id'),
-                    'name': p.get('name'),
-                    'team': p.get('teamName'),
-                    'minutes': 0,
-                    'rating': 0.0,
-                    # GK Specifics
-                    'saves': 0,
-                    'goals_conceded': 0,
-                    'xgot_faced': 0.0, # Expected Goals on Target Faced (Post-Shot xG)
-                    'goals_prevented': 0.0,
-                    'punches': 0,
-                    'high_claims': 0,
-                    'recoveries': 0,
-                    'touches': 0,
-                    'passes_accurate': 0,
-                    'long_balls_accurate': 0,
-                    'clean_sheet': 0 
-                }
-
-                # Helper to extract values by their English title
-                def get_val(key_title):
-                    for category in stats_list:
-                        metrics = category.get('stats', {})
-                        if key_title in metrics:
-                            val = metrics[key_title].get('stat', {}).get('value', 0)
-                            return val
-                    return 0
-
-                # --- FILL DATA ---
-                row['saves'] = int(get_val('Saves'))
-                row['goals_conceded'] = int(get_val('Goals conceded'))
-                row['punches'] = int(get_val('Punches'))
-                row['high_claims'] = int(get_val('High claims'))
-                row['recoveries'] = int(get_val('Recoveries'))
-                row['touches'] = int(get_val('Touches'))
-                
-                # Advanced stats (sometimes labeled differently)
-                row['goals_prevented'] = float(get_val('Goals prevented') or 0.0)
-                # Sometimes xGoT is listed as "Expected goals on target"
-                row['xgot_faced'] = float(get_val('Expected goals on target (xGOT)') or 0.0)
-                
-                # Distribution
-                row['passes_accurate'] = int(get_val('Accurate passes'))
-                row['long_balls_accurate'] = int(get_val('Accurate long balls'))
-                
-                # Basics
-                row['minutes'] = int(get_val('Minutes played'))
-                row['rating'] = float(get_val('FotMob rating') or 0.0)
-                
-                # Manual Clean Sheet Logic (Safest)
-                if row['goals_conceded'] == 0 and row['minutes'] > 80:
-                    row['clean_sheet'] = 1
-
-                all_keepers.append(row)
-
-        except Exception as e:
-            pass
-
-        if i % 20 == 0:
-            print(f" > Processed {i}/{len(game_ids)} matches...")
-            time.sleep(0.1)
-
-    # 4. SAVE
-    print("Aggregating keeper season data...")
-    if not all_keepers:
+
+def save_keeper_stats(season_df):
+    if season_df is None or season_df.empty:
         print("!!!! NO KEEPER DATA FOUND.")
         return
 
-    df = pd.DataFrame(all_keepers)
-    
-    # Sum totals (average rating separately)
-    cols_to_sum = [
-        'saves', 'goals_conceded', 'punches', 'high_claims', 
-        'recoveries', 'touches', 'passes_accurate', 'long_balls_accurate', 
-        'goals_prevented', 'xgot_faced', 'minutes', 'clean_sheet'
-    ]
-    
-    season_df = df.groupby(['player_id', 'name', 'team'])[cols_to_sum].sum().reset_index()
-    
-    # Calculate Average Rating
-    avg_rating = df.groupby(['player_id'])['rating'].mean().reset_index(name='avg_rating')
-    season_df = season_df.merge(avg_rating, on='player_id')
-
     out_path = RAW_DIR / 'fotmob_keepers_season.csv'
     season_df.to_csv(out_path, index=False)
     print(f"SUCCESS. Saved keeper stats to: {out_path}")
     print(season_df[['name', 'saves', 'clean_sheet', 'goals_prevented']].head())
 
+# ========================================
+# NAME MATCHING
+# ========================================
+NAME_MATCH_THRESHOLD = 85
+# resolved names are cached per FotMob player_id across runs (see format/name_cache.py):
+# "incremental" only matches new/changed players, "refresh" re-matches everyone, "off" skips the cache
+NAME_CACHE_MODE = os.getenv("NAME_CACHE_MODE", "incremental")
+
+# Manual mappings for known mismatches between FotMob and Understat
+MANUAL_MAPPINGS = {
+    # === GOALKEEPERS ===
+    'Alisson Becker': 'Alisson',
+    'Ederson': 'Ederson Moraes',
+    'Andre Onana': 'André Onana',
+    'Kepa Arrizabalaga': 'Kepa',
+    
+    # === COMMON ABBREVIATED NAMES ===
+    'Amad': 'Amad Diallo',
+    'Savinho': 'Savinho',
+    'Andre': 'André',
+    
+    # === NAME VARIATIONS ===
+    'Edward Nketiah': 'Eddie Nketiah',
+    'Emile Smith Rowe': 'Emile Smith-Rowe',
+    
+    # === HIGH-MINUTE PLAYERS (500+ minutes) ===
+    'Ezri Konsa': 'Ezri Konsa Ngoyo',
+    'Florentino': 'Florentino Luís',
+    'Malick Diouf': 'El Hadji Malick Diouf',
+    'Kristoffer Vassbakk Ajer': 'Kristoffer Ajer',
+    'Idrissa Gana Gueye': 'Idrissa Gueye',
+    'Toti Gomes': 'Toti',
+    'Rayan Cherki': 'Rayan Ait Nouri',
+    'Destiny Udogie': 'Iyenoma Destiny Udogie',
+    'Victor Nilsson Lindelöf': 'Victor Lindelöf',
+    'Estevao': 'Estêvão',
+    'Matty Cash': 'Matthew Cash',
+    'Igor Thiago': 'Thiago',
+    'Lesley Ugochukwu': 'Chimuanya Ugochukwu',
+    'Daniel Burn': 'Dan Burn',
+    'Alex Jimenez': 'Alejandro Jiménez',
+    
+    # === DUTCH PLAYERS (van/van de particles) ===
+    'Virgil van Dijk': 'Virgil van Dijk',
+    'Micky van de Ven': 'Micky van de Ven',
+    'Nathan Aké': 'Nathan Ake',
+    'Matthijs de Ligt': 'Matthijs de Ligt',
+    'Jurriën Timber': 'Jurrien Timber',
+    
+    # === BRAZILIAN PLAYERS (Single names / Accents) ===
+    'Gabriel Magalhães': 'Gabriel Magalhaes',
+    'Gabriel': 'Gabriel Magalhaes',  # Arsenal defender often listed as just "Gabriel"
+}
+
+
 def match_player_names():
     """
     Fuzzy match player names between Understat and FotMob datasets
@@ -363,56 +290,12 @@ def match_player_names():
     """
     from format.name_matcher import match_and_save
     
-    # Manual mappings for known mismatches between FotMob and Understat
-    manual_mappings = {
-        # === GOALKEEPERS ===
-        'Alisson Becker': 'Alisson',
-        'Ederson': 'Ederson Moraes',
-        'Andre Onana': 'André Onana',
-        'Kepa Arrizabalaga': 'Kepa',
-        
-        # === COMMON ABBREVIATED NAMES ===
-        'Amad': 'Amad Diallo',
-        'Savinho': 'Savinho',
-        'Andre': 'André',
-        
-        # === NAME VARIATIONS ===
-        'Edward Nketiah': 'Eddie Nketiah',
-        'Emile Smith Rowe': 'Emile Smith-Rowe',
-        
-        # === HIGH-MINUTE PLAYERS (500+ minutes) ===
-        'Ezri Konsa': 'Ezri Konsa Ngoyo',
-        'Florentino': 'Florentino Luís',
-        'Malick Diouf': 'El Hadji Malick Diouf',
-        'Kristoffer Vassbakk Ajer': 'Kristoffer Ajer',
-        'Idrissa Gana Gueye': 'Idrissa Gueye',
-        'Toti Gomes': 'Toti',
-        'Rayan Cherki': 'Rayan Ait Nouri',
-        'Destiny Udogie': 'Iyenoma Destiny Udogie',
-        'Victor Nilsson Lindelöf': 'Victor Lindelöf',
-        'Estevao': 'Estêvão',
-        'Matty Cash': 'Matthew Cash',
-        'Igor Thiago': 'Thiago',
-        'Lesley Ugochukwu': 'Chimuanya Ugochukwu',
-        'Daniel Burn': 'Dan Burn',
-        'Alex Jimenez': 'Alejandro Jiménez',
-        
-        # === DUTCH PLAYERS (van/van de particles) ===
-        'Virgil van Dijk': 'Virgil van Dijk',
-        'Micky van de Ven': 'Micky van de Ven',
-        'Nathan Aké': 'Nathan Ake',
-        'Matthijs de Ligt': 'Matthijs de Ligt',
-        'Jurriën Timber': 'Jurrien Timber',
-        
-        # === BRAZILIAN PLAYERS (Single names / Accents) ===
-        'Gabriel Magalhães': 'Gabriel Magalhaes',
-        'Gabriel': 'Gabriel Magalhaes',  # Arsenal defender often listed as just "Gabriel"
-    }
-    
     print("="*60)
     print("RUNNING FUZZY NAME MATCHING")
     print("="*60)
-    match_and_save(RAW_DIR, threshold=85, manual_mappings=manual_mappings, dry_run=False)
+    match_and_save(RAW_DIR, threshold=NAME_MATCH_THRESHOLD, manual_mappings=MANUAL_MAPPINGS, dry_run=False,
+                   cache_dir=None if NAME_CACHE_MODE == "off" else CACHE_DIR / 'names',
+                   refresh_cache=(NAME_CACHE_MODE == "refresh"))
 
 def format_data():
     """
@@ -428,43 +311,10 @@ def format_data():
 def get_table():
     print("--- STARTING FOTMOB LEAGUE TABLE SCRAPER ---")
     
-    print("Fetching league table from FotMob API...")
-    
-    league_url = "https://www.fotmob.com/api/leagues?id=47"
-    r = requests.get(league_url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
-    league_data = r.json()
-    
-    table_data = []
+    print("Reading league table from the league snapshot...")
     
     try:
-        table_list = league_data.get('table', [])
-        if table_list and len(table_list) > 0:
-            all_teams = table_list[0].get('data', {}).get('table', {}).get('all', [])
-        else:
-            all_teams = []
-        
-        for team in all_teams:
-            scores_str = team.get('scoresStr', '0-0')
-            if '-' in scores_str:
-                parts = scores_str.split('-')
-                gf = int(parts[0])
-                ga = int(parts[1])
-            else:
-                gf = 0
-                ga = 0
-            
-            row = {
-                'team': team.get('name'),
-                'MP': team.get('played', 0),
-                'W': team.get('wins', 0),
-                'D': team.get('draws', 0),
-                'L': team.get('losses', 0),
-                'GF': gf,
-                'GA': ga,
-                'GD': team.get('goalConDiff', 0),
-                'Pts': team.get('pts', 0)
-            }
-            table_data.append(row)
+        table_data = get_league_snapshot().table_rows()
         
         df = pd.DataFrame(table_data)
         
@@ -489,44 +339,110 @@ def push_to_database():
     push_to_db.push_all_tables()
 
 
+# ========================================
+# STAGES
+# ========================================
+LEAGUE_PAYLOAD = CACHE_DIR / 'league' / 'league_47.json.gz'
+
+UNDERSTAT_PLAYERS = RAW_DIR / 'understat_players.csv'
+UNDERSTAT_OFFENSIVE = RAW_DIR / 'understat_offensive.csv'
+UNDERSTAT_PASSING = RAW_DIR / 'understat_passing.csv'
+FOTMOB_DEFENSE = RAW_DIR / 'fotmob_defense_season_final.csv'
+FOTMOB_KEEPERS = RAW_DIR / 'fotmob_keepers_season.csv'
+MATCHED_DEFENSE = RAW_DIR / 'fotmob_defense_season_matched.csv'
+MATCHED_KEEPERS = RAW_DIR / 'fotmob_keepers_season_matched.csv'
+NAME_MAPPINGS = RAW_DIR / 'name_mappings.csv'
+PLAYER_IDENTITIES = RAW_DIR / 'player_identities.csv'
+FORMATTED_TABLES = [FORMATTED_DIR / f"{table}.csv" for table in ('players', 'defensive', 'offensive', 'keepers')]
+LEAGUE_TABLE = FORMATTED_DIR / 'league_table.csv'
+
+
+def build_stages(resume=False):
+    """
+    The pipeline as a DAG (see dag.py) - dependencies come from the files each
+    stage reads and writes, so Understat and the FotMob branch run side by side
+    """
+    from dag import Stage
+
+    return [
+        Stage('understat', get_understat_metrics,
+              outputs=[UNDERSTAT_OFFENSIVE, UNDERSTAT_PASSING, UNDERSTAT_PLAYERS]),
+        Stage('league', get_league,
+              outputs=[LEAGUE_PAYLOAD]),
+        Stage('fotmob', lambda: get_fotmob_stats(resume=resume),
+              inputs=[LEAGUE_PAYLOAD],
+              outputs=[FOTMOB_DEFENSE, FOTMOB_KEEPERS],
+              params={'season': SEASON, 'aggregation': FOTMOB_AGGREGATION, 'cache_mode': FOTMOB_CACHE_MODE}),
+        Stage('table', get_table,
+              inputs=[LEAGUE_PAYLOAD],
+              outputs=[LEAGUE_TABLE]),
+        Stage('match_names', match_player_names,
+              inputs=[UNDERSTAT_PLAYERS, FOTMOB_DEFENSE, FOTMOB_KEEPERS],
+              outputs=[PLAYER_IDENTITIES, MATCHED_DEFENSE, MATCHED_KEEPERS, NAME_MAPPINGS],
+              params={'threshold': NAME_MATCH_THRESHOLD, 'manual_mappings': MANUAL_MAPPINGS,
+                      'name_cache': NAME_CACHE_MODE}),
+        Stage('format', format_data,
+              inputs=[UNDERSTAT_PLAYERS, UNDERSTAT_OFFENSIVE, FOTMOB_DEFENSE, FOTMOB_KEEPERS, PLAYER_IDENTITIES],
+              outputs=FORMATTED_TABLES),
+        Stage('push', push_to_database,
+              inputs=FORMATTED_TABLES + [LEAGUE_TABLE]),
+    ]
+
+
 if __name__=="__main__":
+    import argparse
+    import sys
+    from dag import StageRunner
+    from telemetry import RunTelemetry
+
+    stage_names = [stage.name for stage in build_stages()]
+    parser = argparse.ArgumentParser(description="Premier League data pipeline")
+    parser.add_argument('--only', nargs='+', metavar='STAGE', choices=stage_names,
+                        help="run just these stages (their inputs must already exist)")
+    parser.add_argument('--from', dest='start', metavar='STAGE', choices=stage_names,
+                        help="run this stage and everything downstream of it")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="show which stages would run or be skipped, then exit")
+    parser.add_argument('--force', action='store_true',
+                        help="run every selected stage even if its inputs haven't changed")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue an interrupted FotMob harvest from its last checkpoint")
+    parser.add_argument('--profile', action='store_true', default=PIPELINE_PROFILE,
+                        help="profile each stage (cProfile + tracemalloc); stages run one at a time")
+    args = parser.parse_args()
+
+    telemetry = RunTelemetry(REPORT_DIR, config={
+        'season': SEASON,
+        'argv': sys.argv[1:],
+        'profiled': args.profile,
+        **{key: value for key, value in os.environ.items() if key.startswith(('FOTMOB_', 'HTTP_'))},
+    })
+    profiler = None
+    if args.profile:
+        from profiling import StageProfiler
+        profiler = StageProfiler(REPORT_DIR / f"profile-{telemetry.run_id}")
+    runner = StageRunner(build_stages(resume=args.resume), CACHE_DIR / 'stages', base_dir=SCRIPT_DIR,
+                         max_workers=1 if profiler else 4, telemetry=telemetry, profiler=profiler)
+
+    if args.dry_run:
+        for name, action, reason in runner.plan(only=args.only, start=args.start, force=args.force):
+            print(f"  {name:12} {action:5} {reason}")
+        sys.exit(0)
 
     print("="*80)
     print("PREMIER LEAGUE DATA PIPELINE")
     print("="*80)
-    
-    # Step 1: Scrape data from sources
-    print("\n" + "="*80)
-    print("STEP 1: SCRAPING DATA FROM SOURCES")
-    print("="*80)
-    get_understat_metrics()
-    get_defensive_stats()
-    get_keeper_stats()
-    
-    # Step 2: Match player names between sources (FUZZY MATCHING)
-    print("\n" + "="*80)
-    print("STEP 2: MATCHING PLAYER NAMES")
-    print("="*80)
-    match_player_names()
-    
-    # Step 3: Format data for production (uses FotMob names for matched players)
-    print("\n" + "="*80)
-    print("STEP 3: FORMATTING DATA FOR PRODUCTION")
-    print("="*80)
-    format_data()
-    
-    print("STEP 4: GETTING PREMIER LEAGUE TABLE")
-    get_table()
 
-    # Step 4: Push to Supabase database
-    print("\n" + "="*80)
-    print("STEP 5: PUSHING TO SUPABASE DATABASE")
-    print("="*80)
-    push_to_database()
-    
+    try:
+        results = runner.run(only=args.only, start=args.start, force=args.force)
+    finally:
+        report_path = telemetry.write()
+
     print("\n" + "="*80)
-    print("PIPELINE COMPLETE!")
+    print("PIPELINE COMPLETE!" if 'failed' not in results.values() else "PIPELINE FINISHED WITH ERRORS")
     print("="*80)
+    for name, result in results.items():
+        print(f"  {name:12} {result}")
     print("\nOutput files:")
     print("  - pipeline/data/formatted/players.csv")
     print("  - pipeline/data/formatted/defensive.csv")
@@ -537,3 +453,9 @@ if __name__=="__main__":
     print("  - defensive")
     print("  - offensive")
     print("  - keepers")
+    print(f"\nRun report: {report_path}")
+    if profiler is not None:
+        print(f"Profiles: {profiler.out_dir}")
+
+    if 'failed' in results.values():
+        sys.exit(1)
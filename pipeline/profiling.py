@@ -0,0 +1,93 @@
+"""
+Stage Profiling
+Opt-in cProfile + tracemalloc around each pipeline stage, for when a run gets
+slow and the telemetry report (telemetry.py) says which stage but not why
+
+Turned on with `python pipeline/main.py --profile` or PIPELINE_PROFILE=1.
+Per stage it writes, into data/reports/profile-<run>/:
+    <stage>.prof        cProfile stats (snakeviz / `python -m pstats`)
+    <stage>.txt         top functions by cumulative time + top allocation sites
+
+When profiling is off nothing here is imported or wrapped. When it's on the
+stages run one at a time - cProfile only sees the thread that enabled it and
+tracemalloc is process-wide, so overlapping stages would blur each other.
+The harvest's download threads and parse worker processes aren't profiled
+(with the default FOTMOB_PARSE_WORKERS=0 the parsing runs in the stage
+thread, so it is). Both tools slow the stage down - the telemetry numbers
+of a profiled run aren't comparable with a normal one.
+"""
+import cProfile
+import io
+import os
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+
+PROFILE_TOP = int(os.getenv("PIPELINE_PROFILE_TOP", "25"))  # rows in each summary
+TRACE_FRAMES = int(os.getenv("PIPELINE_PROFILE_FRAMES", "1"))  # traceback depth kept per allocation
+
+
+def _top_allocations(snapshot, top):
+    # the profiler's own bookkeeping isn't interesting
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, cProfile.__file__),
+        tracemalloc.Filter(False, __file__),
+    ])
+    return snapshot.statistics('lineno')[:top]
+
+
+class StageProfiler:
+    """
+    Parameters:
+    -----------
+    out_dir : Path
+        Where the .prof files and summaries go
+    top : int
+        Functions / allocation sites listed in each summary
+    frames : int
+        Frames tracemalloc keeps per allocation (more = slower, but shows callers)
+    """
+    def __init__(self, out_dir, top=PROFILE_TOP, frames=TRACE_FRAMES):
+        self.out_dir = Path(out_dir)
+        self.top = top
+        self.frames = frames
+
+    @contextmanager
+    def profile(self, name):
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+
+        # traced per stage, so the snapshot only holds what this stage allocated
+        tracemalloc.start(self.frames)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            self._write(name, profiler, snapshot, current, peak)
+
+    def _write(self, name, profiler, snapshot, current, peak):
+        prof_path = self.out_dir / f"{name}.prof"
+        profiler.dump_stats(prof_path)
+
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(self.top)
+
+        lines = [
+            f"STAGE: {name}",
+            f"traced memory: peak {peak / 1e6:.1f} MB during the stage, {current / 1e6:.1f} MB still held at the end",
+            "",
+            f"--- top {self.top} allocation sites still held at the end of the stage ---",
+        ]
+        for stat in _top_allocations(snapshot, self.top):
+            lines.append(f"{stat.size / 1e6:9.2f} MB {stat.count:9d} blocks  {stat.traceback}")
+
+        lines += ["", f"--- top {self.top} functions by cumulative time ---", out.getvalue()]
+        (self.out_dir / f"{name}.txt").write_text("\n".join(lines))
+        print(f"> Profile for stage '{name}' written to {prof_path}")
@@ -9,6 +9,8 @@ from dotenv import load_dotenv
 from sqlalchemy import create_engine, text
 import logging
 
+from telemetry import watch_engine
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -29,14 +31,14 @@ if not database_url:
 
 
 def get_engine():
-    """Create SQLAlchemy engine from database_url"""
+    """Create SQLAlchemy engine from database_url (statements are counted for the run report)"""
     logger.info("Connecting to Supabase database...")
     try:
         engine = create_engine(database_url)
-        return engine
+        return watch_engine(engine)
     except Exception:
         print("Standard URL parsing failed. Cleaning URL")
-        return create_engine(database_url.replace(" ", "")) 
+        return watch_engine(create_engine(database_url.replace(" ", "")))
 
 
 def get_existing_columns(engine, table_name):
@@ -0,0 +1 @@
+# Scrape module for Premier Metrics pipeline
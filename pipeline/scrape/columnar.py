@@ -0,0 +1,206 @@
+"""
+Columnar Row Accumulator
+Collects the per-match player rows straight into typed numpy columns instead
+of keeping one dict per player per match, then hands pandas a DataFrame built
+on those arrays
+
+Column kinds:
+    'id'       int64 (nullable - a missing id becomes <NA>)
+    'count'    int32
+    'float'    float64
+    'category' interned strings, stored as int32 codes -> pd.Categorical
+"""
+import numpy as np
+import pandas as pd
+
+from .stats import KEEPER_STATS, OUTFIELD_STATS
+
+
+IDENT_SCHEMA = [
+    ('game_id', 'id'),
+    ('player_id', 'id'),
+    ('name', 'category'),
+    ('team', 'category'),
+]
+
+
+def schema_from_mapping(mapping, extra=()):
+    """
+    Build a schema (list of (column, kind)) from a stats mapping: int casts
+    become counts, everything else floats
+    """
+    schema = list(IDENT_SCHEMA)
+    for column, (_, _, cast) in mapping.items():
+        schema.append((column, 'count' if cast is int else 'float'))
+    return schema + list(extra)
+
+
+OUTFIELD_SCHEMA = schema_from_mapping(OUTFIELD_STATS)
+KEEPER_SCHEMA = schema_from_mapping(KEEPER_STATS, extra=[('clean_sheet', 'count')])
+
+_DTYPES = {'id': np.int64, 'count': np.int32, 'float': np.float64, 'category': np.int32}
+
+
+class ColumnarRows:
+    """
+    Append-only typed table. append() takes the same row dicts the harvester
+    builds, so it can stand in for a plain list.
+
+    Parameters:
+    -----------
+    schema : list of (column, kind)
+        Column order and kinds (see module docstring)
+    capacity : int
+        Rows preallocated up front, grown by doubling
+    """
+    def __init__(self, schema, capacity=1024):
+        self.schema = list(schema)
+        self.columns = [column for column, _ in self.schema]
+        self._n = 0
+        self._capacity = max(int(capacity), 1)
+        self._arrays = {column: np.empty(self._capacity, dtype=_DTYPES[kind]) for column, kind in self.schema}
+        # ids are nullable - the mask is only allocated once a None shows up
+        self._missing = {}
+        # per category column: string -> code, in first-seen order
+        self._codes = {column: {} for column, kind in self.schema if kind == 'category'}
+        self._writers = [(column, kind, self._arrays[column]) for column, kind in self.schema]
+
+    def __len__(self):
+        return self._n
+
+    def _grow(self):
+        self._capacity *= 2
+        for column in self._arrays:
+            self._arrays[column] = np.resize(self._arrays[column], self._capacity)
+        for column, mask in self._missing.items():
+            grown = np.zeros(self._capacity, dtype=bool)
+            grown[:len(mask)] = mask
+            self._missing[column] = grown
+        self._writers = [(column, kind, self._arrays[column]) for column, kind in self.schema]
+
+    def _mark_missing(self, column, i):
+        if column not in self._missing:
+            self._missing[column] = np.zeros(self._capacity, dtype=bool)
+        self._missing[column][i] = True
+
+    def append(self, row):
+        if self._n == self._capacity:
+            self._grow()
+        i = self._n
+        for column, kind, array in self._writers:
+            value = row[column]
+            if kind == 'category':
+                if value is None:
+                    array[i] = -1
+                else:
+                    codes = self._codes[column]
+                    code = codes.get(value)
+                    if code is None:
+                        code = codes[value] = len(codes)
+                    array[i] = code
+            elif kind == 'id' and value is None:
+                array[i] = 0
+                self._mark_missing(column, i)
+            else:
+                array[i] = value
+        # only count the row once every column is written
+        self._n = i + 1
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def extend_table(self, other):
+        """
+        Append every row of another ColumnarRows with the same schema
+        (e.g. one built in a parse worker), remapping its category codes
+        """
+        n = len(other)
+        while self._n + n > self._capacity:
+            self._grow()
+        lo, hi = self._n, self._n + n
+
+        for column, kind in self.schema:
+            values = other._arrays[column][:n]
+            if kind == 'category':
+                codes = self._codes[column]
+                remap = np.empty(len(other._codes[column]) + 1, dtype=np.int32)
+                for label, code in other._codes[column].items():
+                    mine = codes.get(label)
+                    if mine is None:
+                        mine = codes[label] = len(codes)
+                    remap[code] = mine
+                remap[-1] = -1
+                values = remap[values]
+            self._arrays[column][lo:hi] = values
+
+        for column, mask in other._missing.items():
+            if column not in self._missing:
+                self._missing[column] = np.zeros(self._capacity, dtype=bool)
+            self._missing[column][lo:hi] = mask[:n]
+        self._n = hi
+
+    # only the filled part of the arrays is pickled (rows sent back from a worker process)
+    def __getstate__(self):
+        n = self._n
+        return {
+            'schema': self.schema,
+            'arrays': {column: array[:n].copy() for column, array in self._arrays.items()},
+            'missing': {column: mask[:n].copy() for column, mask in self._missing.items()},
+            'codes': self._codes,
+        }
+
+    def __setstate__(self, state):
+        self.schema = state['schema']
+        self.columns = [column for column, _ in self.schema]
+        self._n = len(next(iter(state['arrays'].values()))) if state['arrays'] else 0
+        self._capacity = max(self._n, 1)
+        self._arrays = state['arrays']
+        self._missing = state['missing']
+        self._codes = state['codes']
+        if self._n == 0:
+            self._arrays = {column: np.empty(1, dtype=_DTYPES[kind]) for column, kind in self.schema}
+            self._missing = {}
+        self._writers = [(column, kind, self._arrays[column]) for column, kind in self.schema]
+
+    def to_frame(self):
+        """
+        DataFrame over the filled part of the arrays (views, not copies -
+        except categories, whose codes are remapped so the categories come
+        out sorted and groupby orders them like plain strings)
+        """
+        n = self._n
+        data = {}
+        for column, kind in self.schema:
+            values = self._arrays[column][:n]
+            if kind == 'category':
+                labels = list(self._codes[column])
+                order = sorted(range(len(labels)), key=labels.__getitem__)
+                remap = np.empty(len(labels) + 1, dtype=np.int32)
+                remap[order] = np.arange(len(labels), dtype=np.int32)
+                remap[-1] = -1  # code -1 (None) stays missing
+                data[column] = pd.Categorical.from_codes(remap[values], [labels[j] for j in order])
+            elif column in self._missing:
+                data[column] = pd.arrays.IntegerArray(values, self._missing[column][:n])
+            else:
+                data[column] = values
+        return pd.DataFrame(data, columns=self.columns, copy=False)
+
+    def nbytes(self):
+        """
+        Bytes held by the filled columns (+ interned strings)
+        """
+        n = self._n
+        total = sum(self._arrays[column][:n].nbytes for column in self._arrays)
+        total += sum(mask[:n].nbytes for mask in self._missing.values())
+        total += sum(len(s) for codes in self._codes.values() for s in codes)
+        return total
+
+
+def as_frame(rows):
+    """
+    DataFrame from either a ColumnarRows or a list of row dicts
+    """
+    if isinstance(rows, ColumnarRows):
+        return rows.to_frame()
+    return pd.DataFrame(rows)
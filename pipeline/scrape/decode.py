@@ -0,0 +1,80 @@
+"""
+Match Payload Decoding
+matchDetails payloads are big (commentary, shotmap, lineups, momentum...)
+but the harvester only reads content.playerStats. Two decode paths:
+
+- 'full':    decode the whole payload (orjson when installed, json otherwise)
+- 'partial': find the playerStats key in the raw bytes and decode just that
+             subtree, skipping everything else. Falls back to 'full' when the
+             key can't be located unambiguously.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # optional - the stdlib decoder does the same job, slower
+    orjson = None
+
+
+DECODE_MODES = ('partial', 'full')
+
+PLAYER_STATS_KEY = '"playerStats":'
+
+_raw_decode = json.JSONDecoder().raw_decode
+
+
+def loads(body):
+    """
+    Decode a whole JSON document (bytes or str)
+    """
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def player_stats_full(body):
+    data = loads(body)
+
+    # Safe navigation to the playerStats dictionary
+    return data.get('content', {}).get('playerStats')
+
+
+def player_stats_partial(body):
+    """
+    Decode only the value of the "playerStats" key
+
+    The key has to show up exactly once in the payload (inside a JSON string
+    the quotes would be escaped, so a match is always a real object key) -
+    otherwise we can't be sure it's content.playerStats and the whole payload
+    is decoded instead.
+    """
+    text = body.decode() if isinstance(body, bytes) else body
+
+    start = text.find(PLAYER_STATS_KEY)
+    if start == -1 or text.find(PLAYER_STATS_KEY, start + 1) != -1:
+        return player_stats_full(body)
+
+    # raw_decode stops at the end of the subtree, the rest is never parsed
+    offset = start + len(PLAYER_STATS_KEY)
+    while text[offset:offset + 1].isspace():
+        offset += 1
+    value, _ = _raw_decode(text, offset)
+    return value
+
+
+def player_stats(body, mode='partial'):
+    """
+    Returns the content.playerStats tree of a matchDetails payload (None if absent)
+
+    Parameters:
+    -----------
+    body : bytes
+        Raw matchDetails response
+    mode : str
+        'partial' (default) or 'full', see module docstring
+    """
+    if mode == 'partial':
+        return player_stats_partial(body)
+    if mode == 'full':
+        return player_stats_full(body)
+    raise ValueError(f"Unknown decode mode '{mode}' (expected one of {DECODE_MODES})")
@@ -0,0 +1,374 @@
+"""
+Per-Match Fact Store
+Persists the per-match player rows as Parquet (one partition per match) and
+keeps running season totals, so a weekly run only folds in the new matches
+
+Layout:
+    <root>/defense/match_id=<id>.parquet      per-match outfield rows
+    <root>/keepers/match_id=<id>.parquet      per-match goalkeeper rows
+    <root>/totals/defense-<gen>.parquet       running sums per (player_id, name, team)
+    <root>/totals/keepers-<gen>.parquet       same, for the keeper table
+    <root>/totals/keeper_ratings-<gen>.parquet  running rating sum/count per player_id
+    <root>/state.json                         {"generation": n, "ingested": [match ids]}
+    <root>/checkpoint.json                    {"generation": n, "done": [match ids]} (rebuild runs only)
+
+state.json is the commit point: new totals are written under a new generation
+and only become live once state.json is atomically replaced, so a crash mid-run
+never double-counts a match. A FactWriter commits every few matches while it
+streams, so a killed run keeps everything up to its last checkpoint. Runs that
+rebuild the totals can't commit early (the totals only exist at the end), so
+they record the matches whose partitions are already rewritten in
+checkpoint.json instead - a resumed run skips those and rebuilds as usual.
+
+Totals are SeasonTotals state (scrape/season_totals.py), compensation terms
+included, so folding new matches in gives the same numbers as recomputing -
+as long as they're folded in schedule order. A match that comes in late (its
+download failed on an earlier run) makes the writer rebuild instead.
+"""
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from io_utils import atomic_path, atomic_write
+
+from .columnar import as_frame
+from .season_totals import defense_totals, keeper_totals
+
+
+TOTALS_TABLES = ('defense', 'keepers', 'keeper_ratings')
+
+
+# ========================================
+# SEASON AGGREGATION (full recompute)
+# ========================================
+def aggregate_defense(df):
+    """
+    Season totals for the outfield rows - sums every numeric column
+    """
+    totals = defense_totals()
+    totals.add_frame(df)
+    return totals.to_frame()
+
+
+def aggregate_keepers(df):
+    """
+    Season totals for the keeper rows - sums the counting stats and
+    averages the rating per player
+    """
+    totals = keeper_totals()
+    totals.add_frame(df)
+    return totals.to_frame()
+
+
+def _write_parquet(df, path):
+    # categoricals (see scrape/columnar.py) are only an in-memory encoding,
+    # store them as plain strings so every partition reads back the same way
+    categorical = df.select_dtypes('category').columns
+    if len(categorical):
+        df = df.astype({column: df[column].cat.categories.dtype for column in categorical})
+    with atomic_path(path) as tmp:
+        df.to_parquet(tmp, index=False)
+
+
+class FactStore:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.defense_dir = self.root / 'defense'
+        self.keepers_dir = self.root / 'keepers'
+        self.totals_dir = self.root / 'totals'
+        for d in (self.defense_dir, self.keepers_dir, self.totals_dir):
+            d.mkdir(parents=True, exist_ok=True)
+
+        self.state_path = self.root / 'state.json'
+        self.checkpoint_path = self.root / 'checkpoint.json'
+        if self.state_path.exists():
+            self.state = json.loads(self.state_path.read_text())
+        else:
+            self.state = {'generation': 0, 'ingested': []}
+
+    # --- bookkeeping ---
+    def ingested(self):
+        return set(self.state['ingested'])
+
+    def missing(self, game_ids):
+        """
+        Returns the ids from game_ids that haven't been ingested yet (order preserved)
+        """
+        done = self.ingested()
+        return [game_id for game_id in game_ids if game_id not in done]
+
+    def checkpoint_ids(self):
+        """
+        Match ids an interrupted rebuild run already re-extracted ([] if there's
+        no checkpoint, or it's from before the last commit)
+        """
+        if not self.checkpoint_path.exists():
+            return []
+        checkpoint = json.loads(self.checkpoint_path.read_text())
+        if checkpoint.get('generation') != self.state['generation']:
+            return []
+        return checkpoint['done']
+
+    def _write_checkpoint(self, done):
+        data = {'generation': self.state['generation'], 'done': done}
+        atomic_write(self.checkpoint_path, json.dumps(data).encode())
+
+    def _partition(self, table_dir, game_id):
+        return table_dir / f"match_id={game_id}.parquet"
+
+    def _totals_path(self, table, generation):
+        return self.totals_dir / f"{table}-{generation}.parquet"
+
+    def _read_totals(self, table):
+        path = self._totals_path(table, self.state['generation'])
+        return pd.read_parquet(path) if path.exists() else None
+
+    def load_totals(self):
+        """
+        Returns the committed running totals as (defense, keepers) SeasonTotals
+        """
+        defense, keepers = defense_totals(), keeper_totals()
+        defense.load_state(self._read_totals('defense'))
+
+        keeper_state = self._read_totals('keepers')
+        ratings = self._read_totals('keeper_ratings')
+        if ratings is None and keeper_state is not None and 'rating_sum' in keeper_state:
+            # totals written before keeper_ratings existed kept rating_sum/count per key
+            ratings = keeper_state.groupby('player_id')[['rating_sum', 'rating_count']].sum().reset_index()
+        keepers.load_state(keeper_state, ratings)
+        return defense, keepers
+
+    def _commit(self, ingested, defense, keepers):
+        old_gen = self.state['generation']
+        new_gen = old_gen + 1
+
+        defense_state, _ = defense.state_frames()
+        keeper_state, ratings = keepers.state_frames()
+        for table, df in (('defense', defense_state), ('keepers', keeper_state), ('keeper_ratings', ratings)):
+            if df is not None and not df.empty:
+                _write_parquet(df, self._totals_path(table, new_gen))
+
+        new_state = {'generation': new_gen, 'ingested': ingested}
+        atomic_write(self.state_path, json.dumps(new_state).encode())
+        self.state = new_state
+
+        # old generation is no longer referenced
+        for table in TOTALS_TABLES:
+            self._totals_path(table, old_gen).unlink(missing_ok=True)
+
+    # --- writes ---
+    def writer(self, rebuild=False, checkpoint_every=0, resume=(), order=None):
+        """
+        Start an ingest: feed batches with .add() as they're parsed, then .commit()
+        (see FactWriter)
+        """
+        return FactWriter(self, rebuild=rebuild, checkpoint_every=checkpoint_every, resume=resume, order=order)
+
+    def ingest(self, defense_rows, keeper_rows, rebuild=False, order=None):
+        """
+        Persist per-match rows and update the season totals in one go
+        (same as a writer with a single batch - see FactWriter)
+
+        Returns:
+        --------
+        (pd.DataFrame, pd.DataFrame) : (defense season, keeper season), None where there's no data
+        """
+        writer = self.writer(rebuild=rebuild, order=order)
+        writer.add(defense_rows, keeper_rows)
+        return writer.commit()
+
+    # --- reads ---
+    def load_facts(self, table, game_ids=None):
+        """
+        Concatenate the per-match rows of one table ('defense' or 'keepers')
+        """
+        table_dir = self.defense_dir if table == 'defense' else self.keepers_dir
+        if game_ids is None:
+            game_ids = self.state['ingested']
+
+        parts = []
+        for game_id in game_ids:
+            path = self._partition(table_dir, game_id)
+            if path.exists():
+                parts.append(pd.read_parquet(path))
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat(parts, ignore_index=True)
+
+    def iter_facts(self, game_ids=None):
+        """
+        Yields (defense rows, keeper rows) one match at a time
+        """
+        if game_ids is None:
+            game_ids = self.state['ingested']
+        for game_id in game_ids:
+            parts = []
+            for table_dir in (self.defense_dir, self.keepers_dir):
+                path = self._partition(table_dir, game_id)
+                parts.append(pd.read_parquet(path) if path.exists() else None)
+            yield tuple(parts)
+
+
+class FactWriter:
+    """
+    Streams parsed batches into the fact store
+
+    Every batch's per-match partitions are written straight away and its
+    rows folded into the running totals, then dropped - memory stays at one
+    totals entry per player however many matches go through.
+
+    Only matches that produced at least one row count as ingested - a match
+    that failed to download is retried on the next run.
+
+    By default the totals continue from the last committed generation. With
+    rebuild=True they're recomputed at commit time from every stored
+    partition instead, in `order` - pass the league schedule order to get
+    output identical to aggregating a fresh harvest. The writer switches to
+    a rebuild by itself when a match is re-ingested (its old rows are already
+    in the totals) or comes before an already ingested one in `order` (floats
+    summed out of order can be off in the last bit).
+
+    Parameters:
+    -----------
+    store : FactStore
+    rebuild : bool
+        Recompute the totals from the fact store at commit instead of folding
+    checkpoint_every : int
+        Checkpoint after this many matches (0 = only at commit)
+    resume : list
+        Ids from store.checkpoint_ids() - matches an interrupted run already
+        wrote, to be counted as part of this run (implies a rebuild)
+    order : list (optional)
+        Schedule order of the match ids (ids not in it sort last)
+    """
+    def __init__(self, store, rebuild=False, checkpoint_every=0, resume=(), order=None):
+        self.store = store
+        self.rebuild = rebuild or bool(resume)
+        self.checkpoint_every = checkpoint_every
+        self.order = order
+        self._position = {game_id: i for i, game_id in enumerate(order)} if order is not None else {}
+        self.already = store.ingested()
+        # schedule position of the last match folded into the totals
+        self._last_position = max((self._position_of(g) for g in store.state['ingested']), default=-1)
+        self.new_ids = list(resume)
+        self._seen = set(self.new_ids)
+        self._since_checkpoint = 0
+        if not resume:
+            # a fresh run - anything left by an interrupted one is stale
+            store.checkpoint_path.unlink(missing_ok=True)
+        if self.rebuild:
+            # totals are recomputed at commit, nothing to fold into
+            self.defense, self.keepers = None, None
+        else:
+            self.defense, self.keepers = store.load_totals()
+
+    def add(self, defense_rows, keeper_rows):
+        """
+        Persist one batch of per-match rows and fold it into the totals
+
+        Parameters:
+        -----------
+        defense_rows, keeper_rows : ColumnarRows or list of dict
+            Per-match rows from the harvester (must carry 'game_id')
+        """
+        store = self.store
+        defense_df = as_frame(defense_rows)
+        keepers_df = as_frame(keeper_rows)
+
+        batch_ids = []
+        for df in (defense_df, keepers_df):
+            if not df.empty:
+                batch_ids += [int(g) for g in df['game_id'].unique() if int(g) not in batch_ids]
+
+        # (re)write both tables' partitions for every match in this batch
+        for game_id in batch_ids:
+            for table_dir in (store.defense_dir, store.keepers_dir):
+                store._partition(table_dir, game_id).unlink(missing_ok=True)
+        for df, table_dir in ((defense_df, store.defense_dir), (keepers_df, store.keepers_dir)):
+            if df.empty:
+                continue
+            for game_id, part in df.groupby('game_id', sort=False):
+                _write_parquet(part, store._partition(table_dir, int(game_id)))
+
+        for game_id in batch_ids:
+            if game_id not in self._seen:
+                self._seen.add(game_id)
+                self.new_ids.append(game_id)
+            if game_id in self.already:
+                # can't take the old rows back out of the totals
+                self.rebuild = True
+            position = self._position_of(game_id)
+            if position < self._last_position:
+                # folding it in now would sum out of schedule order
+                self.rebuild = True
+            self._last_position = max(self._last_position, position)
+
+        if not self.rebuild:
+            self.defense.add_frame(defense_df)
+            self.keepers.add_frame(keepers_df)
+
+        self._since_checkpoint += len(batch_ids)
+        if self.checkpoint_every and self._since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+
+    def _position_of(self, game_id):
+        return self._position.get(game_id, float('inf')) if self.order is not None else float('inf')
+
+    def _ingested(self):
+        committed = self.store.state['ingested']
+        done = set(committed)
+        return committed + [g for g in self.new_ids if g not in done]
+
+    def checkpoint(self):
+        """
+        Make everything added so far survive a crash: commit it (incremental
+        runs) or record it in checkpoint.json (rebuild runs)
+        """
+        self._since_checkpoint = 0
+        if not self.new_ids:
+            return
+        if self.rebuild:
+            self.store._write_checkpoint(self.new_ids)
+        else:
+            self.store._commit(self._ingested(), self.defense, self.keepers)
+        print(f" > Checkpoint: {len(self.new_ids)} matches saved")
+
+    def commit(self, order=None):
+        """
+        Commit the new generation and return the season tables
+
+        Parameters:
+        -----------
+        order : list (optional)
+            Match id order used for a rebuild (defaults to the writer's
+            order, then ingestion order)
+
+        Returns:
+        --------
+        (pd.DataFrame, pd.DataFrame) : (defense season, keeper season), None where there's no data
+        """
+        store = self.store
+        ingested = self._ingested()
+
+        if order is None:
+            order = self.order
+        if self.rebuild:
+            done = set(ingested)
+            order = [g for g in (order if order is not None else ingested) if g in done]
+            # anything ingested but not in the given order goes last
+            in_order = set(order)
+            order += [g for g in ingested if g not in in_order]
+
+            self.defense, self.keepers = defense_totals(), keeper_totals()
+            for defense_df, keepers_df in store.iter_facts(order):
+                self.defense.add_frame(defense_df)
+                self.keepers.add_frame(keepers_df)
+            store._commit(order, self.defense, self.keepers)
+        elif self.new_ids:
+            store._commit(ingested, self.defense, self.keepers)
+        store.checkpoint_path.unlink(missing_ok=True)
+
+        defense_season = self.defense.to_frame() if len(self.defense) else None
+        keeper_season = self.keepers.to_frame() if len(self.keepers) else None
+        return defense_season, keeper_season
@@ -0,0 +1,73 @@
+"""
+Concurrent Fetcher
+asyncio engine that downloads a list of URLs with bounded parallelism
+and hands the responses back in the same order the URLs were given
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from .http_client import get_client
+
+
+def get_bytes(url, timeout):
+    """
+    Default fetch function: blocking GET (with retries) on the shared client,
+    returning the raw response body
+    """
+    return get_client().get(url, timeout=timeout).content
+
+
+async def _fetch_ordered(urls, handle, concurrency, timeout, fetch, deadline):
+    loop = asyncio.get_running_loop()
+    sem = asyncio.Semaphore(concurrency)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+
+        async def fetch_one(url):
+            # the semaphore gates the request so the timeout below only
+            # measures the round-trip, not time spent queued behind others
+            async with sem:
+                try:
+                    # requests' timeout is per socket read, so a slow trickle
+                    # can outlive it - wait_for gives an optional hard cap
+                    body = await asyncio.wait_for(
+                        loop.run_in_executor(pool, fetch, url, timeout),
+                        deadline
+                    )
+                    return body, None
+                except Exception as e:
+                    return None, e
+
+        tasks = [asyncio.ensure_future(fetch_one(url)) for url in urls]
+
+        # deliver in input order - later responses that finish early just
+        # wait in their task until everything before them has been handled
+        for i, task in enumerate(tasks):
+            body, error = await task
+            handle(i, body, error)
+
+
+def fetch_ordered(urls, handle, concurrency=8, timeout=5, fetch=get_bytes, deadline=None):
+    """
+    Fetch every URL concurrently and call handle() for each one in input order
+
+    Parameters:
+    -----------
+    urls : list
+        URLs to download
+    handle : callable
+        handle(index, body, error) - body is the raw response bytes (None on
+        failure), error is the exception raised (None on success)
+    concurrency : int
+        Maximum number of requests in flight at once
+    timeout : float
+        Per-attempt timeout in seconds (passed to fetch)
+    fetch : callable
+        fetch(url, timeout) -> bytes, blocking; runs on a worker thread
+    deadline : float (optional)
+        Hard cap in seconds on one fetch() call, retries included
+    """
+    urls = list(urls)
+    if not urls:
+        return
+    asyncio.run(_fetch_ordered(urls, handle, max(1, int(concurrency)), timeout, fetch, deadline))
@@ -0,0 +1,383 @@
+"""
+FotMob Match Harvester
+Fetches every finished match once and hands the parsed playerStats
+to both the outfield (defensive) and goalkeeper extractors
+
+Two stages: the I/O stage (downloads + payload cache) runs in this process,
+the parse stage (decode + row extraction, pure CPU) runs on a process pool
+in batches of matches. Batches are merged back in the order they were
+submitted, so the rows always come out in schedule order.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from . import decode
+from .columnar import KEEPER_SCHEMA, OUTFIELD_SCHEMA, ColumnarRows
+from .fetcher import fetch_ordered
+from .http_client import FOTMOB_BASE_URL
+from .stats import KEEPER_EXTRACTORS, MAPPED_TITLES, OUTFIELD_EXTRACTORS, extract_stats, index_stats
+
+
+MATCH_DETAILS_URL = FOTMOB_BASE_URL + "/api/matchDetails?matchId={game_id}"
+
+
+def flatten_players(player_stats_root, require_stats=False):
+    """
+    Flatten the playerStats root into a list of player dicts
+
+    FotMob ships two shapes:
+    - Format A: keys are player IDs (direct dict of players)
+    - Format B: keys are team IDs (team -> list of players)
+
+    require_stats mirrors the stricter Format A check the defensive
+    harvester has always used ('name' AND 'stats' on the first player)
+    """
+    players_to_process = []
+
+    if isinstance(player_stats_root, dict):
+        first_val = player_stats_root[next(iter(player_stats_root))]
+
+        is_player_map = 'name' in first_val
+        if require_stats:
+            is_player_map = is_player_map and 'stats' in first_val
+
+        # Format A: Keys are Player IDs (Direct list)
+        if is_player_map:
+            players_to_process = list(player_stats_root.values())
+
+        # Format B: Keys are Team IDs (Grouped)
+        elif isinstance(first_val, list):
+            for team_id, p_list in player_stats_root.items():
+                players_to_process.extend(p_list)
+
+    return players_to_process
+
+
+def extract_match_rows(game_id, player_stats_root, outfield_out, keeper_out):
+    """
+    Append one defensive row per player, and one keeper row per goalkeeper,
+    for a single match. Each player's stats are indexed once and both tables
+    are filled from that index (columns come from scrape/stats.py).
+
+    The two tables fail independently: if a row can't be built, that table
+    stops for the rest of this match (the other one carries on). A playerStats
+    tree that can't be flattened, or an entry that isn't a player, stops both.
+
+    Returns:
+    --------
+    list : (table, exception) for every table that failed
+    """
+    try:
+        players = flatten_players(player_stats_root)
+        # the defensive table has always required 'stats' on a Format A player map
+        first_val = next(iter(player_stats_root.values())) if isinstance(player_stats_root, dict) else None
+        outfield_ok = not (isinstance(first_val, dict) and 'name' in first_val and 'stats' not in first_val)
+    except Exception as e:
+        return [('outfield', e), ('keepers', e)]
+    keeper_ok = True
+    errors = []
+
+    for p in players:
+        try:
+            is_keeper = p.get('isGoalkeeper', False)
+        except AttributeError as e:
+            # not a player dict - no telling which table it belonged to
+            errors += [(table, e) for table, ok in (('outfield', outfield_ok), ('keepers', keeper_ok)) if ok]
+            break
+        if not (outfield_ok or (keeper_ok and is_keeper)):
+            continue
+
+        try:
+            index = index_stats(p.get('stats', []), MAPPED_TITLES)
+        except Exception as e:
+            if outfield_ok:
+                outfield_ok = False
+                errors.append(('outfield', e))
+            if keeper_ok and is_keeper:
+                keeper_ok = False
+                errors.append(('keepers', e))
+            continue
+
+        ident = {
+            'game_id': game_id,
+            'player_id': p.get('id'),
+            'name': p.get('name'),
+            'team': p.get('teamName'),
+        }
+
+        if outfield_ok:
+            try:
+                outfield_out.append(extract_stats(index, OUTFIELD_EXTRACTORS, dict(ident)))
+            except Exception as e:
+                outfield_ok = False
+                errors.append(('outfield', e))
+
+        # FotMob flags GKs with 'isGoalkeeper'
+        if keeper_ok and is_keeper:
+            try:
+                row = extract_stats(index, KEEPER_EXTRACTORS, dict(ident))
+                # Manual Clean Sheet Logic (Safest)
+                row['clean_sheet'] = 1 if row['goals_conceded'] == 0 and row['minutes'] > 80 else 0
+                keeper_out.append(row)
+            except Exception as e:
+                keeper_ok = False
+                errors.append(('keepers', e))
+
+    return errors
+
+
+def parse_player_stats(body, mode='partial'):
+    """
+    Decode a matchDetails payload and return its playerStats tree (None if absent)
+
+    mode is 'partial' (only the playerStats subtree is decoded) or 'full',
+    see scrape/decode.py
+    """
+    return decode.player_stats(body, mode)
+
+
+# ========================================
+# PARSE STAGE
+# ========================================
+def parse_batch(batch, decode_mode='partial'):
+    """
+    Decode and extract a batch of matches (runs in a worker process)
+
+    Parameters:
+    -----------
+    batch : list of (game_id, bytes or None)
+        Raw matchDetails payloads, None where the download failed
+    decode_mode : str
+        See parse_player_stats
+
+    Returns:
+    --------
+    (ColumnarRows, ColumnarRows, list) : outfield rows, keeper rows and one
+    (game_id, has_player_stats, messages) per match, in batch order
+    """
+    outfield = ColumnarRows(OUTFIELD_SCHEMA, capacity=32 * len(batch))
+    keepers = ColumnarRows(KEEPER_SCHEMA, capacity=2 * len(batch))
+    matches = []
+
+    for game_id, body in batch:
+        messages = []
+        try:
+            player_stats_root = parse_player_stats(body, decode_mode) if body is not None else None
+        except Exception as e:
+            messages.append(f" x Match {game_id}: could not decode payload ({e})")
+            player_stats_root = None
+
+        if player_stats_root:
+            for table, e in extract_match_rows(game_id, player_stats_root, outfield, keepers):
+                messages.append(f" x Match {game_id}: {table} extraction failed ({e})")
+
+        matches.append((game_id, bool(player_stats_root), messages))
+
+    return outfield, keepers, matches
+
+
+class ParseStage:
+    """
+    Collects payloads into batches, parses them (in-process, or on a process
+    pool when workers > 0) and merges the rows back in submission order
+
+    on_match(game_id, has_player_stats, messages, tag) is called once per
+    match, in the order the matches were submitted. With on_rows, every
+    parsed batch is handed over as on_rows(outfield rows, keeper rows), in
+    order, instead of being kept in memory.
+
+    Parameters:
+    -----------
+    workers : int
+        Parse processes, 0 parses in this process
+    decode_mode : str
+        See parse_player_stats
+    batch_size : int
+        Matches handed to a worker at once
+    capacity : int
+        Expected number of matches (preallocates the row tables)
+    """
+    def __init__(self, workers=0, decode_mode='partial', batch_size=16, capacity=0, on_match=None, on_rows=None):
+        self.decode_mode = decode_mode
+        self.batch_size = max(1, int(batch_size))
+        self.on_match = on_match
+        self.on_rows = on_rows
+        if on_rows is None:
+            self.outfield = ColumnarRows(OUTFIELD_SCHEMA, capacity=32 * capacity)
+            self.keepers = ColumnarRows(KEEPER_SCHEMA, capacity=2 * capacity)
+        else:
+            self.outfield = self.keepers = None
+        self.pool = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+        self._batch = []
+        self._tags = []
+        self._pending = deque()  # (tags, future or result), submission order
+
+    def submit(self, game_id, body, tag=None):
+        self._batch.append((game_id, body))
+        self._tags.append(tag)
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+        self._collect(block=False)
+
+    def _flush(self):
+        if not self._batch:
+            return
+        if self.pool is not None:
+            result = self.pool.submit(parse_batch, self._batch, self.decode_mode)
+        else:
+            result = parse_batch(self._batch, self.decode_mode)
+        self._pending.append((self._tags, result))
+        self._batch, self._tags = [], []
+
+    def _collect(self, block):
+        # only the oldest batch can be merged - later ones wait their turn
+        while self._pending:
+            tags, result = self._pending[0]
+            if self.pool is not None:
+                if not block and not result.done():
+                    return
+                result = result.result()
+            self._pending.popleft()
+
+            outfield, keepers, matches = result
+            if self.on_rows is not None:
+                self.on_rows(outfield, keepers)
+            else:
+                self.outfield.extend_table(outfield)
+                self.keepers.extend_table(keepers)
+            if self.on_match is not None:
+                for (game_id, has_stats, messages), tag in zip(matches, tags):
+                    self.on_match(game_id, has_stats, messages, tag)
+
+    def finish(self):
+        """
+        Parse whatever is left, wait for every batch and return (outfield rows,
+        keeper rows) - (None, None) when the rows went to on_rows
+        """
+        self._flush()
+        self._collect(block=True)
+        self.close()
+        return self.outfield, self.keepers
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+
+# ========================================
+# HARVEST (I/O stage)
+# ========================================
+def harvest_matches(game_ids, concurrency=8, timeout=5, cache=None, refresh=False, decode_mode='partial',
+                    parse_workers=0, parse_batch_size=16, sink=None, save_every=0):
+    """
+    Single pass over the finished matches
+
+    Each matchDetails payload is downloaded and parsed exactly once, then
+    the playerStats tree is handed to both extractors. A failure in one
+    extractor doesn't drop the other extractor's rows for that match.
+    Downloads run concurrently and parsing runs in the parse stage (see
+    ParseStage), but rows always come out in schedule order.
+
+    With a MatchCache, only the matches that aren't cached yet are downloaded
+    (all of them if refresh=True); everything else is read from disk. New
+    payloads that contain playerStats are added to the cache.
+
+    Parameters:
+    -----------
+    game_ids : list
+        FotMob match ids to harvest
+    concurrency : int
+        Maximum number of matchDetails requests in flight
+    timeout : float
+        Per-request timeout in seconds
+    cache : MatchCache (optional)
+        On-disk store of finished match payloads
+    refresh : bool
+        Re-download every match even if it's cached
+    decode_mode : str
+        'partial' decodes only the playerStats subtree, 'full' the whole payload
+    parse_workers : int
+        Processes in the parse stage (0 = parse in this process)
+    parse_batch_size : int
+        Matches handed to a parse worker at once
+    sink : callable (optional)
+        sink(outfield rows, keeper rows), called once per parsed batch in
+        schedule order (e.g. FactWriter.add) instead of keeping every row
+    save_every : int
+        Save the payload cache index every this many matches, so a killed
+        run doesn't have to download them again (0 = only at the end)
+
+    Returns:
+    --------
+    (ColumnarRows, ColumnarRows) : (outfield rows, keeper rows), one row per player per match
+    ((None, None) with a sink)
+    """
+    if cache is None or refresh:
+        to_fetch = list(game_ids)
+    else:
+        to_fetch = cache.missing(game_ids)
+    fetch_positions = {game_id: pos for pos, game_id in enumerate(game_ids)}
+
+    print(f" > {len(game_ids) - len(to_fetch)} matches cached, {len(to_fetch)} to download")
+
+    failed = []
+    parsed = 0
+
+    def on_parsed(game_id, has_player_stats, messages, tag):
+        nonlocal parsed
+        pos, body = tag
+        for message in messages:
+            print(message)
+        # only network payloads are passed back (body is None for cached ones)
+        if has_player_stats and cache is not None and body is not None:
+            cache.put(game_id, body)
+        parsed += 1
+        if cache is not None and save_every and parsed % save_every == 0:
+            cache.save()
+        if pos % 20 == 0:
+            print(f" > Processed {pos}/{len(game_ids)} matches...")
+
+    stage = ParseStage(workers=parse_workers, decode_mode=decode_mode, batch_size=parse_batch_size,
+                       capacity=len(game_ids), on_match=on_parsed, on_rows=sink)
+
+    def process(pos, body, from_network):
+        stage.submit(game_ids[pos], body, tag=(pos, body if from_network else None))
+
+    # cached matches are interleaved with the downloads so everything is
+    # still submitted to the parse stage in schedule order
+    next_pos = 0
+
+    def drain_cached(upto):
+        nonlocal next_pos
+        while next_pos < upto:
+            # a corrupt object comes back as None and is dropped from the
+            # index, so that match is simply re-downloaded on the next run
+            process(next_pos, cache.get(game_ids[next_pos]), from_network=False)
+            next_pos += 1
+
+    def handle(i, body, error):
+        nonlocal next_pos
+        pos = fetch_positions[to_fetch[i]]
+        drain_cached(pos)
+        if error is not None:
+            # retries are already exhausted at this point
+            print(f" x Match {to_fetch[i]}: download failed ({error})")
+            failed.append(to_fetch[i])
+        process(pos, body if error is None else None, from_network=True)
+        next_pos = pos + 1
+
+    urls = [MATCH_DETAILS_URL.format(game_id=game_id) for game_id in to_fetch]
+    try:
+        fetch_ordered(urls, handle, concurrency=concurrency, timeout=timeout)
+        drain_cached(len(game_ids))
+        all_player_stats, all_keepers = stage.finish()
+    finally:
+        stage.close()
+
+    if cache is not None:
+        cache.save()
+    if failed:
+        print(f" > {len(failed)} matches could not be downloaded; they'll be retried next run")
+
+    return all_player_stats, all_keepers
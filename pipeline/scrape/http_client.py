@@ -0,0 +1,146 @@
+"""
+Shared HTTP Client
+One pooled requests session for every scraper call: keep-alive connection
+reuse, gzip/brotli negotiation, jittered exponential backoff on 5xx/429,
+per-host rate limiting and counters for requests, retries and failures
+"""
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+
+
+# defaults (overridable from the environment)
+# base URLs can point at a local replay server (see scrape/replay.py)
+FOTMOB_BASE_URL = os.getenv("FOTMOB_BASE_URL", "https://www.fotmob.com").rstrip("/")
+UNDERSTAT_BASE_URL = os.getenv("UNDERSTAT_BASE_URL", "https://understat.com").rstrip("/")
+
+USER_AGENT = "Mozilla/5.0"
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "4"))
+BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))  # seconds
+BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+RATE_LIMIT = float(os.getenv("HTTP_RATE_LIMIT", "10"))  # requests/second per host, 0 = unlimited
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HttpError(Exception):
+    """
+    Raised when a request fails permanently (non-retryable status or retries exhausted)
+    """
+    def __init__(self, url, message, status=None):
+        super().__init__(f"{message} ({url})")
+        self.url = url
+        self.status = status
+
+
+class HttpClient:
+    def __init__(self, pool_size=POOL_SIZE, max_retries=MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX, rate_limit=RATE_LIMIT):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.min_interval = 1.0 / rate_limit if rate_limit > 0 else 0.0
+
+        self.session = requests.Session()
+        # retries are handled here (so they can be counted), not by urllib3
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # urllib3 advertises br (and zstd) only when the decoder is installed
+        self.session.headers.update(make_headers(accept_encoding=True))
+        self.session.headers["User-Agent"] = USER_AGENT
+
+        self._lock = threading.Lock()
+        self._next_slot = {}  # host -> earliest time the next request may start
+        self.counters = {
+            'requests': 0,
+            'retries': 0,
+            'failures': 0,
+            'bytes_received': 0,
+        }
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.counters[key] += n
+
+    def _wait_for_slot(self, host):
+        if not self.min_interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        # full jitter: anywhere between 0 and the exponential ceiling
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def get(self, url, headers=None, timeout=10):
+        """
+        GET with retries. Returns the requests.Response (any 2xx/3xx status).
+
+        Connection errors, timeouts and 429/5xx responses are retried with
+        jittered exponential backoff (429 honours Retry-After). Anything else
+        >= 400, or running out of retries, raises HttpError.
+        """
+        host = urlparse(url).netloc
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count('retries')
+            self._wait_for_slot(host)
+            self._count('requests')
+
+            retry_after = None
+            try:
+                r = self.session.get(url, headers=headers, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = HttpError(url, f"{type(e).__name__}: {e}")
+            else:
+                self._count('bytes_received', len(r.content))
+                if r.status_code < 400:
+                    return r
+                last_error = HttpError(url, f"HTTP {r.status_code}", status=r.status_code)
+                if r.status_code not in RETRY_STATUSES:
+                    break
+                try:
+                    retry_after = float(r.headers.get('Retry-After', ''))
+                except ValueError:
+                    retry_after = None
+
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt, retry_after))
+
+        self._count('failures')
+        raise last_error
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Returns the process-wide HttpClient (created on first use)
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
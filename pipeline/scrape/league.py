@@ -0,0 +1,120 @@
+"""
+League Snapshot
+The FotMob league payload (fixtures + standings), fetched once per run and
+persisted with its ETag/Last-Modified so later runs can send a conditional
+request and skip the download when nothing changed
+"""
+import gzip
+import json
+from pathlib import Path
+
+from io_utils import atomic_write
+
+from .http_client import FOTMOB_BASE_URL, get_client
+
+
+# Premier League ID on FotMob is 47
+LEAGUE_ID = 47
+LEAGUE_URL = FOTMOB_BASE_URL + "/api/leagues?id={league_id}"
+
+
+class LeagueSnapshot:
+    def __init__(self, data, etag=None, last_modified=None, from_cache=False):
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.from_cache = from_cache
+
+    @classmethod
+    def fetch(cls, cache_dir, league_id=LEAGUE_ID, timeout=10):
+        """
+        Download the league payload, or reuse the persisted copy on a 304
+
+        Parameters:
+        -----------
+        cache_dir : Path
+            Where the payload and its validators are persisted
+        league_id : int
+            FotMob league id
+        timeout : float
+            Per-attempt timeout in seconds
+        """
+        cache_dir = Path(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        body_path = cache_dir / f"league_{league_id}.json.gz"
+        meta_path = cache_dir / f"league_{league_id}.meta.json"
+
+        meta = {}
+        if body_path.exists() and meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+
+        # conditional request - only if we still have the body to fall back on
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+        r = get_client().get(LEAGUE_URL.format(league_id=league_id), headers=headers, timeout=timeout)
+
+        if r.status_code == 304:
+            print(" > League payload unchanged since last run (304), using cached copy")
+            data = json.loads(gzip.decompress(body_path.read_bytes()))
+            return cls(data, meta.get('etag'), meta.get('last_modified'), from_cache=True)
+
+        data = r.json()
+        etag = r.headers.get('ETag')
+        last_modified = r.headers.get('Last-Modified')
+
+        # mtime=0: the same payload has to give the same bytes - the stage DAG hashes this file
+        atomic_write(body_path, gzip.compress(r.content, mtime=0))
+        atomic_write(meta_path, json.dumps({'etag': etag, 'last_modified': last_modified}).encode())
+        return cls(data, etag, last_modified)
+
+    def finished_match_ids(self):
+        """
+        Returns the FotMob ids of every finished league match (schedule order)
+        """
+        game_ids = []
+        matches = self.data.get('fixtures', {}).get('allMatches', [])
+        for match in matches:
+            status = match.get('status', {})
+            # Check if match is finished
+            if status.get('finished', False):
+                if match.get('id'):
+                    game_ids.append(match.get('id'))
+        return game_ids
+
+    def table_rows(self):
+        """
+        Returns the standings as a list of dicts (team, MP, W, D, L, GF, GA, GD, Pts)
+        """
+        table_list = self.data.get('table', [])
+        if table_list and len(table_list) > 0:
+            all_teams = table_list[0].get('data', {}).get('table', {}).get('all', [])
+        else:
+            all_teams = []
+
+        table_data = []
+        for team in all_teams:
+            scores_str = team.get('scoresStr', '0-0')
+            if '-' in scores_str:
+                parts = scores_str.split('-')
+                gf = int(parts[0])
+                ga = int(parts[1])
+            else:
+                gf = 0
+                ga = 0
+
+            table_data.append({
+                'team': team.get('name'),
+                'MP': team.get('played', 0),
+                'W': team.get('wins', 0),
+                'D': team.get('draws', 0),
+                'L': team.get('losses', 0),
+                'GF': gf,
+                'GA': ga,
+                'GD': team.get('goalConDiff', 0),
+                'Pts': team.get('pts', 0)
+            })
+        return table_data
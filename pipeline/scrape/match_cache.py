@@ -0,0 +1,87 @@
+"""
+Match Payload Cache
+Content-addressed on-disk store of finished FotMob matchDetails payloads
+
+A finished match never changes, so once we have its payload there's no reason
+to download it again. Payloads are gzip-compressed and stored by the sha256 of
+their raw bytes; index.json maps each match id to its object hash.
+
+Layout:
+    <root>/index.json                      {"<match_id>": "<sha256>", ...}
+    <root>/objects/<sha[:2]>/<sha>.json.gz
+"""
+import gzip
+import hashlib
+import json
+from pathlib import Path
+
+from io_utils import atomic_write
+
+
+class MatchCache:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.objects_dir = self.root / 'objects'
+        self.index_path = self.root / 'index.json'
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+
+        if self.index_path.exists():
+            self.index = json.loads(self.index_path.read_text())
+        else:
+            self.index = {}
+        self._dirty = False
+
+    def __contains__(self, game_id):
+        return str(game_id) in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def _object_path(self, digest):
+        return self.objects_dir / digest[:2] / f"{digest}.json.gz"
+
+    def missing(self, game_ids):
+        """
+        Returns the ids from game_ids that aren't cached yet (order preserved)
+        """
+        return [game_id for game_id in game_ids if str(game_id) not in self.index]
+
+    def get(self, game_id):
+        """
+        Returns the raw payload bytes for a match, or None if not cached
+        (or if the stored object is missing/corrupt)
+        """
+        digest = self.index.get(str(game_id))
+        if digest is None:
+            return None
+        try:
+            body = gzip.decompress(self._object_path(digest).read_bytes())
+        except (OSError, EOFError):
+            body = None
+        if body is None or hashlib.sha256(body).hexdigest() != digest:
+            # drop the bad entry so the match gets re-fetched
+            del self.index[str(game_id)]
+            self._dirty = True
+            return None
+        return body
+
+    def put(self, game_id, body):
+        """
+        Store the raw payload bytes for a finished match
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(path, gzip.compress(body, compresslevel=6))
+        if self.index.get(str(game_id)) != digest:
+            self.index[str(game_id)] = digest
+            self._dirty = True
+
+    def save(self):
+        """
+        Persist the match id -> object index (no-op if nothing changed)
+        """
+        if self._dirty:
+            atomic_write(self.index_path, json.dumps(self.index, sort_keys=True).encode())
+            self._dirty = False
@@ -0,0 +1,327 @@
+"""
+Record & Replay
+Capture the FotMob and Understat responses the pipeline uses into a fixture
+bundle, then serve that bundle from a local HTTP stand-in so the scrapers can
+be run (and benchmarked) offline
+
+Both sources live under one server, one path prefix each:
+    http://127.0.0.1:<port>/fotmob/...     -> https://www.fotmob.com/...
+    http://127.0.0.1:<port>/understat/...  -> https://understat.com/...
+Point the scrapers at it with FOTMOB_BASE_URL / UNDERSTAT_BASE_URL.
+
+Bundle layout:
+    <bundle>/manifest.json        {"<prefix>/<path>?<query>": {"status", "content_type", "body"}}
+    <bundle>/bodies/<sha256>.gz
+
+Usage (from pipeline/):
+    python -m scrape.replay record <bundle> [--season 2025]
+    python -m scrape.replay serve <bundle> [--port 8765] [--latency 0.05] [--error-rate 0.02]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+from io_utils import atomic_write
+
+
+UPSTREAMS = {
+    'fotmob': "https://www.fotmob.com",
+    'understat': "https://understat.com",
+}
+
+# request headers worth passing upstream when recording (Understat's API
+# checks X-Requested-With/Referer and the homepage cookie)
+FORWARD_HEADERS = ('User-Agent', 'Accept', 'X-Requested-With', 'Referer', 'Cookie',
+                   'If-None-Match', 'If-Modified-Since')
+
+
+class Bundle:
+    """
+    A recorded set of responses, keyed by '<prefix>/<path>?<query>'
+    """
+    def __init__(self, root):
+        self.root = Path(root)
+        self.bodies_dir = self.root / 'bodies'
+        self.manifest_path = self.root / 'manifest.json'
+        self.entries = {}
+        if self.manifest_path.exists():
+            self.entries = json.loads(self.manifest_path.read_text())
+        self._lock = threading.Lock()
+        self._bodies = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def keys(self, prefix=''):
+        return [key for key in self.entries if key.startswith(prefix)]
+
+    def put(self, key, status, content_type, body):
+        digest = hashlib.sha256(body).hexdigest()
+        self.bodies_dir.mkdir(parents=True, exist_ok=True)
+        path = self.bodies_dir / f"{digest}.gz"
+        if not path.exists():
+            atomic_write(path, gzip.compress(body))
+        with self._lock:
+            self.entries[key] = {'status': status, 'content_type': content_type, 'body': digest}
+
+    def get(self, key):
+        """
+        Returns (status, content_type, body bytes) or None if the key wasn't recorded
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        with self._lock:
+            body = self._bodies.get(entry['body'])
+        if body is None:
+            body = gzip.decompress((self.bodies_dir / f"{entry['body']}.gz").read_bytes())
+            with self._lock:
+                self._bodies[entry['body']] = body
+        return entry['status'], entry['content_type'], body
+
+    def save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            data = json.dumps(self.entries, indent=1, sort_keys=True).encode()
+        atomic_write(self.manifest_path, data)
+
+
+class _Server:
+    """
+    Background ThreadingHTTPServer shared by the recorder and the replayer
+    """
+    def __init__(self, handler_cls, port=0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler_cls)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    @property
+    def fotmob_url(self):
+        return f"{self.base_url}/fotmob"
+
+    @property
+    def understat_url(self):
+        return f"{self.base_url}/understat"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class RecordingProxy(_Server):
+    """
+    Forwards /<prefix>/... to the real upstream and records every response
+    """
+    def __init__(self, bundle, port=0):
+        self.bundle = bundle
+        session = requests.Session()
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                prefix, _, rest = self.path.lstrip('/').partition('/')
+                upstream = UPSTREAMS.get(prefix)
+                if upstream is None:
+                    self.send_error(404, "unknown upstream")
+                    return
+
+                headers = {h: self.headers[h] for h in FORWARD_HEADERS if self.headers.get(h)}
+                r = session.get(f"{upstream}/{rest}", headers=headers, timeout=30)
+                content_type = r.headers.get('Content-Type', 'application/json')
+                if r.status_code < 400:
+                    proxy.bundle.put(f"{prefix}/{rest}", r.status_code, content_type, r.content)
+
+                self.send_response(r.status_code)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(r.content)))
+                for cookie in r.raw.headers.getlist('Set-Cookie'):
+                    self.send_header("Set-Cookie", cookie)
+                self.end_headers()
+                self.wfile.write(r.content)
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(Handler, port)
+
+
+class ReplayServer(_Server):
+    """
+    Serves a recorded bundle, optionally with injected latency and errors
+
+    Parameters:
+    -----------
+    bundle : Bundle or Path
+        Recorded responses
+    latency : float
+        Seconds added to every response
+    jitter : float
+        Extra random latency, uniform in [0, jitter] seconds
+    error_rate : float
+        Probability (0-1) that a request fails instead of being served
+    error_mode : str
+        'status' replies with error_status, 'reset' drops the connection
+    error_status : int
+        HTTP status used for injected errors (503 by default, retried by the client)
+    seed : int (optional)
+        Seed for the latency/error RNG, for reproducible runs
+    """
+    def __init__(self, bundle, port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 error_mode='status', error_status=503, seed=None):
+        self.bundle = bundle if isinstance(bundle, Bundle) else Bundle(bundle)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_mode = error_mode
+        self.error_status = error_status
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.counters = {'served': 0, 'errors': 0, 'missing': 0}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server.rng_lock:
+                    delay = server.latency + server.rng.uniform(0, server.jitter)
+                    fail = server.rng.random() < server.error_rate
+                time.sleep(delay)
+
+                if fail:
+                    server._count('errors')
+                    if server.error_mode == 'reset':
+                        self.close_connection = True
+                        self.connection.close()
+                        return
+                    self.send_error(server.error_status, "injected error")
+                    return
+
+                found = server.bundle.get(self.path.lstrip('/'))
+                if found is None:
+                    if self.path.rstrip('/') in ('/understat', '/fotmob'):
+                        # homepage hit (soccerdata fetches it for cookies)
+                        found = (200, 'text/html', b'')
+                    else:
+                        server._count('missing')
+                        self.send_error(404, "not in bundle")
+                        return
+
+                status, content_type, body = found
+                server._count('served')
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(Handler, port)
+
+    def _count(self, key):
+        with self.rng_lock:
+            self.counters[key] += 1
+
+
+def record_bundle(bundle_dir, season="2025"):
+    """
+    Record the league payload, every finished matchDetails payload and the
+    Understat season data into bundle_dir
+    """
+    import soccerdata as sd
+    import tempfile
+    from .http_client import HttpClient
+
+    bundle = Bundle(bundle_dir)
+    client = HttpClient()
+
+    with RecordingProxy(bundle) as proxy:
+        print(f"Recording through {proxy.base_url} into {bundle_dir}")
+
+        r = client.get(f"{proxy.fotmob_url}/api/leagues?id=47", timeout=30)
+        matches = r.json().get('fixtures', {}).get('allMatches', [])
+        game_ids = [m['id'] for m in matches if m.get('status', {}).get('finished') and m.get('id')]
+        print(f" > league recorded, {len(game_ids)} finished matches")
+
+        for i, game_id in enumerate(game_ids):
+            try:
+                client.get(f"{proxy.fotmob_url}/api/matchDetails?matchId={game_id}", timeout=30)
+            except Exception as e:
+                print(f" x Match {game_id}: {e}")
+            if i % 20 == 0:
+                print(f" > Recorded {i}/{len(game_ids)} matches...")
+
+        # soccerdata builds every Understat URL from this module constant
+        sd.understat.UNDERSTAT_URL = proxy.understat_url
+        with tempfile.TemporaryDirectory() as tmp:
+            ud = sd.Understat(leagues="ENG-Premier League", seasons=season,
+                              data_dir=Path(tmp), no_cache=True)
+            ud.read_player_season_stats()
+        print(" > understat recorded")
+
+    bundle.save()
+    print(f"Saved {len(bundle)} responses to {bundle_dir}")
+    return bundle
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or replay FotMob/Understat responses")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    rec = sub.add_parser('record', help="record a fixture bundle from the live sites")
+    rec.add_argument('bundle', type=Path)
+    rec.add_argument('--season', default="2025")
+
+    srv = sub.add_parser('serve', help="serve a recorded bundle")
+    srv.add_argument('bundle', type=Path)
+    srv.add_argument('--port', type=int, default=8765)
+    srv.add_argument('--latency', type=float, default=0.0)
+    srv.add_argument('--jitter', type=float, default=0.0)
+    srv.add_argument('--error-rate', type=float, default=0.0)
+    srv.add_argument('--error-mode', choices=['status', 'reset'], default='status')
+    srv.add_argument('--seed', type=int, default=None)
+
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        record_bundle(args.bundle, season=args.season)
+        return
+
+    server = ReplayServer(args.bundle, port=args.port, latency=args.latency, jitter=args.jitter,
+                          error_rate=args.error_rate, error_mode=args.error_mode, seed=args.seed)
+    print(f"Serving {len(server.bundle)} recorded responses. Point the pipeline at it with:")
+    print(f"  export FOTMOB_BASE_URL={server.fotmob_url}")
+    print(f"  export UNDERSTAT_BASE_URL={server.understat_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
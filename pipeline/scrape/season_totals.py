@@ -0,0 +1,184 @@
+"""
+Online Season Totals
+Running per-player sums (and per-player rating means) that are updated as
+each batch of matches is parsed, so the season tables never need every
+per-match row in memory at once - only one running entry per player
+
+Float columns are summed with the same compensated (Kahan) summation pandas
+uses in groupby().sum()/.mean(), so feeding the rows in schedule order gives
+exactly the numbers the old groupby/merge produced. Feeding them in any other
+order only gives the same numbers within float tolerance (FactWriter rebuilds
+instead when that would happen).
+"""
+import pandas as pd
+
+from .stats import OUTFIELD_STATS
+
+
+GROUP_KEYS = ['player_id', 'name', 'team']
+
+# defensive table: every numeric column is summed (game_id included - the
+# season file has always carried that sum)
+DEFENSE_SUM_COLS = ['game_id'] + list(OUTFIELD_STATS)
+DEFENSE_FLOAT_COLS = ['rating']
+
+KEEPER_SUM_COLS = [
+    'saves', 'goals_conceded', 'punches', 'high_claims',
+    'recoveries', 'touches', 'passes_accurate', 'long_balls_accurate',
+    'goals_prevented', 'xgot_faced', 'minutes', 'clean_sheet'
+]
+KEEPER_FLOAT_COLS = ['goals_prevented', 'xgot_faced']
+
+
+class SeasonTotals:
+    """
+    Running totals per (player_id, name, team), plus an optional mean of one
+    column per player_id (across every name/team the player shows up under)
+
+    Parameters:
+    -----------
+    sum_cols : list
+        Columns summed per key, in output order
+    float_cols : list
+        Which of sum_cols are floats (compensated summation, NaN skipped)
+    mean_col : str (optional)
+        Column averaged per player_id, output as avg_<mean_col>
+    """
+    def __init__(self, sum_cols, float_cols=(), mean_col=None):
+        self.sum_cols = list(sum_cols)
+        self.float_cols = [c for c in self.sum_cols if c in set(float_cols)]
+        self._is_float = [c in set(float_cols) for c in self.sum_cols]
+        self.mean_col = mean_col
+
+        self._slots = {}   # key -> index into _keys/_sums/_comps
+        self._keys = []
+        self._sums = []    # running sums, one list per key
+        self._comps = []   # Kahan compensation per float column (0 for ints)
+        self._means = {}   # player_id -> [sum, compensation, count]
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add_frame(self, df):
+        """
+        Fold a batch of per-match rows (DataFrame with GROUP_KEYS + sum_cols) into the totals
+        """
+        if df is None or df.empty:
+            return
+
+        # groupby drops rows with a missing key, so do we
+        valid = df[GROUP_KEYS].notna().all(axis=1).tolist()
+        keys = zip(*(df[k].tolist() for k in GROUP_KEYS))
+        values = zip(*(df[c].tolist() for c in self.sum_cols))
+        is_float = self._is_float
+
+        for ok, key, vals in zip(valid, keys, values):
+            if not ok:
+                continue
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = len(self._keys)
+                self._keys.append(key)
+                self._sums.append([0.0 if f else 0 for f in is_float])
+                self._comps.append([0.0] * len(is_float))
+            sums, comps = self._sums[slot], self._comps[slot]
+            for j, v in enumerate(vals):
+                if is_float[j]:
+                    if v != v:
+                        continue
+                    y = v - comps[j]
+                    t = sums[j] + y
+                    c = t - sums[j] - y
+                    comps[j] = c if c == c else 0.0
+                    sums[j] = t
+                else:
+                    sums[j] += v
+
+        if self.mean_col is not None:
+            pid_valid = df['player_id'].notna().tolist()
+            for ok, player_id, v in zip(pid_valid, df['player_id'].tolist(), df[self.mean_col].tolist()):
+                if not ok or v != v:
+                    continue
+                acc = self._means.get(player_id)
+                if acc is None:
+                    acc = self._means[player_id] = [0.0, 0.0, 0]
+                y = v - acc[1]
+                t = acc[0] + y
+                c = t - acc[0] - y
+                acc[1] = c if c == c else 0.0
+                acc[0] = t
+                acc[2] += 1
+
+    def to_frame(self):
+        """
+        Season table, one row per key in groupby order (sorted by GROUP_KEYS)
+        """
+        order = sorted(range(len(self._keys)), key=self._keys.__getitem__)
+        data = {}
+        for i, column in enumerate(GROUP_KEYS):
+            data[column] = [self._keys[s][i] for s in order]
+        for j, column in enumerate(self.sum_cols):
+            dtype = 'float64' if self._is_float[j] else 'int64'
+            data[column] = pd.array([self._sums[s][j] for s in order], dtype=dtype).to_numpy()
+        season_df = pd.DataFrame(data, columns=GROUP_KEYS + self.sum_cols)
+        season_df['player_id'] = season_df['player_id'].astype('int64')
+
+        if self.mean_col is not None:
+            # players whose every rating was missing drop out, like the old inner merge
+            means = {pid: acc[0] / acc[2] for pid, acc in self._means.items() if acc[2]}
+            season_df[f"avg_{self.mean_col}"] = season_df['player_id'].map(means)
+            season_df = season_df[season_df['player_id'].isin(means.keys())].reset_index(drop=True)
+        return season_df
+
+    # --- persistence (running state, compensation terms included) ---
+    def state_frames(self):
+        """
+        Returns (totals, means) DataFrames holding the full running state
+        """
+        data = {column: [key[i] for key in self._keys] for i, column in enumerate(GROUP_KEYS)}
+        for j, column in enumerate(self.sum_cols):
+            data[column] = [sums[j] for sums in self._sums]
+        for j, column in enumerate(self.sum_cols):
+            if self._is_float[j]:
+                data[f"{column}_comp"] = [comps[j] for comps in self._comps]
+        totals = pd.DataFrame(data, columns=list(data))
+
+        means = None
+        if self.mean_col is not None:
+            means = pd.DataFrame({
+                'player_id': list(self._means),
+                f"{self.mean_col}_sum": [acc[0] for acc in self._means.values()],
+                f"{self.mean_col}_comp": [acc[1] for acc in self._means.values()],
+                f"{self.mean_col}_count": [acc[2] for acc in self._means.values()],
+            })
+        return totals, means
+
+    def load_state(self, totals, means=None):
+        """
+        Resume from state_frames() output (missing compensation columns count as 0)
+        """
+        if totals is not None and not totals.empty:
+            keys = zip(*(totals[k].tolist() for k in GROUP_KEYS))
+            sums = zip(*(totals[c].tolist() for c in self.sum_cols))
+            comps = zip(*(totals[f"{c}_comp"].tolist() if f"{c}_comp" in totals else [0.0] * len(totals)
+                          for c in self.sum_cols))
+            for key, row_sums, row_comps in zip(keys, sums, comps):
+                self._slots[key] = len(self._keys)
+                self._keys.append(key)
+                self._sums.append(list(row_sums))
+                self._comps.append([c if f else 0.0 for c, f in zip(row_comps, self._is_float)])
+
+        if self.mean_col is not None and means is not None and not means.empty:
+            col = self.mean_col
+            comp = means[f"{col}_comp"].tolist() if f"{col}_comp" in means else [0.0] * len(means)
+            for player_id, s, c, n in zip(means['player_id'].tolist(), means[f"{col}_sum"].tolist(),
+                                          comp, means[f"{col}_count"].tolist()):
+                self._means[player_id] = [s, c, n]
+
+
+def defense_totals():
+    return SeasonTotals(DEFENSE_SUM_COLS, DEFENSE_FLOAT_COLS)
+
+
+def keeper_totals():
+    return SeasonTotals(KEEPER_SUM_COLS, KEEPER_FLOAT_COLS, mean_col='rating')
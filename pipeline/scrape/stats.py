@@ -0,0 +1,135 @@
+"""
+Player Stat Extraction
+Flattens a FotMob player's stat categories into one title -> value index in a
+single pass, then fills output columns from a declarative mapping
+
+FotMob groups a player's stats into categories ("Top stats", "Defense",
+"Duels", ...), each one a dict of {title: {"stat": {"value": ...}}}. A title
+normally lives in exactly one category; when it shows up in several, the
+index keeps every value (in category order) so the reducers can decide.
+"""
+
+
+class _Repeated(list):
+    """
+    Marks an index entry whose title appeared in more than one category
+    """
+    __slots__ = ()
+
+
+def index_stats(stats_list, titles=None):
+    """
+    One pass over every category -> {title: value}
+    (a _Repeated list of values for titles found in several categories)
+
+    titles limits the index to the stat titles we actually map
+    """
+    index = {}
+    for category in stats_list:
+        for title, metric in category.get('stats', {}).items():
+            if titles is not None and title not in titles:
+                continue
+            # Structure: "Tackles": { "stat": { "value": 1 } }
+            value = metric.get('stat', {}).get('value', 0)
+            if title in index:
+                prev = index[title]
+                if type(prev) is _Repeated:
+                    prev.append(value)
+                else:
+                    index[title] = _Repeated((prev, value))
+            else:
+                index[title] = value
+    return index
+
+
+# ========================================
+# REDUCERS
+# ========================================
+# how a title's value(s) become the output value:
+#   'sum'         - cast every value and add them up (metrics can be split
+#                   across categories, rare but possible)
+#   'first'       - cast the first value found
+#   'last_truthy' - the last non-zero value wins, cast(0) if there is none
+SUM, FIRST, LAST_TRUTHY = 'sum', 'first', 'last_truthy'
+
+
+def _reduce_repeated(values, reducer, cast, zero):
+    if reducer == SUM:
+        return sum(cast(v) for v in values)
+    if reducer == FIRST:
+        return cast(values[0])
+    result = zero
+    for v in values:
+        if v:
+            result = cast(v)
+    return result
+
+
+def _float_or_zero(value):
+    return float(value or 0.0)
+
+
+# ========================================
+# MAPPINGS: output column -> (FotMob stat title, reducer, cast)
+# ========================================
+# Order matters - it's the column order of the per-match rows (and the CSVs)
+OUTFIELD_STATS = {
+    'tackles_won': ('Tackles', SUM, int),
+    'interceptions': ('Interceptions', SUM, int),
+    'duels_won': ('Duels won', SUM, int),
+    'was_fouled': ('Was fouled', SUM, int),
+    'fouls_committed': ('Fouls committed', SUM, int),
+    'minutes': ('Minutes played', LAST_TRUTHY, int),
+    'rating': ('FotMob rating', LAST_TRUTHY, float), # TODO: get rid of this or move to a different
+}
+
+KEEPER_STATS = {
+    'minutes': ('Minutes played', FIRST, int),
+    'rating': ('FotMob rating', FIRST, _float_or_zero),
+    # GK Specifics
+    'saves': ('Saves', FIRST, int),
+    'goals_conceded': ('Goals conceded', FIRST, int),
+    'xgot_faced': ('Expected goals on target (xGOT)', FIRST, _float_or_zero), # Post-Shot xG faced
+    'goals_prevented': ('Goals prevented', FIRST, _float_or_zero),
+    'punches': ('Punches', FIRST, int),
+    'high_claims': ('High claims', FIRST, int),
+    'recoveries': ('Recoveries', FIRST, int),
+    'touches': ('Touches', FIRST, int),
+    # Distribution
+    'passes_accurate': ('Accurate passes', FIRST, int),
+    'long_balls_accurate': ('Accurate long balls', FIRST, int),
+}
+
+
+def compile_mapping(mapping):
+    """
+    Turn a mapping into a list of (column, title, reducer, cast, zero) for extract_stats
+    """
+    compiled = []
+    for column, (title, reducer, cast) in mapping.items():
+        if reducer not in (SUM, FIRST, LAST_TRUTHY):
+            raise ValueError(f"Unknown reducer '{reducer}' for column '{column}'")
+        compiled.append((column, title, reducer, cast, cast(0)))
+    return compiled
+
+
+OUTFIELD_EXTRACTORS = compile_mapping(OUTFIELD_STATS)
+KEEPER_EXTRACTORS = compile_mapping(KEEPER_STATS)
+
+# every title either table reads - everything else is skipped while indexing
+MAPPED_TITLES = frozenset(title for title, _, _ in list(OUTFIELD_STATS.values()) + list(KEEPER_STATS.values()))
+
+
+def extract_stats(index, extractors, row):
+    """
+    Fill `row` with one value per compiled extractor, looked up in the index
+    """
+    for column, title, reducer, cast, zero in extractors:
+        entry = index.get(title, 0)
+        if type(entry) is _Repeated:
+            row[column] = _reduce_repeated(entry, reducer, cast, zero)
+        elif reducer == LAST_TRUTHY:
+            row[column] = cast(entry) if entry else zero
+        else:
+            row[column] = cast(entry)
+    return row
@@ -0,0 +1,308 @@
+"""
+Run Telemetry
+Per-stage numbers for every pipeline run: wall time, CPU time, peak RSS,
+rows in/out (CSV inputs/outputs of the stage), HTTP requests/bytes/retries
+(from the shared http client) and DB statements/rows (push_to_db's engine)
+
+Each run writes a JSON report to data/reports/run-<timestamp>.json (and
+latest.json). Compare two of them to catch regressions:
+    python pipeline/telemetry.py diff data/reports/run-a.json data/reports/run-b.json
+
+Stages can run at the same time (see dag.py), and CPU time, RSS and the
+HTTP/DB counters are process-wide - so for a stage that overlapped another
+one they include the other stage's share. Each stage records the stages it
+overlapped with.
+"""
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+SAMPLE_INTERVAL = 0.05  # seconds between RSS samples
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def rss_bytes():
+    """
+    Current resident set size (falls back to the peak where /proc isn't available)
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+# ========================================
+# DB COUNTERS
+# ========================================
+_db_lock = threading.Lock()
+_db_counters = {'statements': 0, 'rows': 0}
+_watched_engines = set()
+
+
+def db_stats():
+    with _db_lock:
+        return dict(_db_counters)
+
+
+def watch_engine(engine):
+    """
+    Count the statements (and rows they touched) run through a SQLAlchemy engine
+    """
+    from sqlalchemy import event
+
+    if id(engine) in _watched_engines:
+        return engine
+    _watched_engines.add(id(engine))
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        # rowcount is -1 when the driver doesn't know (e.g. SELECTs on some drivers)
+        rows = cursor.rowcount if cursor.rowcount and cursor.rowcount > 0 else 0
+        with _db_lock:
+            _db_counters['statements'] += 1
+            _db_counters['rows'] += rows
+
+    return engine
+
+
+def http_stats():
+    # only counts once the client exists - the scrapers create it on first use
+    from scrape import http_client
+    if http_client._client is None:
+        return {}
+    return http_client._client.stats()
+
+
+def csv_rows(paths):
+    """
+    Data rows across the CSV files in paths (header excluded, missing files skipped)
+    """
+    total = 0
+    for path in paths:
+        path = Path(path)
+        if path.suffix != '.csv' or not path.exists():
+            continue
+        with open(path, 'rb') as f:
+            lines = sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 20), b''))
+        total += max(lines - 1, 0)
+    return total
+
+
+def _delta(after, before):
+    return {key: after[key] - before.get(key, 0) for key in after}
+
+
+def git_commit(cwd=Path(__file__).resolve().parent):
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=cwd,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+# ========================================
+# RUN REPORT
+# ========================================
+class RunTelemetry:
+    """
+    Collects one record per stage and writes the run report
+
+    Parameters:
+    -----------
+    report_dir : Path
+        Where run-<timestamp>.json and latest.json go
+    config : dict (optional)
+        Settings worth keeping next to the numbers (env knobs, season...)
+    """
+    def __init__(self, report_dir, config=None):
+        self.report_dir = Path(report_dir)
+        self.config = config or {}
+        self.started_at = datetime.now(timezone.utc)
+        self.run_id = self.started_at.strftime('%Y%m%dT%H%M%SZ')
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self.stages = {}
+        self._active = {}  # stage name -> peak RSS seen while it ran
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+
+    # --- RSS sampling (one thread for every active stage) ---
+    def _sample(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            rss = rss_bytes()
+            with self._lock:
+                for name, peak in self._active.items():
+                    if rss > peak:
+                        self._active[name] = rss
+
+    def start(self):
+        if self._sampler is None:
+            self._sampler = threading.Thread(target=self._sample, name='telemetry-rss', daemon=True)
+            self._sampler.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+    @contextmanager
+    def measure(self, name, inputs=(), outputs=()):
+        """
+        Time one stage run. Rows in are counted before the stage, rows out after it.
+        """
+        self.start()
+        record = {
+            'status': None,
+            'rows_in': csv_rows(inputs),
+            'rss_start_mb': None,
+        }
+        rss = rss_bytes()
+        with self._lock:
+            record['overlapped'] = sorted(self._active)
+            for other in self._active:
+                overlapped = self.stages[other].setdefault('overlapped', [])
+                if name not in overlapped:
+                    overlapped.append(name)
+            self._active[name] = rss
+            self.stages[name] = record
+        record['rss_start_mb'] = round(rss / 1e6, 1)
+
+        http_before, db_before = http_stats(), db_stats()
+        record['started'] = round(time.perf_counter() - self._wall_start, 3)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_s'] = round(time.perf_counter() - wall, 3)
+            record['cpu_s'] = round(time.process_time() - cpu, 3)
+            record['finished'] = round(time.perf_counter() - self._wall_start, 3)
+            rss = rss_bytes()
+            with self._lock:
+                peak = max(self._active.pop(name), rss)
+            record['peak_rss_mb'] = round(peak / 1e6, 1)
+            record['rows_out'] = csv_rows(outputs)
+            record['http'] = _delta(http_stats(), http_before)
+            record['db'] = _delta(db_stats(), db_before)
+
+    def record(self, name, status):
+        """
+        Set a stage's final status (stages that never ran - cached, blocked,
+        not selected - get a record with just the status)
+        """
+        with self._lock:
+            # re-inserted so the report lists stages in the order they're given here
+            record = self.stages.pop(name, {})
+            record['status'] = status
+            self.stages[name] = record
+
+    def report(self):
+        return {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'config': self.config,
+            'wall_s': round(time.perf_counter() - self._wall_start, 3),
+            'cpu_s': round(time.process_time() - self._cpu_start, 3),
+            'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                                 * (1 if sys.platform == 'darwin' else 1024) / 1e6, 1),
+            'stages': self.stages,
+        }
+
+    def write(self):
+        """
+        Write the report, returns its path
+        """
+        self.stop()
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(self.report(), indent=2, default=str)
+        path = self.report_dir / f"run-{self.run_id}.json"
+        path.write_text(data)
+        (self.report_dir / 'latest.json').write_text(data)
+        return path
+
+
+# ========================================
+# COMPARING RUNS
+# ========================================
+METRICS = ['wall_s', 'cpu_s', 'peak_rss_mb', 'rows_in', 'rows_out']
+
+
+def compare(old, new, threshold=0.2):
+    """
+    Per-stage changes between two run reports
+
+    Returns:
+    --------
+    list of (stage, metric, old, new, flagged) - flagged when the metric grew
+    by more than `threshold` (as a fraction), or the row counts changed at all
+    """
+    rows = []
+    stages = list(old['stages']) + [s for s in new['stages'] if s not in old['stages']]
+    for stage in stages:
+        a, b = old['stages'].get(stage, {}), new['stages'].get(stage, {})
+        if a.get('status') != b.get('status'):
+            rows.append((stage, 'status', a.get('status'), b.get('status'), False))
+        # a cached stage has no numbers to compare
+        if 'wall_s' not in a or 'wall_s' not in b:
+            continue
+        metrics = [(m, a.get(m), b.get(m)) for m in METRICS]
+        for group in ('http', 'db'):
+            for key in sorted(set(a.get(group, {})) | set(b.get(group, {}))):
+                metrics.append((f"{group}.{key}", a.get(group, {}).get(key, 0), b.get(group, {}).get(key, 0)))
+        for metric, x, y in metrics:
+            if x is None or y is None or x == y:
+                continue
+            if metric.startswith('rows'):
+                flagged = True
+            else:
+                flagged = y > x * (1 + threshold) and y - x > 0.05
+            rows.append((stage, metric, x, y, flagged))
+    return rows
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare two pipeline run reports")
+    sub = parser.add_subparsers(dest='command', required=True)
+    diff = sub.add_parser('diff', help="per-stage changes between two reports")
+    diff.add_argument('old', type=Path)
+    diff.add_argument('new', type=Path)
+    diff.add_argument('--threshold', type=float, default=0.2,
+                      help="flag metrics that grew by more than this fraction (default 0.2)")
+    args = parser.parse_args()
+
+    old = json.loads(args.old.read_text())
+    new = json.loads(args.new.read_text())
+    rows = compare(old, new, args.threshold)
+
+    print(f"{args.old.name} ({old.get('git_commit')}) -> {args.new.name} ({new.get('git_commit')})")
+    print(f"total wall: {old['wall_s']:.1f}s -> {new['wall_s']:.1f}s")
+    print(f"\n{'stage':12} {'metric':22} {'old':>12} {'new':>12}")
+    for stage, metric, x, y, flagged in rows:
+        print(f"{stage:12} {metric:22} {str(x):>12} {str(y):>12}{'  <-- regression?' if flagged else ''}")
+    if not rows:
+        print("  (no changes)")
+    sys.exit(1 if any(flagged for *_, flagged in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
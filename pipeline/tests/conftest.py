@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# same imports as main.py and the benchmarks: pipeline/ on the path, plus the synthetic data generator
+PIPELINE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PIPELINE_DIR / 'benchmarks'))
+sys.path.insert(0, str(PIPELINE_DIR))
@@ -0,0 +1,39 @@
+"""
+Harvester
+A malformed match payload is logged and skipped - it can't take down the
+rest of the batch
+"""
+import json
+
+import pytest
+
+from scrape.harvester import parse_batch
+from synthetic import SyntheticSeasons
+
+
+def payload(player_stats):
+    return json.dumps({'content': {'playerStats': player_stats}}).encode()
+
+
+@pytest.mark.parametrize('player_stats', [
+    {'10': [{'name': 'Someone', 'isGoalkeeper': False, 'stats': []}, None]},  # Format B with a null entry
+    {'10': [{'name': 'Someone', 'stats': []}], '11': 'not a team'},
+    {'10': None},
+    {'10': {'name': 'Someone', 'stats': []}, '11': 42},  # Format A with a non-dict player
+], ids=['null-player', 'bad-team', 'null-root-entry', 'non-dict-player'])
+def test_malformed_match_is_skipped(player_stats):
+    data = SyntheticSeasons(1, 1, seed=0, teams=4)
+    (first_id, first), (second_id, second) = list(data.matches('mixed'))[:2]
+
+    good = parse_batch([(first_id, first), (second_id, second)])
+    outfield, keepers, matches = parse_batch([(first_id, first), (1, payload(player_stats)), (second_id, second)])
+
+    # the good matches' rows all come through
+    good_ids = {first_id, second_id}
+    assert [row for row in outfield.to_frame().to_dict('records') if row['game_id'] in good_ids] == \
+        good[0].to_frame().to_dict('records')
+    assert keepers.to_frame().to_dict('records') == good[1].to_frame().to_dict('records')
+
+    game_id, _, messages = matches[1]
+    assert game_id == 1
+    assert messages and all(message.startswith(" x Match 1: ") for message in messages)
@@ -0,0 +1,58 @@
+"""
+Name Cache
+A run answered from last week's NameCache has to give what matching every
+player from scratch gives
+"""
+import contextlib
+import io
+import random
+
+import pandas as pd
+import pytest
+
+from format.name_cache import NameCache
+from format.name_matcher import cached_match_names, fuzzy_match_names
+from synthetic import SyntheticSeasons, strip_accents
+
+
+def warm_and_cold(tmp_path, last_week, this_week, fotmob_df, manual_mappings=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        cache = NameCache(tmp_path / 'names.json', 85, manual_mappings)
+        cached_match_names(last_week, fotmob_df, 85, manual_mappings, cache)
+        cache.save()
+        cache = NameCache(tmp_path / 'names.json', 85, manual_mappings)
+        warm = cached_match_names(this_week, fotmob_df, 85, manual_mappings, cache)
+        cold = fuzzy_match_names(this_week, fotmob_df, 85, manual_mappings)
+    return warm, cold
+
+
+def test_new_team_spelling_replaces_cross_team_exact_match(tmp_path):
+    fotmob_df = pd.DataFrame([{'player_id': 1, 'name': 'André', 'team': 'Wolves'},
+                              {'player_id': 2, 'name': 'Pedro Neto', 'team': 'Wolves'}])
+    last_week = pd.DataFrame([{'player': 'Andre', 'team': 'Fulham'},
+                              {'player': 'Pedro Neto', 'team': 'Wolverhampton Wanderers'}])
+    this_week = pd.concat([last_week, pd.DataFrame([{'player': 'André', 'team': 'Wolverhampton Wanderers'}])],
+                          ignore_index=True)
+
+    warm, cold = warm_and_cold(tmp_path, last_week, this_week, fotmob_df)
+    assert cold.loc[0, 'matched_name'] == 'André'
+    pd.testing.assert_frame_equal(warm, cold)
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_warm_run_matches_cold_run(tmp_path, seed):
+    # last week's Understat table had some players missing, some listed under another team
+    # and some spelled without accents
+    data = SyntheticSeasons(1, 1, seed=seed, teams=8)
+    this_week = data.understat_season()
+    fotmob_df = pd.DataFrame([{'player_id': player['player_id'], 'name': player['name'], 'team': team['fotmob']}
+                              for ls in data.league_seasons
+                              for team, squad in zip(ls['teams'], ls['squads']) for player in squad])
+    rng = random.Random(seed)
+    last_week = this_week[[rng.random() > 0.1 for _ in range(len(this_week))]].copy()
+    teams = sorted(this_week['team'].unique())
+    last_week['team'] = [rng.choice(teams) if rng.random() < 0.1 else team for team in last_week['team']]
+    last_week['player'] = [strip_accents(name) if rng.random() < 0.2 else name for name in last_week['player']]
+
+    warm, cold = warm_and_cold(tmp_path, last_week, this_week, fotmob_df)
+    pd.testing.assert_frame_equal(warm, cold)
@@ -0,0 +1,100 @@
+"""
+N-gram Index
+NgramIndex-backed matching has to pick what brute force picks - always for
+names already in the index, at least 99% of the time for misspelled ones -
+and fuzzy_match_names() only builds the index past NGRAM_MIN_CHOICES /
+NGRAM_MIN_QUERIES
+"""
+import random
+
+import pandas as pd
+import pytest
+
+import format.name_matcher as name_matcher
+from format.name_matcher import best_matches, fuzzy_match_names, normalize_names
+from format.ngram_index import NgramIndex
+from synthetic import SyntheticSeasons, roster, strip_accents
+
+
+def misspelled(name, rng):
+    """
+    How a FotMob name might come in: words reordered, accents dropped, a
+    letter missing or two swapped
+    """
+    roll = rng.random()
+    if roll < 0.25:
+        return ' '.join(reversed(name.split()))
+    if roll < 0.5:
+        return strip_accents(name)
+    if len(name) < 5:
+        return name
+    i = rng.randrange(1, len(name) - 2)
+    if roll < 0.75:
+        return name[:i] + name[i + 1:]
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+
+@pytest.fixture(scope='module')
+def league_frames():
+    data = SyntheticSeasons(1, 1, seed=0)
+    fotmob_df = pd.DataFrame([{'player_id': player['player_id'], 'name': player['name'], 'team': team['fotmob']}
+                              for ls in data.league_seasons
+                              for team, squad in zip(ls['teams'], ls['squads']) for player in squad])
+    return data.understat_season(), fotmob_df
+
+
+@pytest.fixture(scope='module', params=range(5))
+def large_roster(request):
+    # enough names to be past NGRAM_MIN_CHOICES, like a multi-league, multi-season run
+    players = roster(8000, seed=request.param)
+    choices = list(dict.fromkeys(normalize_names([p['understat_name'] for p in players]).tolist()))
+    assert len(choices) >= name_matcher.NGRAM_MIN_CHOICES
+    return players, choices, NgramIndex(choices), request.param
+
+
+def test_index_recall_against_brute_force(large_roster):
+    # retrieval is approximate - a common surname can crowd the best name out of the top K
+    players, choices, index, seed = large_roster
+    rng = random.Random(seed)
+    queries = normalize_names([misspelled(p['name'], rng) for p in rng.sample(players, 500)]).tolist()
+
+    expected = best_matches(queries, choices, score_cutoff=85)
+    found = index.best_matches(queries, score_cutoff=85)
+    assert sum(match is not None for match, _ in expected) > len(queries) // 2
+    agree = sum(got == want for got, want in zip(found, expected))
+    assert agree >= 0.99 * len(queries), f"{agree}/{len(queries)} agree with brute force"
+
+
+def test_index_finds_exact_and_normalized_names(large_roster):
+    # a name that's in the index (as is, or once case and accents are folded) always is its best match
+    players, choices, index, seed = large_roster
+    rng = random.Random(seed)
+    sample = rng.sample(players, 500)
+    queries = normalize_names([p['understat_name'] for p in sample[:250]]
+                              + [strip_accents(p['understat_name']).upper() for p in sample[250:]]).tolist()
+
+    expected = best_matches(queries, choices, score_cutoff=85)
+    for query, got, want in zip(queries, index.best_matches(queries, score_cutoff=85), expected):
+        assert got[1] == 100, query
+        assert got == want, query
+
+
+def test_small_blocks_are_brute_forced(league_frames, monkeypatch):
+    understat_df, fotmob_df = league_frames
+    built = []
+
+    class SpyIndex(NgramIndex):
+        def __init__(self, choices, n=3):
+            built.append(len(choices))
+            super().__init__(choices, n)
+
+    monkeypatch.setattr(name_matcher, 'NgramIndex', SpyIndex)
+    expected = fuzzy_match_names(understat_df, fotmob_df)
+    assert built == []  # a league's team blocks are far below the threshold
+
+    # ...and with the thresholds lowered, the index is used and matches the same
+    monkeypatch.setattr(name_matcher, 'NGRAM_MIN_CHOICES', 1)
+    monkeypatch.setattr(name_matcher, 'NGRAM_MIN_QUERIES', 1)
+    indexed = fuzzy_match_names(understat_df, fotmob_df)
+    assert built
+    pd.testing.assert_frame_equal(indexed, expected)
@@ -0,0 +1,125 @@
+"""
+Kill & Resume
+A harvest SIGKILLed right after its first checkpoint and rerun with --resume
+has to write the same season tables, byte for byte, as a run that was never
+interrupted - in both aggregation modes (incremental runs commit at each
+checkpoint, rebuild runs record checkpoint.json)
+
+The harvest runs in a subprocess (this file, run as a script) against the
+replay server serving synthetic matchDetails payloads.
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+if __name__ == "__main__":
+    # run as the harvest subprocess - make pipeline/ importable, the way conftest.py does
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scrape.replay import Bundle, ReplayServer  # noqa: E402
+
+CHECKPOINT_EVERY = 4
+SEASON_FILES = ['fotmob_defense_season_final.csv', 'fotmob_keepers_season.csv']
+
+
+def harvest(store_dir, out_dir, game_ids, rebuild=False, resume=False):
+    """
+    get_fotmob_stats() without the league lookup: harvest what the fact store
+    is missing into a checkpointing writer, then write both season tables
+    """
+    from scrape.fact_store import FactStore
+    from scrape.harvester import harvest_matches
+
+    store = FactStore(store_dir)
+    new_ids = store.missing(game_ids)
+    resumed = store.checkpoint_ids() if resume else []
+    if resumed:
+        done = set(resumed)
+        new_ids = [game_id for game_id in new_ids if game_id not in done]
+        print(f" > Resuming: {len(resumed)} matches done before the last checkpoint, {len(new_ids)} left")
+
+    writer = store.writer(rebuild=rebuild, checkpoint_every=CHECKPOINT_EVERY, resume=resumed, order=game_ids)
+    harvest_matches(new_ids, concurrency=2, parse_batch_size=2, sink=writer.add)
+    defense_season, keeper_season = writer.commit()
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    defense_season.to_csv(out_dir / SEASON_FILES[0], index=False)
+    keeper_season.to_csv(out_dir / SEASON_FILES[1], index=False)
+
+
+# ========================================
+# TEST
+# ========================================
+@pytest.fixture(scope='module')
+def replay(tmp_path_factory):
+    from synthetic import SyntheticSeasons
+
+    # a small league - 30 matches
+    data = SyntheticSeasons(1, 1, seed=7, teams=6)
+    bundle = Bundle(tmp_path_factory.mktemp('bundle'))
+    game_ids = []
+    for game_id, body in data.matches('mixed'):
+        bundle.put(f"fotmob/api/matchDetails?matchId={game_id}", 200, 'application/json', body)
+        game_ids.append(game_id)
+    bundle.save()
+
+    with ReplayServer(bundle, latency=0.02) as server:
+        yield server, game_ids
+
+
+def start_harvest(server, ids_path, store_dir, out_dir, rebuild, resume=False):
+    env = dict(os.environ, FOTMOB_BASE_URL=server.fotmob_url, HTTP_RATE_LIMIT='0')
+    command = [sys.executable, '-u', __file__, str(ids_path), str(store_dir), str(out_dir)]
+    command += ['--rebuild'] * rebuild + ['--resume'] * resume
+    return subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+
+def run_harvest(*args, **kwargs):
+    process = start_harvest(*args, **kwargs)
+    output, _ = process.communicate(timeout=120)
+    assert process.returncode == 0, output
+    return output
+
+
+@pytest.mark.parametrize('rebuild', [False, True], ids=['incremental', 'rebuild'])
+def test_resume_after_kill_matches_uninterrupted_run(replay, tmp_path, rebuild):
+    server, game_ids = replay
+    ids_path = tmp_path / 'game_ids.json'
+    ids_path.write_text(json.dumps(game_ids))
+
+    run_harvest(server, ids_path, tmp_path / 'store-ref', tmp_path / 'out-ref', rebuild)
+
+    # kill it as soon as the first checkpoint is down
+    process = start_harvest(server, ids_path, tmp_path / 'store', tmp_path / 'out', rebuild)
+    for line in process.stdout:
+        if 'Checkpoint:' in line:
+            process.send_signal(signal.SIGKILL)
+            break
+    process.wait(timeout=30)
+    assert process.returncode == -signal.SIGKILL, "the harvest finished before its first checkpoint"
+    assert not (tmp_path / 'out').exists()
+
+    served = server.counters['served']
+    run_harvest(server, ids_path, tmp_path / 'store', tmp_path / 'out', rebuild, resume=True)
+    # the checkpointed matches aren't downloaded again
+    assert server.counters['served'] - served <= len(game_ids) - CHECKPOINT_EVERY
+
+    for name in SEASON_FILES:
+        assert (tmp_path / 'out' / name).read_bytes() == (tmp_path / 'out-ref' / name).read_bytes(), name
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="harvest subprocess for the kill & resume test")
+    parser.add_argument('ids', type=Path, help="JSON list of match ids, in schedule order")
+    parser.add_argument('store', type=Path)
+    parser.add_argument('out', type=Path)
+    parser.add_argument('--rebuild', action='store_true')
+    parser.add_argument('--resume', action='store_true')
+    args = parser.parse_args()
+    harvest(args.store, args.out, json.loads(args.ids.read_text()), rebuild=args.rebuild, resume=args.resume)